@@ -3,9 +3,21 @@ import pandas as pd
 import xml.etree.ElementTree as ET
 import webbrowser
 import os
+import numpy as np
 import folium
 import branca.colormap as cm
 from folium.plugins import MarkerCluster
+from folium.utilities import JsCode
+from branca.element import MacroElement
+from jinja2 import Template
+from seismic_clusters import add_preclustered_layer
+from province_gazetteer import get_gazetteer
+from seismic_analytics import parse_thai_datetime
+from map_templates import add_data_slot, load_template, inject_data
+
+# จำนวนเหตุการณ์ที่เริ่มใช้โหมด bulk (GeoJSON ก้อนเดียว) แทน CircleMarker รายจุด
+BULK_THRESHOLD = 1000
+SEISMIC_URL = "http://data.tmd.go.th/api/DailySeismicEvent/v1/?uid=api&ukey=api12345"
 
 # Helper function เพื่อดึงข้อความจาก XML element อย่างปลอดภัย
 def get_xml_text(element, tag):
@@ -17,72 +29,222 @@ def get_xml_text(element, tag):
     return node.text if node is not None else None
 
 
-def get_seismic_data():
+def parse_seismic_xml(content):
     """
-    Fetches daily seismic event data from the TMD API and converts it into a pandas DataFrame.
+    Parses the DailySeismicEvent XML into the event DataFrame
+    (lat, lon, mag, depth, time, region, province_id, datetime). Raises ET.ParseError on invalid XML.
+    depth is numeric (km); datetime is the timezone-aware Asia/Bangkok form of the DateTimeThai text in time.
     """
-    url = "http://data.tmd.go.th/api/DailySeismicEvent/v1/?uid=api&ukey=api12345"
+    # 2. Parse XML
+    root = ET.fromstring(content)
     records = []
+    
+    # 3. Extract records
+    for event in root.findall('DailyEarthquakes'):
+        try:
+            # ใช้ get_xml_text ที่ถูกย้ายออกมาด้านนอก
+            lat = get_xml_text(event, 'Latitude')
+            lon = get_xml_text(event, 'Longitude')
+            mag = get_xml_text(event, 'Magnitude')
+            time_val = get_xml_text(event, 'DateTimeThai')
+            region = get_xml_text(event, 'OriginThai')
+
+            # ต้องแน่ใจว่าค่า Latitude, Longitude และ Magnitude มีอยู่ก่อนแปลงเป็น float
+            if lat and lon and mag:
+                records.append({
+                    'lat': float(lat),
+                    'lon': float(lon),
+                    'mag': float(mag),
+                    'depth': get_xml_text(event, 'Depth') or "0",
+                    'time': time_val or "Unknown Time",
+                    'region': region or "Unknown Location"
+                })
+        except (ValueError, TypeError) as ve: 
+            # ข้ามเรคคอร์ดที่มีข้อมูลตัวเลขไม่ถูกต้อง
+            # print(f"Skipping record due to invalid value format: {ve}")
+            continue  
+
+    df = pd.DataFrame(records)
+    if not df.empty:
+        # ชนิดข้อมูลสำหรับการวิเคราะห์ (seismic_analytics): ความลึกเป็นตัวเลข และเวลาไทยแบบมี Timezone
+        df['depth'] = pd.to_numeric(df['depth'], errors='coerce')
+        df['datetime'] = parse_thai_datetime(df['time'])
+        # รหัสจังหวัด (เช่น 'TH-57') จากชื่อจังหวัดใน OriginThai; เหตุการณ์นอกประเทศจะเป็นค่าว่าง
+        gazetteer = get_gazetteer()
+        df['province_id'] = df['region'].map(
+            {region: next(iter(gazetteer.find_in_text(region)), None) for region in df['region'].unique()}
+        )
+    return df
+
+
+def get_seismic_data(session=None, url=None, raise_errors=False):
+    """
+    Fetches daily seismic event data from the TMD API and converts it into a pandas DataFrame.
+    An optional requests.Session can be passed to reuse connections between fetches;
+    url defaults to SEISMIC_URL. Errors return an empty DataFrame, or are raised with raise_errors=True
+    (so a caller can tell a failed fetch from a day without events).
+    """
+    url = url or SEISMIC_URL
+    http = session or requests
 
     try:
         # 1. Fetch data
         print("Fetching seismic data from TMD...")
-        response = requests.get(url, timeout=15)
+        response = http.get(url, timeout=15)
         response.raise_for_status() # Raise exception for bad status codes (4xx or 5xx)
         
-        # 2. Parse XML
-        root = ET.fromstring(response.content)
-        
-        # 3. Extract records
-        for event in root.findall('DailyEarthquakes'):
-            try:
-                # ใช้ get_xml_text ที่ถูกย้ายออกมาด้านนอก
-                lat = get_xml_text(event, 'Latitude')
-                lon = get_xml_text(event, 'Longitude')
-                mag = get_xml_text(event, 'Magnitude')
-                time_val = get_xml_text(event, 'DateTimeThai')
-                region = get_xml_text(event, 'OriginThai')
-
-                # ต้องแน่ใจว่าค่า Latitude, Longitude และ Magnitude มีอยู่ก่อนแปลงเป็น float
-                if lat and lon and mag:
-                    records.append({
-                        'lat': float(lat),
-                        'lon': float(lon),
-                        'mag': float(mag),
-                        'depth': get_xml_text(event, 'Depth') or "0",
-                        'time': time_val or "Unknown Time",
-                        'region': region or "Unknown Location"
-                    })
-            except (ValueError, TypeError) as ve: 
-                # ข้ามเรคคอร์ดที่มีข้อมูลตัวเลขไม่ถูกต้อง
-                # print(f"Skipping record due to invalid value format: {ve}")
-                continue  
-
-        return pd.DataFrame(records)
+        # 2-3. Parse XML and extract records
+        return parse_seismic_xml(response.content)
 
     except requests.exceptions.RequestException as e:
+        if raise_errors:
+            raise
         print(f"Error fetching data (Check URL/Network): {e}")
         return pd.DataFrame()
     except ET.ParseError:
+        if raise_errors:
+            raise
         print("Error parsing XML content. The received data may not be valid XML.")
         return pd.DataFrame()
     except Exception as e:
+        if raise_errors:
+            raise
         print(f"An unexpected error occurred: {e}")
         return pd.DataFrame()
 
 
-def create_seismic_map(df):
+def build_event_features(df, colormap):
     """
-    Creates an interactive Folium map showing earthquake locations with a MarkerCluster.
+    Builds a single GeoJSON FeatureCollection for all events.
+    Colors and radii are computed vectorized; popups are built client-side from the properties.
     """
-    output_file = "seismic_map_clustered.html"
-    
     if df.empty:
-        print("No seismic data found to plot.")
-        return
+        return {'type': 'FeatureCollection', 'features': []}
+    mags = df['mag'].to_numpy(dtype=float)
+
+    # ค่า Magnitude มีทศนิยมตำแหน่งเดียว จึงเรียก colormap เฉพาะค่าที่ไม่ซ้ำกันเท่านั้น
+    unique_mags, inverse = np.unique(mags, return_inverse=True)
+    palette = np.array([colormap(v) for v in unique_mags], dtype=object)
+    colors = palette[inverse.ravel()]
+    radii = np.round(4 + (mags * 1.5), 2)
+
+    features = [
+        {
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [lon, lat]},
+            'properties': {
+                'mag': mag, 'region': region, 'time': time_val, 'depth': depth,
+                'color': color, 'radius': radius
+            }
+        }
+        for lat, lon, mag, region, time_val, depth, color, radius in zip(
+            df['lat'].tolist(), df['lon'].tolist(), mags.tolist(),
+            df['region'].tolist(), df['time'].tolist(), df['depth'].tolist(),
+            colors.tolist(), radii.tolist()
+        )
+    ]
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+# สร้าง Style, Tooltip และ Popup ฝั่ง Browser จาก properties ของแต่ละ Feature
+EVENT_ON_EACH_FEATURE = JsCode("""
+function(feature, layer) {
+    var p = feature.properties;
+    var c = feature.geometry.coordinates;
+    layer.setStyle({color: p.color, fillColor: p.color, radius: p.radius});
+    layer.bindTooltip('Mag ' + p.mag + ': ' + p.region);
+    layer.bindPopup(function() {
+        return '<div style="font-family: Arial; width: 220px; color: black;">' +
+            '<h4 style="margin: 0 0 5px 0; color: ' + p.color + '; text-shadow: 1px 1px 0 #fff;">Mag: ' + p.mag + '</h4>' +
+            '<b>Loc:</b> ' + p.region + '<br>' +
+            '<b>Time:</b> ' + p.time + '<br>' +
+            '<b>Depth:</b> ' + p.depth + ' km<br>' +
+            '<b>Coords:</b> ' + c[1] + ', ' + c[0] +
+            '</div>';
+    }, {maxWidth: 300});
+}
+""")
+
+
+def add_event_markers(df, colormap, cluster_group):
+    """
+    Adds one CircleMarker (with its own Popup) per event. Suitable for small event sets.
+    """
+    # วนลูปเพื่อเพิ่ม marker ให้กับแผ่นดินไหวแต่ละจุด
+    for _, row in df.iterrows():
+        mag = row['mag']
+        color = colormap(mag)
+        
+        # HTML สำหรับ Popup เมื่อคลิกที่ Marker
+        popup_html = f"""
+        <div style="font-family: Arial; width: 220px; color: black;">
+            <h4 style="margin: 0 0 5px 0; color: {color}; text-shadow: 1px 1px 0 #fff;">Mag: {mag}</h4>
+            <b>Loc:</b> {row['region']}<br>
+            <b>Time:</b> {row['time']}<br>
+            <b>Depth:</b> {row['depth']} km<br>
+            <b>Coords:</b> {row['lat']}, {row['lon']}
+        </div>
+        """
+
+        folium.CircleMarker(
+            location=[row['lat'], row['lon']],
+            # ขนาดขึ้นอยู่กับความรุนแรง
+            radius=4 + (mag * 1.5), 
+            color=color,
+            fill=True,
+            fill_color=color,
+            fill_opacity=0.8,
+            weight=1,
+            popup=folium.Popup(popup_html, max_width=300),
+            tooltip=f"Mag {mag}: {row['region']}"
+        ).add_to(cluster_group)
+
+
+def add_event_geojson(df, colormap, cluster_group):
+    """
+    Adds all events as one GeoJSON layer of CircleMarkers. Suitable for large event sets.
+    """
+    folium.GeoJson(
+        build_event_features(df, colormap),
+        name="Seismic Events",
+        marker=folium.CircleMarker(fill=True, fill_opacity=0.8, weight=1),
+        on_each_feature=EVENT_ON_EACH_FEATURE
+    ).add_to(cluster_group)
+
+
+class TemplatedEventLayer(MacroElement):
+    """
+    Client-side event layer of the template-mode map: draws window.SEISMIC_EVENTS
+    (the FeatureCollection of build_event_features) into its parent MarkerCluster.
+    """
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        L.geoJson(window.SEISMIC_EVENTS, {
+            pointToLayer: function(feature, latlng) {
+                return L.circleMarker(latlng, {fill: true, fillOpacity: 0.8, weight: 1});
+            },
+            onEachFeature: {{ this.on_each_feature }}
+        }).addTo({{ this._parent.get_name() }});
+        {% endmacro %}
+    """)
+
+    def __init__(self):
+        super().__init__()
+        self._name = "TemplatedEventLayer"
+        self.on_each_feature = EVENT_ON_EACH_FEATURE.js_code
+
 
-    print(f"Plotting {len(df)} seismic events...")
+def magnitude_colormap():
+    """Magnitude color scale shared by all map modes (Green -> Yellow -> Red ตามความรุนแรง)."""
+    return cm.LinearColormap(
+        colors=['#00ff00', '#ffff00', '#ff0000'],
+        vmin=2.0, vmax=6.0, # กำหนดขอบเขตความรุนแรงที่สนใจ
+        caption='Magnitude (Richter)'
+    )
 
+
+def build_seismic_base_map():
+    """Creates the dark base map with the legend CSS fix (no colormap or events yet)."""
     # สร้างแผนที่เริ่มต้นที่พิกัดกลางของภูมิภาค
     m = folium.Map(
         location=[13.0, 101.0],  # ใกล้เคียงจุดศูนย์กลางของประเทศไทย
@@ -119,49 +281,79 @@ def create_seismic_map(df):
     """
     m.get_root().html.add_child(folium.Element(style_content))
 
-    # Color Scale (Green -> Yellow -> Red ตามความรุนแรง)
-    colormap = cm.LinearColormap(
-        colors=['#00ff00', '#ffff00', '#ff0000'],
-        vmin=2.0, vmax=6.0, # กำหนดขอบเขตความรุนแรงที่สนใจ
-        caption='Magnitude (Richter)'
-    )
-    colormap.add_to(m)
+    return m
+
 
-    # Marker Cluster (จัดกลุ่มหมุดเมื่อ Zoom Out)
+def build_seismic_template_shell():
+    """Static part of the template-mode map: base map, legend, MarkerCluster and the client-side event layer."""
+    m = build_seismic_base_map()
+    magnitude_colormap().add_to(m)
     cluster_group = MarkerCluster(name="Seismic Clusters").add_to(m)
+    TemplatedEventLayer().add_to(cluster_group)
+    add_data_slot(m, 'SEISMIC_EVENTS')
+    return m
 
-    # วนลูปเพื่อเพิ่ม marker ให้กับแผ่นดินไหวแต่ละจุด
-    for _, row in df.iterrows():
-        mag = row['mag']
-        color = colormap(mag)
-        
-        # HTML สำหรับ Popup เมื่อคลิกที่ Marker
-        popup_html = f"""
-        <div style="font-family: Arial; width: 220px; color: black;">
-            <h4 style="margin: 0 0 5px 0; color: {color}; text-shadow: 1px 1px 0 #fff;">Mag: {mag}</h4>
-            <b>Loc:</b> {row['region']}<br>
-            <b>Time:</b> {row['time']}<br>
-            <b>Depth:</b> {row['depth']} km<br>
-            <b>Coords:</b> {row['lat']}, {row['lon']}
-        </div>
-        """
 
-        folium.CircleMarker(
-            location=[row['lat'], row['lon']],
-            # ขนาดขึ้นอยู่กับความรุนแรง
-            radius=4 + (mag * 1.5), 
-            color=color,
-            fill=True,
-            fill_color=color,
-            fill_opacity=0.8,
-            weight=1,
-            popup=folium.Popup(popup_html, max_width=300),
-            tooltip=f"Mag {mag}: {row['region']}"
-        ).add_to(cluster_group)
+def build_seismic_map(df, mode, output_file):
+    """
+    Builds the folium map for the "markers", "bulk" or "precluster" mode (not saved yet).
+    output_file is needed by "precluster", which writes its cluster files next to it.
+    """
+    m = build_seismic_base_map()
+    colormap = magnitude_colormap()
+    colormap.add_to(m)
+
+    if mode == "precluster":
+        # จัดกลุ่มล่วงหน้าฝั่ง Server แล้วให้ Browser โหลดเฉพาะระดับ Zoom ปัจจุบัน
+        clusters = add_preclustered_layer(m, df, colormap, output_file)
+        print(f"Precomputed clusters for zoom levels {min(clusters)}-{max(clusters) - 1}, single events from {max(clusters)}")
+    else:
+        # Marker Cluster (จัดกลุ่มหมุดเมื่อ Zoom Out)
+        cluster_group = MarkerCluster(name="Seismic Clusters").add_to(m)
+
+        if mode == "bulk":
+            add_event_geojson(df, colormap, cluster_group)
+        else:
+            add_event_markers(df, colormap, cluster_group)
+    return m
+
+
+def create_seismic_map(df, mode="auto", open_browser=True):
+    """
+    Creates an interactive Folium map showing earthquake locations with a MarkerCluster.
+    mode: "markers" (one CircleMarker per event), "bulk" (single GeoJSON layer),
+    "precluster" (server-side clusters per zoom level, loaded on demand),
+    "template" (cached map shell, only the event data is written on each run)
+    or "auto" (bulk when the event count exceeds BULK_THRESHOLD).
+    An empty df is plotted only in "template" mode (a map without events, e.g. for the daemon on a quiet day).
+    Returns the saved file name; open_browser=False skips the browser launch (headless use).
+    """
+    output_file = "seismic_map_clustered.html"
+    
+    if df.empty and mode != "template":
+        print("No seismic data found to plot.")
+        return
+
+    if mode == "auto":
+        mode = "bulk" if len(df) > BULK_THRESHOLD else "markers"
+
+    print(f"Plotting {len(df)} seismic events ({mode} mode)...")
+
+    if mode == "template":
+        # Shell สร้างครั้งเดียวแล้วเก็บใน Cache แต่ละรอบแทรกเฉพาะ FeatureCollection ของเหตุการณ์
+        template = load_template("seismic_map", build_seismic_template_shell)
+        inject_data(template, build_event_features(df, magnitude_colormap()), output_file)
+        print(f"\nSuccess! Map saved as '{output_file}'")
+        if open_browser:
+            open_in_browser(output_file)
+        return output_file
 
+    m = build_seismic_map(df, mode, output_file)
     m.save(output_file)
     print(f"\nSuccess! Map saved as '{output_file}'")
-    open_in_browser(output_file)
+    if open_browser:
+        open_in_browser(output_file)
+    return output_file
 
 def open_in_browser(filename):
     """
@@ -1,12 +1,34 @@
 import requests
-import geopandas as gpd
 import pandas as pd
 import folium
 import xml.etree.ElementTree as ET
 import branca.colormap as cm
 import webbrowser
 import os
-from shapely.geometry import box  # Required for creating the mask
+from province_geometry import load_province_geometry, DEFAULT_TOLERANCE
+from province_topojson import (add_topojson_choropleth, add_templated_choropleth, province_data_table,
+                               write_province_data_table, sidecar_paths, geometry_key)
+from map_templates import load_template, inject_data
+from province_gazetteer import align_province_names
+
+# หมายเหตุ: uid และ ukey นี้เป็น placeholder หากใช้ API จริง ต้องเปลี่ยนเป็น Key ของคุณ
+FORECAST_URL = "https://data.tmd.go.th/api/WeatherForecast7Days/v2/?uid=api&ukey=api12345"
+OUTPUT_FILE = "thailand_weather_cropped.html"
+FORECAST_OUTPUT_FILE = "thailand_weather_7days.html"
+
+# Tag ใน SevenDaysForecast -> ชื่อตัวแปรในตารางแบบ Long format
+FORECAST_NUMERIC_FIELDS = {
+    'MaximumTemperature': 'max_temp',
+    'MinimumTemperature': 'min_temp',
+    'WindSpeed': 'wind_speed',
+    'WindDirection': 'wind_direction',
+    'PercentRainCover': 'rain_cover',
+    'MeanSeaLevelPressure': 'pressure'
+}
+FORECAST_TEXT_FIELDS = {
+    'DescriptionEnglish': 'desc',
+    'DescriptionThai': 'desc_th'
+}
 
 # Helper function เพื่อดึงข้อความจาก XML element อย่างปลอดภัย
 def get_xml_text(element, tag, default_val="N/A"):
@@ -15,14 +37,14 @@ def get_xml_text(element, tag, default_val="N/A"):
     return node.text.strip() if node is not None and node.text else default_val
 
 # --- 1. FETCH & PARSE DATA (ฉบับสมบูรณ์) ---
-def get_weather_data_extended():
-    # หมายเหตุ: uid และ ukey นี้เป็น placeholder หากใช้ API จริง ต้องเปลี่ยนเป็น Key ของคุณ
-    url = "https://data.tmd.go.th/api/WeatherForecast7Days/v2/?uid=api&ukey=api12345"
+def get_weather_data_extended(session=None, url=None):
+    url = url or FORECAST_URL
     records = []
+    http = session or requests
     
     try:
         print("Fetching XML data...")
-        response = requests.get(url, timeout=15)
+        response = http.get(url, timeout=15)
         response.raise_for_status() 
         root = ET.fromstring(response.content)
         
@@ -48,34 +70,175 @@ def get_weather_data_extended():
                     'desc': get_xml_text(forecast, 'DescriptionEnglish')
                 })
         
-        df = pd.DataFrame(records)
-        if not df.empty:
-            # การแก้ไขชื่อจังหวัดเพื่อให้ตรงกับไฟล์ GeoJSON ที่ใช้
-            df['province_en'] = df['province_en'].replace({
-                'Bangkok': 'Bangkok Metropolis',
-                'Nakhon Ratchasima': 'Nakhon Ratchasima'
-            })
-        return df
+        # ชื่อจังหวัดจะถูกจับคู่กับไฟล์ GeoJSON ผ่าน province_gazetteer ตอนสร้างแผนที่
+        return pd.DataFrame(records)
+    except requests.exceptions.RequestException as e:
+        print(f"Network or API Error: {e}. Please check your internet connection or API URL/Key.")
+        return pd.DataFrame()
+    except Exception as e:
+        print(f"Parsing/Data Error: {e}")
+        return pd.DataFrame()
+
+def parse_forecast_xml(content):
+    """
+    Parses every SevenDaysForecast node into a long-format table (province x date x variable).
+    Columns: province_en, date (datetime64), variable, value (float, numeric fields)
+    and text (raw string, description fields only).
+    """
+    fields = {**FORECAST_NUMERIC_FIELDS, **FORECAST_TEXT_FIELDS}
+    provinces, dates, variables, raw_values = [], [], [], []
+    root = ET.fromstring(content)
+
+    for province in root.findall('./Provinces/Province'):
+        name_en = get_xml_text(province, 'ProvinceNameEnglish', default_val=None)
+        if not name_en:
+            continue
+
+        for forecast in province.findall('SevenDaysForecast'):
+            date = get_xml_text(forecast, 'ForecastDate', default_val=None)
+            for tag, variable in fields.items():
+                provinces.append(name_en)
+                dates.append(date)
+                variables.append(variable)
+                raw_values.append(get_xml_text(forecast, tag, default_val=None))
+
+    if not provinces:
+        return pd.DataFrame()
+
+    df = pd.DataFrame({
+        'province_en': provinces,
+        'date': pd.to_datetime(dates, errors='coerce'),
+        'variable': variables,
+        'raw': raw_values
+    })
+
+    # แปลงค่าตัวเลขทั้งตารางในครั้งเดียว (vectorized) แทนการ float() ทีละค่า
+    is_text = df['variable'].isin(FORECAST_TEXT_FIELDS.values())
+    df['value'] = pd.to_numeric(df['raw'].where(~is_text), errors='coerce')
+    df['text'] = df['raw'].where(is_text)
+    df['province_en'] = df['province_en'].astype('category')
+    df['variable'] = df['variable'].astype('category')
+    return df.drop(columns='raw')
+
+def get_weather_forecast_long(session=None, url=None, raise_errors=False):
+    """
+    Fetches the 7-day forecast and returns it as the long-format table of parse_forecast_xml.
+    An optional requests.Session can be passed to reuse connections between fetches;
+    url defaults to FORECAST_URL. Errors return an empty DataFrame, or are raised with raise_errors=True.
+    """
+    url = url or FORECAST_URL
+    http = session or requests
+
+    try:
+        print("Fetching 7-day forecast XML data...")
+        response = http.get(url, timeout=15)
+        response.raise_for_status()
+        return parse_forecast_xml(response.content)
     except requests.exceptions.RequestException as e:
+        if raise_errors:
+            raise
         print(f"Network or API Error: {e}. Please check your internet connection or API URL/Key.")
         return pd.DataFrame()
     except Exception as e:
+        if raise_errors:
+            raise
         print(f"Parsing/Data Error: {e}")
         return pd.DataFrame()
 
+def forecast_to_daily_table(forecast_long):
+    """
+    Pivots the long forecast table to one row per province and date
+    with the columns used by the map (date as 'YYYY-MM-DD' text).
+    """
+    numeric = forecast_long[forecast_long['text'].isna()].pivot_table(
+        index=['province_en', 'date'], columns='variable', values='value', aggfunc='first', observed=True
+    )
+    text = forecast_long[forecast_long['text'].notna()].pivot_table(
+        index=['province_en', 'date'], columns='variable', values='text', aggfunc='first', observed=True
+    )
+    daily = numeric.join(text, how='outer').reset_index()
+    daily.columns.name = None
+    daily['province_en'] = daily['province_en'].astype(str)
+    daily['date'] = daily['date'].dt.strftime('%Y-%m-%d')
+    for column in ('max_temp', 'min_temp', 'wind_speed', 'desc'):
+        if column not in daily:
+            daily[column] = None
+    return daily
+
 # --- 2. CREATE MASKED MAP (ยังคงใช้ได้ดี) ---
-def create_interactive_map(weather_df):
-    map_url = "https://raw.githubusercontent.com/cvibhagool/thailand-map/master/thailand-provinces.geojson"
-    output_file = "thailand_weather_cropped.html"
+def build_base_map(mask_geom):
+    """Creates the hillshade base map with the white inverse mask around Thailand."""
+    esri_url = 'https://server.arcgisonline.com/ArcGIS/rest/services/Elevation/World_Hillshade/MapServer/tile/{z}/{y}/{x}'
+    esri_attr = 'Tiles &copy; Esri &mdash; Source: Esri, i-cubed, USDA, USGS, AEX, GeoEye, Getmapping, Aerogrid, IGN, IGP, UPR-EGP, and the GIS User Community'
+
+    m = folium.Map(
+        location=[13.0, 101.0], 
+        zoom_start=6, 
+        tiles=esri_url, 
+        attr=esri_attr
+    )
+    
+    # --- "INVERSE MASK" ---
+    # Mask (กรอบโลกลบพื้นที่ประเทศไทย) ถูกคำนวณไว้ล่วงหน้าใน province_geometry
+    # เพิ่ม Mask เป็น GeoJson Layer สีขาวทึบแสง (Opacity 1.0)
+    folium.GeoJson(
+        mask_geom,
+        style_function=lambda x: {
+            'fillColor': 'white', 
+            'color': 'white',  # Border color
+            'weight': 0,        # No border lines
+            'fillOpacity': 1.0  # Opaque white
+        },
+        name="Inverse Mask"
+    ).add_to(m)
+    # --- END MASK STEP ---
+    return m
+
+def build_weather_template_shell(tolerance=DEFAULT_TOLERANCE):
+    """Static part of the template-mode weather map: base map, mask, geometry and client-side choropleth."""
+    gdf, _, mask_geom = load_province_geometry(tolerance=tolerance)
+    m = build_base_map(mask_geom)
+    add_templated_choropleth(m, gdf)
+    return m
+
+def create_interactive_map(weather_df, tolerance=DEFAULT_TOLERANCE, output_format="geojson", open_browser=True):
+    """
+    output_format: "geojson" embeds the merged provinces in the HTML,
+    "topojson" writes quantized TopoJSON geometry plus a separate per-province data table,
+    "template" renders the map shell once (cached in map_templates.TEMPLATE_DIR) and only injects the data table.
+    Returns the saved file name (None on failure); open_browser=False skips the browser launch.
+    """
+    output_file = OUTPUT_FILE
     
     if weather_df.empty:
         print("No weather data found to plot.")
         return
 
     try:
-        print("Downloading map geometry and merging data...")
-        # อ่านไฟล์ GeoJSON ด้วย geopandas
-        gdf = gpd.read_file(map_url)
+        if output_format == "template":
+            # Shell (แผนที่ฐาน + Mask + Geometry) สร้างครั้งเดียว แต่ละรอบแทรกเฉพาะตารางข้อมูลรายจังหวัด
+            # ชื่อ Template มี Hash ของ Geometry: เมื่อ Cache เรขาคณิตถูกสร้างใหม่ Shell จะถูกสร้างใหม่ด้วย
+            gdf = load_province_geometry(tolerance=tolerance)[0]
+            names = gdf['NAME_1']
+            weather_df = align_province_names(weather_df, 'province_en', names)
+            template = load_template(
+                f"weather_map_tol{tolerance:g}_{geometry_key(gdf)}",
+                lambda: build_weather_template_shell(tolerance)
+            )
+            table, (min_scale, max_scale) = province_data_table(weather_df, names=names)
+            print(f"Color Scale: {min_scale}°C - {max_scale}°C")
+            inject_data(template, table, output_file)
+            print(f"Success! Map saved as '{output_file}'")
+
+            if open_browser:
+                open_in_browser(output_file)
+            return output_file
+
+        print("Loading cached map geometry and merging data...")
+        # อ่านเรขาคณิตจังหวัด (ลดความละเอียดไว้แล้ว) พร้อม Inverse Mask จาก Cache ในเครื่อง
+        gdf, _, mask_geom = load_province_geometry(tolerance=tolerance)
+        # จับคู่ชื่อจังหวัดกับ NAME_1 ผ่าน Gazetteer (รายงานชื่อที่จับคู่ไม่ได้ แทนการปล่อยเป็นสีเทาเงียบ ๆ)
+        weather_df = align_province_names(weather_df, 'province_en', gdf['NAME_1'])
         # ผสานข้อมูลสภาพอากาศเข้ากับข้อมูลภูมิศาสตร์
         merged = gdf.merge(weather_df, left_on='NAME_1', right_on='province_en', how='left')
         merged['max_temp'] = merged['max_temp'].fillna(0)
@@ -91,81 +254,102 @@ def create_interactive_map(weather_df):
         print(f"Color Scale: {min_scale}°C - {max_scale}°C")
 
         # --- SETUP MAP ---
-        esri_url = 'https://server.arcgisonline.com/ArcGIS/rest/services/Elevation/World_Hillshade/MapServer/tile/{z}/{y}/{x}'
-        esri_attr = 'Tiles &copy; Esri &mdash; Source: Esri, i-cubed, USDA, USGS, AEX, GeoEye, Getmapping, Aerogrid, IGN, IGP, UPR-EGP, and the GIS User Community'
-
-        m = folium.Map(
-            location=[13.0, 101.0], 
-            zoom_start=6, 
-            tiles=esri_url, 
-            attr=esri_attr
-        )
-        
-        # --- NEW STEP: CREATE THE "INVERSE MASK" ---
-        print("Generating Inverse Mask to hide external base map...")
-        # 1. รวมโพลีกอนจังหวัดทั้งหมดให้เป็นโพลีกอนเดียวของประเทศไทย
-        thailand_outline = gdf.dissolve().geometry[0]
-        
-        # 2. สร้างกรอบสี่เหลี่ยมที่ครอบคลุมทั้งโลก
-        world_box = box(-180, -90, 180, 90)
-        
-        # 3. ลบพื้นที่ประเทศไทยออกจากกรอบโลก (ได้เป็น Mask รอบประเทศไทย)
-        mask_geom = world_box.difference(thailand_outline)
-        
-        # 4. เพิ่ม Mask เป็น GeoJson Layer สีขาวทึบแสง (Opacity 1.0)
-        folium.GeoJson(
-            mask_geom,
-            style_function=lambda x: {
-                'fillColor': 'white', 
-                'color': 'white',  # Border color
-                'weight': 0,        # No border lines
-                'fillOpacity': 1.0  # Opaque white
-            },
-            name="Inverse Mask"
-        ).add_to(m)
-        # --- END MASK STEP ---
-
-        # Colormap
-        colormap = cm.LinearColormap(
-            # Blue (Cool) -> Red (Hot)
-            colors=['#4575b4', '#91bfdb', '#fee090', '#fc8d59', '#d73027'],
-            vmin=min_scale,
-            vmax=max_scale,
-            caption='Max Temperature (°C)'
-        )
-        colormap.add_to(m)
-
-        # Style function สำหรับ Choropleth Layer
-        def style_fn(feature):
-            temp = feature['properties'].get('max_temp', 0)
-            return {
-                'fillColor': colormap(temp) if temp > 0 else '#d9d9d9', # สีเทาสำหรับข้อมูลที่ขาดหาย
-                'color': 'black',
-                'weight': 0.5,
-                'fillOpacity': 0.6 # กำหนดความโปร่งแสงให้มองเห็น Hillshade ด้านล่าง
-            }
-
-        # Add Data Layer (อยู่บนสุดของแผนที่)
-        folium.GeoJson(
-            merged,
-            name='Weather Data',
-            style_function=style_fn,
-            tooltip=folium.GeoJsonTooltip(fields=['NAME_1'], aliases=['Province:']),
-            popup=folium.GeoJsonPopup(
-                fields=['NAME_1', 'date', 'max_temp', 'min_temp', 'wind_speed', 'desc'],
-                aliases=['Province', 'Date', 'Max Temp (°C)', 'Min Temp (°C)', 'Wind', 'Weather'],
-                localize=True
+        m = build_base_map(mask_geom)
+
+        if output_format == "topojson":
+            # Geometry แบบ TopoJSON + ตารางข้อมูลรายจังหวัดแยกไฟล์ (สีและ Legend คำนวณฝั่ง Browser)
+            add_topojson_choropleth(m, gdf, weather_df, output_file, tolerance)
+        else:
+            # Colormap
+            colormap = cm.LinearColormap(
+                # Blue (Cool) -> Red (Hot)
+                colors=['#4575b4', '#91bfdb', '#fee090', '#fc8d59', '#d73027'],
+                vmin=min_scale,
+                vmax=max_scale,
+                caption='Max Temperature (°C)'
             )
-        ).add_to(m)
+            colormap.add_to(m)
+
+            # Style function สำหรับ Choropleth Layer
+            def style_fn(feature):
+                temp = feature['properties'].get('max_temp', 0)
+                return {
+                    'fillColor': colormap(temp) if temp > 0 else '#d9d9d9', # สีเทาสำหรับข้อมูลที่ขาดหาย
+                    'color': 'black',
+                    'weight': 0.5,
+                    'fillOpacity': 0.6 # กำหนดความโปร่งแสงให้มองเห็น Hillshade ด้านล่าง
+                }
+
+            # Add Data Layer (อยู่บนสุดของแผนที่)
+            folium.GeoJson(
+                merged,
+                name='Weather Data',
+                style_function=style_fn,
+                tooltip=folium.GeoJsonTooltip(fields=['NAME_1'], aliases=['Province:']),
+                popup=folium.GeoJsonPopup(
+                    fields=['NAME_1', 'date', 'max_temp', 'min_temp', 'wind_speed', 'desc'],
+                    aliases=['Province', 'Date', 'Max Temp (°C)', 'Min Temp (°C)', 'Wind', 'Weather'],
+                    localize=True
+                )
+            ).add_to(m)
 
         m.save(output_file)
         print(f"Success! Map saved as '{output_file}'")
         
-        open_in_browser(output_file)
+        if open_browser:
+            open_in_browser(output_file)
+        return output_file
+
+    except Exception as e:
+        print(f"Mapping Error: {e}")
+
+def create_forecast_slider_map(forecast_long, tolerance=DEFAULT_TOLERANCE, open_browser=True):
+    """
+    Creates a 7-day choropleth with a time slider. One TopoJSON geometry layer is shared by all days;
+    the slider only restyles it from the per-day data table.
+    Returns the saved file name (None on failure); open_browser=False skips the browser launch.
+    """
+    output_file = FORECAST_OUTPUT_FILE
+
+    if forecast_long.empty:
+        print("No forecast data found to plot.")
+        return
+
+    try:
+        print("Loading cached map geometry...")
+        gdf, _, mask_geom = load_province_geometry(tolerance=tolerance)
+        daily = align_province_names(forecast_to_daily_table(forecast_long), 'province_en', gdf['NAME_1'])
+        print(f"Forecast dates: {daily['date'].min()} to {daily['date'].max()} ({daily['date'].nunique()} days)")
+
+        m = build_base_map(mask_geom)
+        min_scale, max_scale = add_topojson_choropleth(m, gdf, daily, output_file, tolerance, multi_day=True)
+        print(f"Color Scale: {min_scale}°C - {max_scale}°C")
+
+        m.save(output_file)
+        print(f"Success! Map saved as '{output_file}'")
+
+        if open_browser:
+            open_in_browser(output_file)
+        return output_file
 
     except Exception as e:
         print(f"Mapping Error: {e}")
 
+def refresh_weather_table(weather_df, tolerance=DEFAULT_TOLERANCE):
+    """
+    Rewrites only the per-province data table of a map created with output_format="topojson".
+    The HTML page and the TopoJSON geometry are left untouched.
+    """
+    if weather_df.empty:
+        print("No weather data found to refresh.")
+        return
+
+    gdf, _, _ = load_province_geometry(tolerance=tolerance)
+    weather_df = align_province_names(weather_df, 'province_en', gdf['NAME_1'])
+    _, data_path = sidecar_paths(OUTPUT_FILE, tolerance)
+    min_scale, max_scale = write_province_data_table(weather_df, data_path, names=gdf['NAME_1'])
+    print(f"Weather table refreshed in '{data_path}' (Color Scale: {min_scale}°C - {max_scale}°C)")
+
 def open_in_browser(filename):
     try:
         file_path = os.path.abspath(filename)
@@ -0,0 +1,386 @@
+import argparse
+import contextlib
+import functools
+import io
+import json
+import os
+import shutil
+import threading
+import time
+import tracemalloc
+import warnings
+import xml.etree.ElementTree as ET
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import escape
+import numpy as np
+import requests
+import DailyEarthquakes
+import map_templates
+import province_geometry
+from province_gazetteer import PROVINCES
+from tmd_daemon import weather_map
+
+BENCH_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_data")
+FIXTURE_DIR = os.path.join(BENCH_DIR, "fixtures")
+WORK_DIR = os.path.join(BENCH_DIR, "work")
+BASELINE_FILE = os.path.join(BENCH_DIR, "baseline.json")
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+SEISMIC_MODES = ("markers", "bulk", "precluster")
+MARKERS_MAX_EVENTS = 1000 # โหมด markers (CircleMarker รายจุด) ช้ามาก จึงวัดเฉพาะชุดเล็ก
+FULL_RESOLUTION = 0.0
+
+# เกณฑ์การถือว่าช้าลง/ใช้หน่วยความจำมากขึ้น เทียบกับ Baseline
+REGRESSION_TOLERANCE = 0.25
+MIN_TIME_DELTA = 0.01 # seconds; smaller differences are timer noise
+MIN_MEMORY_DELTA_MB = 1.0
+
+
+# --- 1. FIXTURES ---
+def record_fixtures(fixture_dir=FIXTURE_DIR):
+    """Downloads the live seismic XML, forecast XML and province GeoJSON once into fixture_dir."""
+    os.makedirs(fixture_dir, exist_ok=True)
+    sources = {
+        "seismic.xml": DailyEarthquakes.SEISMIC_URL,
+        "forecast.xml": weather_map.FORECAST_URL,
+        "provinces.geojson": province_geometry.PROVINCE_GEOJSON_URL,
+    }
+    for name, url in sources.items():
+        print(f"Recording {url} -> {name}")
+        response = requests.get(url, timeout=60)
+        response.raise_for_status()
+        with open(os.path.join(fixture_dir, name), "wb") as f:
+            f.write(response.content)
+
+
+def _synthetic_seismic_events(n, rng):
+    """Event records in the DailySeismicEvent format, used when no recorded seismic.xml exists."""
+    regions = [f"อ.เมือง จ.{thai}" for _, _, thai, _, _ in PROVINCES] + ["ประเทศเมียนมา", "ทะเลอันดามัน"]
+    return [
+        {
+            'OriginThai': regions[i % len(regions)],
+            'DateTimeThai': f"2024-05-{1 + i % 28:02d} {i % 24:02d}:{i % 60:02d}:00.000",
+            'Depth': str(int(rng.integers(1, 80))),
+            'Magnitude': f"{rng.uniform(1, 7):.1f}",
+            'Latitude': f"{rng.uniform(5, 22):.3f}",
+            'Longitude': f"{rng.uniform(94, 106):.3f}",
+        }
+        for i in range(n)
+    ]
+
+
+def _recorded_seismic_events(fixture_dir):
+    path = os.path.join(fixture_dir, "seismic.xml")
+    if not os.path.exists(path):
+        return []
+    root = ET.parse(path).getroot()
+    return [{child.tag: child.text or "" for child in event} for event in root.findall('DailyEarthquakes')]
+
+
+def scaled_seismic_fixture(n, fixture_dir=FIXTURE_DIR, seed=0):
+    """
+    Returns the file name of a seismic XML fixture with n events, generated (once) by repeating
+    the recorded events with jittered location and magnitude, or from synthetic events.
+    """
+    name = f"seismic_{n}.xml"
+    path = os.path.join(fixture_dir, name)
+    if os.path.exists(path):
+        return name
+
+    rng = np.random.default_rng(seed)
+    base = _recorded_seismic_events(fixture_dir) or _synthetic_seismic_events(200, rng)
+    lat_jitter, lon_jitter = rng.uniform(-0.5, 0.5, n), rng.uniform(-0.5, 0.5, n)
+    mag_jitter = rng.uniform(-0.3, 0.3, n)
+
+    os.makedirs(fixture_dir, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<DailySeismicEvent>\n')
+        for i in range(n):
+            event = dict(base[i % len(base)])
+            try:
+                event['Latitude'] = f"{float(event['Latitude']) + lat_jitter[i]:.3f}"
+                event['Longitude'] = f"{float(event['Longitude']) + lon_jitter[i]:.3f}"
+                event['Magnitude'] = f"{max(0.0, float(event['Magnitude']) + mag_jitter[i]):.1f}"
+            except (KeyError, ValueError):
+                pass
+            f.write("<DailyEarthquakes>" + "".join(
+                f"<{tag}>{escape(value)}</{tag}>" for tag, value in event.items()
+            ) + "</DailyEarthquakes>\n")
+        f.write("</DailySeismicEvent>\n")
+    return name
+
+
+def forecast_fixture(fixture_dir=FIXTURE_DIR, seed=0):
+    """Returns the recorded forecast.xml, or a synthetic 7-day forecast for all 77 provinces."""
+    if os.path.exists(os.path.join(fixture_dir, "forecast.xml")):
+        return "forecast.xml"
+    name = "synthetic_forecast.xml"
+    path = os.path.join(fixture_dir, name)
+    if os.path.exists(path):
+        return name
+
+    rng = np.random.default_rng(seed)
+    tags = list(weather_map.FORECAST_NUMERIC_FIELDS) + list(weather_map.FORECAST_TEXT_FIELDS)
+    os.makedirs(fixture_dir, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<WeatherForecast7Days><Provinces>\n')
+        for _, name_en, name_th, _, _ in PROVINCES:
+            f.write(f"<Province><ProvinceNameThai>{name_th}</ProvinceNameThai>"
+                    f"<ProvinceNameEnglish>{escape(name_en)}</ProvinceNameEnglish>")
+            for day in range(7):
+                values = "".join(
+                    f"<{tag}>{'Thunderstorms' if tag in weather_map.FORECAST_TEXT_FIELDS else round(rng.uniform(10, 40), 1)}</{tag}>"
+                    for tag in tags if tag != 'ForecastDate'
+                )
+                f.write(f"<SevenDaysForecast><ForecastDate>2024-05-{day + 1:02d} 07:00:00.0000000+07:00</ForecastDate>"
+                        f"{values}</SevenDaysForecast>")
+            f.write("</Province>\n")
+        f.write("</Provinces></WeatherForecast7Days>\n")
+    return name
+
+
+def provinces_fixture(fixture_dir=FIXTURE_DIR, points_per_edge=200, seed=1):
+    """
+    Returns the recorded provinces.geojson, or a synthetic full-resolution coverage:
+    77 adjacent polygons (a jittered 7 x 11 grid) whose shared borders have points_per_edge vertices.
+    """
+    if os.path.exists(os.path.join(fixture_dir, "provinces.geojson")):
+        return "provinces.geojson"
+    name = "synthetic_provinces.geojson"
+    path = os.path.join(fixture_dir, name)
+    if os.path.exists(path):
+        return name
+
+    rng = np.random.default_rng(seed)
+    nx, ny = 7, 11
+    xs, ys = np.linspace(97.5, 105.5, nx + 1), np.linspace(6.0, 20.0, ny + 1)
+
+    def edge(p, q):
+        t = np.linspace(0, 1, points_per_edge)[1:-1, None]
+        points = (1 - t) * p + t * q + rng.normal(0, 0.0008, (len(t), 2))
+        return [tuple(p)] + [tuple(point) for point in points.tolist()]
+
+    # เส้นขอบที่ใช้ร่วมกันถูกสร้างครั้งเดียว โพลีกอนข้างเคียงจึงมีขอบตรงกันพอดี
+    horizontal = {(i, j): edge(np.array([xs[i], ys[j]]), np.array([xs[i + 1], ys[j]]))
+                  for i in range(nx) for j in range(ny + 1)}
+    vertical = {(i, j): edge(np.array([xs[i], ys[j]]), np.array([xs[i], ys[j + 1]]))
+                for i in range(nx + 1) for j in range(ny)}
+
+    features = []
+    for k, (i, j) in enumerate((i, j) for i in range(nx) for j in range(ny)):
+        ring = (horizontal[i, j] + vertical[i + 1, j] + [(xs[i + 1], ys[j + 1])]
+                + horizontal[i, j + 1][:0:-1] + [(xs[i], ys[j + 1])] + vertical[i, j][:0:-1])
+        ring.append(ring[0])
+        features.append({
+            'type': 'Feature',
+            'properties': {'NAME_1': PROVINCES[k][1], 'ID_1': k},
+            'geometry': {'type': 'Polygon', 'coordinates': [[list(map(float, point)) for point in ring]]}
+        })
+
+    os.makedirs(fixture_dir, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({'type': 'FeatureCollection', 'features': features}, f)
+    return name
+
+
+# --- 2. LOCAL STAND-IN SERVER ---
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except ConnectionError:
+            # GDAL ปิดการเชื่อมต่อเองเมื่ออ่าน GeoJSON ได้ครบแล้ว
+            pass
+
+
+def start_fixture_server(fixture_dir=FIXTURE_DIR):
+    """Serves fixture_dir on a free localhost port in a background thread. Returns (server, base_url)."""
+    handler = functools.partial(_QuietHandler, directory=fixture_dir)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+# --- 3. STAGES ---
+def _stage(results, name, fn, *args, **kwargs):
+    """
+    Runs one pipeline stage with its console output suppressed.
+    Stores the elapsed seconds, or the peak traced memory in MB while tracemalloc is tracing.
+    """
+    with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            out = fn(*args, **kwargs)
+            results[name] = (tracemalloc.get_traced_memory()[1] - before) / 2**20
+        else:
+            start = time.perf_counter()
+            out = fn(*args, **kwargs)
+            results[name] = time.perf_counter() - start
+    return out
+
+
+def _fetch(session, url):
+    response = session.get(url, timeout=60)
+    response.raise_for_status()
+    return response.content
+
+
+def _require(fn):
+    """Wraps a map function that reports errors by printing and returning None, so failures stop the run."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        out = fn(*args, **kwargs)
+        if out is None:
+            raise RuntimeError(f"{fn.__name__} did not produce an output file")
+        return out
+    return wrapper
+
+
+def run_pipeline(base_url, fixtures, sizes, session, results):
+    """One pass of every stage: fetch -> parse -> DataFrame -> folium build -> save, per feed and size."""
+    _stage(results, "provinces/geometry_cache", province_geometry.build_geometry_cache,
+           source=f"{base_url}/{fixtures['provinces']}", tolerances=(FULL_RESOLUTION,))
+
+    # --- Earthquakes ---
+    output_file = "seismic_map_clustered.html"
+    for n in sizes:
+        key = f"seismic_{n}"
+        content = _stage(results, f"{key}/fetch", _fetch, session, f"{base_url}/{fixtures[key]}")
+        df = _stage(results, f"{key}/parse", DailyEarthquakes.parse_seismic_xml, content)
+        for mode in SEISMIC_MODES:
+            if mode == "markers" and n > MARKERS_MAX_EVENTS:
+                continue
+            m = _stage(results, f"{key}/build_{mode}", DailyEarthquakes.build_seismic_map, df, mode, output_file)
+            _stage(results, f"{key}/save_{mode}", m.save, output_file)
+        _stage(results, f"{key}/template", _require(DailyEarthquakes.create_seismic_map),
+               df, mode="template", open_browser=False)
+
+    # --- 7-day forecast (full-resolution provinces) ---
+    content = _stage(results, "forecast/fetch", _fetch, session, f"{base_url}/{fixtures['forecast']}")
+    forecast_long = _stage(results, "forecast/parse", weather_map.parse_forecast_xml, content)
+    daily = _stage(results, "forecast/daily_table", weather_map.forecast_to_daily_table, forecast_long)
+    first_day = daily.groupby('province_en').head(1)
+    for output_format in ("geojson", "topojson", "template"):
+        _stage(results, f"forecast/map_{output_format}", _require(weather_map.create_interactive_map),
+               first_day, tolerance=FULL_RESOLUTION, output_format=output_format, open_browser=False)
+    _stage(results, "forecast/slider_map", _require(weather_map.create_forecast_slider_map),
+           forecast_long, tolerance=FULL_RESOLUTION, open_browser=False)
+
+
+def run_benchmark(sizes=DEFAULT_SIZES, repeat=3):
+    """
+    Replays the fixtures through the local server. Timings are the best of `repeat` untraced passes;
+    peak memory comes from one extra pass under tracemalloc (Python/NumPy allocations only).
+    Returns {'stages': {stage: {'seconds', 'peak_mb'}}, 'sizes': [...]}.
+    """
+    fixtures = {f"seismic_{n}": scaled_seismic_fixture(n) for n in sizes}
+    fixtures['forecast'] = forecast_fixture()
+    fixtures['provinces'] = provinces_fixture()
+
+    # เริ่มจาก WORK_DIR ว่างทุกครั้ง (ไม่ใช้ Geometry/Template Cache จากรอบก่อน)
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
+    os.makedirs(WORK_DIR)
+    # Cache ของ Geometry/Template ชี้ไปที่ WORK_DIR ระหว่างวัดผลเท่านั้น (คืนค่าเดิมใน finally)
+    cache_dirs = province_geometry.CACHE_DIR, map_templates.TEMPLATE_DIR
+    province_geometry.CACHE_DIR = os.path.join(WORK_DIR, "geometry_cache")
+    map_templates.TEMPLATE_DIR = os.path.join(WORK_DIR, "template_cache")
+    server, base_url = start_fixture_server()
+    session = requests.Session()
+    cwd = os.getcwd()
+    os.chdir(WORK_DIR) # ไฟล์ HTML ที่สร้างระหว่างวัดผลอยู่ใน WORK_DIR ทั้งหมด
+
+    try:
+        timings = []
+        for i in range(repeat):
+            print(f"Timing pass {i + 1}/{repeat}...")
+            results = {}
+            run_pipeline(base_url, fixtures, sizes, session, results)
+            timings.append(results)
+
+        print("Memory pass (tracemalloc)...")
+        memory = {}
+        tracemalloc.start()
+        try:
+            run_pipeline(base_url, fixtures, sizes, session, memory)
+        finally:
+            tracemalloc.stop()
+    finally:
+        os.chdir(cwd)
+        province_geometry.CACHE_DIR, map_templates.TEMPLATE_DIR = cache_dirs
+        session.close()
+        server.shutdown()
+
+    stages = {
+        stage: {'seconds': min(t[stage] for t in timings), 'peak_mb': memory.get(stage)}
+        for stage in timings[0]
+    }
+    return {'sizes': list(sizes), 'stages': stages}
+
+
+# --- 4. BASELINE ---
+def compare_with_baseline(report, baseline, tolerance=REGRESSION_TOLERANCE):
+    """Returns a list of regression messages (slower or more memory than baseline beyond tolerance)."""
+    regressions = []
+    for stage, current in report['stages'].items():
+        base = baseline.get('stages', {}).get(stage)
+        if not base:
+            continue
+        for metric, min_delta, unit in (('seconds', MIN_TIME_DELTA, 's'), ('peak_mb', MIN_MEMORY_DELTA_MB, ' MB')):
+            now, before = current.get(metric), base.get(metric)
+            if now is None or before is None:
+                continue
+            if now > before * (1 + tolerance) and now - before > min_delta:
+                regressions.append(f"{stage}: {metric} {before:.3f}{unit} -> {now:.3f}{unit} (+{(now / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+def print_report(report, baseline=None):
+    base_stages = (baseline or {}).get('stages', {})
+    print(f"\n{'Stage':<34}{'Time (s)':>10}{'Peak MB':>10}{'vs base':>10}")
+    print("-" * 64)
+    for stage, values in report['stages'].items():
+        base = base_stages.get(stage)
+        change = f"{(values['seconds'] / base['seconds'] - 1) * 100:+.0f}%" if base and base['seconds'] else ""
+        peak = f"{values['peak_mb']:.1f}" if values['peak_mb'] is not None else "-"
+        print(f"{stage:<34}{values['seconds']:>10.3f}{peak:>10}{change:>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the TMD map pipeline on recorded or generated fixtures")
+    parser.add_argument("--record", action="store_true", help="download fresh fixtures from the live APIs first")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="seismic event counts")
+    parser.add_argument("--repeat", type=int, default=3, help="timing passes (the best one is reported)")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    if args.record:
+        record_fixtures()
+
+    report = run_benchmark(sizes=args.sizes, repeat=args.repeat)
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to '{args.baseline}'")
+    elif baseline:
+        regressions = compare_with_baseline(report, baseline, args.tolerance)
+        if regressions:
+            print("\nPerformance regressions:")
+            for line in regressions:
+                print(f"  {line}")
+            raise SystemExit(1)
+        print("\nNo regressions against baseline.")
+    else:
+        print("\nNo baseline yet (run with --save-baseline to create one).")
@@ -0,0 +1,256 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from joint_geometry import orientation_to_vectors
+from joint_io import INPUT_EXTENSIONS, read_orientations
+from joint_stats import set_statistics
+from spherical_kmeans import SphericalKMeans
+from stereonet_plot import EXPORT_FORMATS, PLOT_TYPES, stereonet_image
+
+INPUT_PATTERNS = tuple(f"*{ext}" for ext in INPUT_EXTENSIONS)
+MANIFEST = "batch_manifest.json"
+REPORT = "batch_report.csv"
+
+# ค่าตั้งต้นที่ใช้ร่วมกันทุกไฟล์ (แทนที่ได้ด้วย --config JSON และตัวเลือกบรรทัดคำสั่ง)
+DEFAULT_CONFIG = {
+    "k": 3,
+    "random_state": 42,
+    "plot_type": "Pole",
+    "font": "DejaVu Sans",
+    "dpi": 300,
+    "format": "png",
+    "max_points": 5000,
+    "density_method": "fisher",
+    "overlay": None,
+}
+
+
+def load_config(path=None, **overrides):
+    """DEFAULT_CONFIG updated with the JSON file at path and with the non-None overrides."""
+    config = dict(DEFAULT_CONFIG)
+    if path:
+        with open(path, encoding="utf-8") as f:
+            config.update(json.load(f))
+    config.update({key: value for key, value in overrides.items() if value is not None})
+    if config["plot_type"] not in PLOT_TYPES:
+        raise ValueError(f"plot_type must be one of {PLOT_TYPES}")
+    if config["format"] not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of {tuple(EXPORT_FORMATS)}")
+    return config
+
+
+def config_hash(config):
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def expand_inputs(inputs, recursive=False, exclude_dir=None):
+    """
+    Files matched by the inputs (directories, glob patterns or file paths), deduplicated and sorted.
+    Files under exclude_dir (the output directory) are skipped, so a recursive run never reads its own outputs.
+    """
+    paths = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            prefix = os.path.join(item, "**") if recursive else item
+            for pattern in INPUT_PATTERNS:
+                paths.update(glob.glob(os.path.join(prefix, pattern), recursive=recursive))
+        elif glob.has_magic(item):
+            paths.update(p for p in glob.glob(item, recursive=True) if p.lower().endswith(INPUT_EXTENSIONS))
+        elif os.path.isfile(item):
+            paths.add(item)
+        else:
+            print(f"Input not found: {item}")
+    paths = {os.path.abspath(p) for p in paths}
+    if exclude_dir:
+        excluded = os.path.abspath(exclude_dir)
+        paths = {p for p in paths if os.path.commonpath([p, excluded]) != excluded}
+    return sorted(paths)
+
+
+def output_stems(paths):
+    """Unique output name per input: the file stem, prefixed by its folder when two surveys share a stem."""
+    stems = [os.path.splitext(os.path.basename(p))[0] for p in paths]
+    names = {}
+    for path, stem in zip(paths, stems):
+        name = stem if stems.count(stem) == 1 else f"{os.path.basename(os.path.dirname(path))}_{stem}"
+        while name in names.values():
+            name += "_"
+        names[path] = name
+    return names
+
+
+def output_files(out_dir, stem, fmt="png"):
+    return {
+        "labeled": os.path.join(out_dir, f"{stem}_joint_sets.csv"),
+        "stats": os.path.join(out_dir, f"{stem}_stats.csv"),
+        "image": os.path.join(out_dir, f"{stem}_stereonet.{fmt}"),
+    }
+
+
+def process_file(path, files, config):
+    """
+    Clusters one survey and writes its labeled CSV, set statistics and stereonet image.
+    Runs in a worker process; returns a result row with per-stage timings (seconds).
+    Any error is caught and returned as status "failed", so one bad survey never stops the batch.
+    """
+    result = {"file": path, "status": "done", "rows": 0, "error": ""}
+    start = time.perf_counter()
+
+    def lap(stage):
+        nonlocal start
+        now = time.perf_counter()
+        result[stage] = now - start
+        start = now
+
+    try:
+        df = read_orientations(path)
+        result["rows"] = len(df)
+        lap("load")
+
+        vectors = orientation_to_vectors(df["dip direction"].to_numpy(), df["dip angle"].to_numpy())
+        model = SphericalKMeans(n_clusters=config["k"], random_state=config["random_state"]).fit(vectors)
+        labeled = df.assign(joint_set=model.labels_)
+        lap("fit")
+
+        stats = set_statistics(vectors, model.labels_, model.cluster_centers_)
+        lap("stats")
+
+        image = stereonet_image(labeled, config["k"], model.cluster_centers_, config["plot_type"], config["font"],
+                                config, config["format"], config["dpi"])
+        lap("plot")
+
+        labeled.to_csv(files["labeled"], index=False)
+        stats.to_csv(files["stats"])
+        with open(files["image"], "wb") as f:
+            f.write(image)
+        lap("write")
+    except Exception as e:
+        result.update(status="failed", error=f"{type(e).__name__}: {e}")
+    return result
+
+
+def load_manifest(out_dir):
+    path = os.path.join(out_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Could not read batch manifest '{path}': {e}")
+        return {}
+
+
+def save_manifest(manifest, out_dir):
+    path = os.path.join(out_dir, MANIFEST)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _source_stamp(path, config_key):
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "config": config_key}
+
+
+def is_unchanged(entry, stamp, files):
+    """True when the survey and the config match the manifest entry and every output still exists."""
+    return (
+        entry is not None
+        and all(entry.get(key) == value for key, value in stamp.items())
+        and all(os.path.exists(f) for f in files.values())
+    )
+
+
+def run_batch(paths, out_dir, config, jobs=None, force=False):
+    """
+    Clusters every survey in a process pool (jobs workers, default: CPU count), skipping surveys
+    whose file and config are unchanged since the last run. Returns the report DataFrame.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = load_manifest(out_dir)
+    config_key = config_hash(config)
+    stems = output_stems(paths)
+
+    rows, pending = [], {}
+    for path in paths:
+        files = output_files(out_dir, stems[path], config["format"])
+        stamp = _source_stamp(path, config_key)
+        if not force and is_unchanged(manifest.get(path), stamp, files):
+            rows.append({"file": path, "status": "skipped", "rows": manifest[path].get("rows", 0), "error": ""})
+        else:
+            pending[path] = (files, stamp)
+
+    print(f"{len(paths)} survey(s): {len(pending)} to process, {len(rows)} unchanged")
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(process_file, path, files, config): path for path, (files, _) in pending.items()}
+        for n, future in enumerate(as_completed(futures), 1):
+            path = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # Worker ที่ล้ม (เช่น BrokenProcessPool) ไม่ทำให้ทั้ง Batch หยุด และยังเขียน Report ได้
+                result = {"file": path, "status": "failed", "rows": 0, "error": f"{type(e).__name__}: {e}"}
+            rows.append(result)
+            print(f"[{n}/{len(futures)}] {result['status']:<6} {os.path.basename(path)} {result['error']}")
+            if result["status"] == "done":
+                files, stamp = pending[path]
+                manifest[path] = {**stamp, "rows": result["rows"], "outputs": files}
+                # บันทึกทุกไฟล์ที่เสร็จ เพื่อให้รันต่อได้ถ้าถูกหยุดกลางทาง
+                save_manifest(manifest, out_dir)
+    wall = time.perf_counter() - start
+
+    report = pd.DataFrame(rows)
+    report.to_csv(os.path.join(out_dir, REPORT), index=False)
+    print_report(report, wall)
+    return report
+
+
+def print_report(report, wall):
+    stages = [s for s in ("load", "fit", "stats", "plot", "write") if s in report]
+    done = report[report["status"] == "done"]
+
+    print("\n--- Batch summary ---")
+    print(report["status"].value_counts().to_string())
+    print(f"Rows clustered: {int(done['rows'].sum()) if not done.empty else 0}")
+    if not done.empty:
+        busy = done[stages].sum().sum()
+        print("Time per stage (sum over files, s):")
+        print(done[stages].sum().round(2).to_string())
+        print(f"Wall time: {wall:.2f}s (worker time {busy:.2f}s, {busy / wall if wall else 0:.1f}x parallel)")
+        slowest = done.assign(total=done[stages].sum(axis=1)).nlargest(5, "total")
+        print("Slowest surveys:")
+        print(slowest[["file", "rows", "total"]].round(2).to_string(index=False))
+    failed = report[report["status"] == "failed"]
+    if not failed.empty:
+        print("Failed surveys:")
+        print(failed[["file", "error"]].to_string(index=False))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cluster many joint surveys (CSV/XLSX/Parquet/Feather) into labeled CSV, stats and stereonet image")
+    parser.add_argument("inputs", nargs="+", help="directories, glob patterns or files")
+    parser.add_argument("-o", "--output", default="joint_batch_output", help="output directory")
+    parser.add_argument("--config", help="JSON file with shared settings (keys of DEFAULT_CONFIG)")
+    parser.add_argument("-k", type=int, help="number of joint sets")
+    parser.add_argument("--plot-type", choices=PLOT_TYPES)
+    parser.add_argument("--dpi", type=int)
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), help="stereonet image format")
+    parser.add_argument("--jobs", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--recursive", action="store_true", help="also search sub-directories")
+    parser.add_argument("--force", action="store_true", help="reprocess unchanged surveys")
+    args = parser.parse_args()
+
+    config = load_config(args.config, k=args.k, plot_type=args.plot_type, dpi=args.dpi, format=args.format)
+    paths = expand_inputs(args.inputs, args.recursive, exclude_dir=args.output)
+    if not paths:
+        parser.error(f"no surveys found ({', '.join(INPUT_EXTENSIONS)})")
+    report = run_batch(paths, args.output, config, args.jobs, args.force)
+    raise SystemExit(1 if (report["status"] == "failed").any() else 0)
@@ -0,0 +1,45 @@
+import numpy as np
+
+
+def orientation_to_vectors(dd, dip, out=None, dtype=np.float64):
+    """
+    Converts dip direction (dd) and dip angle (dip) arrays in degrees to pole unit vectors (N x 3)
+    in one NumPy pass. Same convention as the former per-row orientation_to_vector:
+    strike = dd - 90 (right-hand rule), nx = sin(dip) sin(strike), ny = sin(dip) cos(strike), nz = cos(dip).
+    out: optional preallocated (N, 3) float32/float64 array that receives the result.
+    """
+    if out is None:
+        dd = np.asarray(dd)
+        out = np.empty((dd.shape[0], 3), dtype=dtype)
+    dtype = out.dtype
+
+    # ใช้ Buffer ชั่วคราวเพียง 2 ชุด และเขียนผลลงคอลัมน์ของ out โดยตรง (ไม่สร้าง list รายแถว)
+    strike = np.radians(np.asarray(dd, dtype=dtype))
+    strike -= np.pi / 2
+    dip_rad = np.radians(np.asarray(dip, dtype=dtype))
+
+    np.sin(dip_rad, out=out[:, 0])
+    out[:, 1] = out[:, 0]
+    np.cos(dip_rad, out=out[:, 2])
+
+    np.sin(strike, out=dip_rad)
+    out[:, 0] *= dip_rad
+    np.cos(strike, out=dip_rad)
+    out[:, 1] *= dip_rad
+    return out
+
+
+def vectors_to_orientation(vectors):
+    """
+    Inverse of orientation_to_vectors: returns (dd, dip) arrays in degrees for pole vectors (N x 3).
+    Vectors need not be unit length; poles pointing up (nz < 0) are flipped, as both ends describe the same plane.
+    """
+    v = np.asarray(vectors, dtype=np.float64)
+    sign = np.where(v[:, 2] < 0, -1.0, 1.0)
+    nx, ny, nz = v[:, 0] * sign, v[:, 1] * sign, v[:, 2] * sign
+
+    norm = np.sqrt(nx * nx + ny * ny + nz * nz)
+    dip = np.degrees(np.arccos(np.clip(nz / norm, -1.0, 1.0)))
+    strike = np.degrees(np.arctan2(nx, ny))
+    dd = (strike + 90) % 360
+    return dd, dip
@@ -0,0 +1,100 @@
+import os
+import numpy as np
+import pandas as pd
+
+try:
+    # pyarrow (ถ้ามี) อ่าน CSV แบบหลาย Thread และจำเป็นสำหรับ Parquet/Feather
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+try:
+    # ตัวอ่าน Excel ที่เร็วกว่า openpyxl หลายเท่า (pip install python-calamine)
+    import python_calamine
+    EXCEL_ENGINE = "calamine"
+except ImportError:
+    EXCEL_ENGINE = None
+
+ORIENTATION_COLUMNS = ("dip direction", "dip angle")
+INPUT_EXTENSIONS = (".csv", ".xlsx", ".parquet", ".feather")
+
+
+def file_extension(source, name=None):
+    """Lower-case extension of name (e.g. the name of an uploaded file) or of the source path."""
+    return os.path.splitext(str(name or source))[1].lower()
+
+
+def match_columns(header):
+    """Actual names of the dip direction and dip angle columns in header (case- and space-insensitive)."""
+    by_name = {str(c).lower().strip(): c for c in header}
+    missing = [name for name in ORIENTATION_COLUMNS if name not in by_name]
+    if missing:
+        raise KeyError(f"missing column(s) {missing}")
+    return [by_name[name] for name in ORIENTATION_COLUMNS]
+
+
+def _rewind(source):
+    # ไฟล์ที่อัปโหลด (file-like) ต้องย้อนกลับไปต้นไฟล์หลังอ่าน Header
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+
+def read_header(source, name=None):
+    """Column names of a CSV, XLSX, Parquet or Feather file without reading its rows."""
+    ext = file_extension(source, name)
+    if ext == ".csv":
+        header = pd.read_csv(source, nrows=0).columns
+    elif ext == ".xlsx":
+        header = pd.read_excel(source, nrows=0, engine=EXCEL_ENGINE).columns
+    elif ext in (".parquet", ".feather"):
+        if pyarrow is None:
+            raise ImportError(f"{ext} files require the 'pyarrow' package (pip install pyarrow)")
+        schema = pyarrow.parquet.read_schema(source) if ext == ".parquet" else pyarrow.ipc.open_file(source).schema
+        header = schema.names
+    else:
+        raise ValueError(f"unsupported file type '{ext}' (expected one of {INPUT_EXTENSIONS})")
+    _rewind(source)
+    return list(header)
+
+
+def resolve_columns(source, name=None):
+    """Reads only the header and returns the actual names of the dip direction and dip angle columns."""
+    return match_columns(read_header(source, name))
+
+
+def _read_columns(source, ext, columns, dtype=None):
+    dtypes = {c: dtype for c in columns} if dtype is not None else None
+    if ext == ".csv":
+        engine = "pyarrow" if pyarrow is not None else "c"
+        return pd.read_csv(source, usecols=columns, dtype=dtypes, engine=engine)
+    if ext == ".xlsx":
+        return pd.read_excel(source, usecols=columns, dtype=dtypes, engine=EXCEL_ENGINE)
+    if ext == ".parquet":
+        df = pd.read_parquet(source, columns=columns)
+    else:
+        df = pd.read_feather(source, columns=columns)
+    return df.astype(dtypes) if dtypes else df
+
+
+def read_orientations(source, name=None, dtype=np.float64):
+    """
+    Dip direction / dip angle of a CSV, XLSX, Parquet or Feather survey (path or file-like; name gives the
+    extension of an uploaded file). The two columns are resolved from the header first and only they are
+    parsed, with an explicit float dtype. Returns a DataFrame with columns 'dip direction' and 'dip angle';
+    rows with a missing or non-numeric value are dropped.
+    """
+    ext = file_extension(source, name)
+    columns = resolve_columns(source, name)
+    try:
+        df = _read_columns(source, ext, columns, dtype)
+    except ValueError:
+        # มีค่าที่ไม่ใช่ตัวเลขปนอยู่: อ่านสองคอลัมน์นี้ใหม่แบบไม่กำหนด dtype แล้วแปลงทีละค่า
+        _rewind(source)
+        df = _read_columns(source, ext, columns).apply(pd.to_numeric, errors='coerce').astype(dtype)
+    _rewind(source)
+
+    df = df[columns]
+    df.columns = list(ORIENTATION_COLUMNS)
+    return df.dropna()
@@ -0,0 +1,119 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.metrics import silhouette_score
+from spherical_kmeans import SphericalKMeans
+
+K_RANGE = range(2, 11)
+SILHOUETTE_SAMPLE = 2000 # Silhouette ใช้ Distance matrix (n x n) จึงคำนวณบนตัวอย่างสุ่ม
+
+
+def _fit_k(vectors, k, random_state):
+    return SphericalKMeans(n_clusters=k, random_state=random_state).fit(vectors)
+
+
+def sweep_k(vectors, k_values=K_RANGE, n_jobs=-1, random_state=42):
+    """
+    Fits SphericalKMeans for every K in k_values in parallel (joblib; large vector arrays are shared
+    with the workers through a memory map instead of being copied). Returns {k: fitted model}.
+    """
+    k_values = [k for k in k_values if k <= len(vectors)]
+    models = Parallel(n_jobs=n_jobs)(delayed(_fit_k)(vectors, k, random_state) for k in k_values)
+    return dict(zip(k_values, models))
+
+
+def log_sinh(kappa):
+    # log(sinh κ) ที่ไม่ Overflow เมื่อ κ สูง
+    return kappa + np.log1p(-np.exp(-2 * kappa)) - np.log(2)
+
+
+def fisher_bic(vectors, labels, centers):
+    """
+    BIC of a hard-assignment Fisher mixture on sign-aligned poles: each set has a mean direction (2 params),
+    a concentration κ (Banerjee approximation from the mean resultant length) and a weight.
+    """
+    n = len(vectors)
+    log_likelihood = 0.0
+    for j, center in enumerate(centers):
+        members = vectors[labels == j]
+        n_j = len(members)
+        if n_j == 0:
+            continue
+        # Resultant ของสมาชิกหลังกลับทิศให้อยู่ด้านเดียวกับ Centroid (v และ -v คือระนาบเดียวกัน)
+        resultant = np.abs(members @ center).sum()
+        r_bar = min(resultant / n_j, 1 - 1e-9)
+        kappa = max(r_bar * (3 - r_bar ** 2) / (1 - r_bar ** 2), 1e-6)
+        log_likelihood += n_j * (np.log(kappa / (2 * np.pi)) - log_sinh(kappa) + np.log(n_j / n)) + kappa * resultant
+    n_params = 4 * len(centers) - 1
+    return -2 * log_likelihood + n_params * np.log(n)
+
+
+def elbow_k(inertia):
+    """K at the knee of the inertia curve: the point farthest from the line joining its two ends."""
+    k = inertia.index.to_numpy(dtype=float)
+    y = inertia.to_numpy(dtype=float)
+    if len(k) < 3:
+        return int(k[0])
+    # ปรับสเกลทั้งสองแกนเป็น 0-1 ก่อนวัดระยะ
+    x_n = (k - k[0]) / (k[-1] - k[0])
+    y_n = (y - y.min()) / (np.ptp(y) or 1)
+    distance = np.abs((y_n[-1] - y_n[0]) * x_n - (x_n[-1] - x_n[0]) * y_n + x_n[-1] * y_n[0] - y_n[-1] * x_n[0])
+    return int(k[np.argmax(distance)])
+
+
+def score_fits(vectors, models, sample_size=SILHOUETTE_SAMPLE, random_state=0):
+    """
+    Scores every fit: inertia (elbow), silhouette on the axial distance 1 - |x . y| (random sample of
+    the same points for every K) and Fisher-mixture BIC. Returns (DataFrame indexed by k, suggested K per criterion).
+    """
+    vectors = np.asarray(vectors, dtype=np.float64)
+    rng = np.random.default_rng(random_state)
+    sample = rng.choice(len(vectors), size=min(sample_size, len(vectors)), replace=False)
+    distance = 1.0 - np.abs(vectors[sample] @ vectors[sample].T)
+    np.fill_diagonal(distance, 0)
+    np.clip(distance, 0, None, out=distance)
+
+    rows = []
+    for k, model in sorted(models.items()):
+        sample_labels = model.labels_[sample]
+        silhouette = (
+            silhouette_score(distance, sample_labels, metric='precomputed')
+            if 1 < len(np.unique(sample_labels)) < len(sample) else np.nan
+        )
+        rows.append({
+            'k': k,
+            'inertia': model.inertia_,
+            'silhouette': silhouette,
+            'bic': fisher_bic(vectors, model.labels_, model.cluster_centers_),
+        })
+    scores = pd.DataFrame(rows).set_index('k')
+
+    suggested = {
+        'silhouette': int(scores['silhouette'].idxmax()) if scores['silhouette'].notna().any() else None,
+        'elbow': elbow_k(scores['inertia']),
+        'bic': int(scores['bic'].idxmin()),
+    }
+    return scores, suggested
+
+
+if __name__ == "__main__":
+    from joint_geometry import orientation_to_vectors
+    from joint_io import read_orientations
+
+    parser = argparse.ArgumentParser(description="Score K = 2..10 joint sets for an orientation CSV")
+    parser.add_argument("input", help="CSV/XLSX/Parquet/Feather with 'Dip Direction' and 'Dip Angle' columns")
+    parser.add_argument("--k-min", type=int, default=K_RANGE.start)
+    parser.add_argument("--k-max", type=int, default=K_RANGE.stop - 1)
+    parser.add_argument("--jobs", type=int, default=-1)
+    args = parser.parse_args()
+
+    df = read_orientations(args.input)
+    vectors = orientation_to_vectors(df["dip direction"].to_numpy(), df["dip angle"].to_numpy())
+
+    start = time.perf_counter()
+    models = sweep_k(vectors, range(args.k_min, args.k_max + 1), n_jobs=args.jobs)
+    scores, suggested = score_fits(vectors, models)
+    print(scores.to_string())
+    print(f"\nSuggested K: {suggested}  ({time.perf_counter() - start:.2f}s)")
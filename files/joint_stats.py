@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+from joint_geometry import vectors_to_orientation
+
+CONFIDENCE = 0.95
+
+STAT_COLUMNS = [
+    'n', 'mean_dip_direction', 'mean_dip_angle', 'resultant_length', 'mean_resultant_length',
+    'kappa', 'alpha95', 'spread',
+]
+
+
+def _group_sums(values, labels, n_sets):
+    # ผลรวมรายชุดของทุกคอลัมน์ใน values (N x m) ด้วย bincount: รอบเดียวต่อคอลัมน์ ไม่มี loop รายชุด
+    return np.stack([np.bincount(labels, weights=values[:, j], minlength=n_sets) for j in range(values.shape[1])], axis=1)
+
+
+def principal_axes(vectors, labels, n_sets):
+    """Mean axis of every set: principal eigenvector of its orientation tensor (for labels without centroids)."""
+    i, j = np.triu_indices(3)
+    tensors = np.zeros((n_sets, 3, 3))
+    tensors[:, i, j] = _group_sums(vectors[:, i] * vectors[:, j], labels, n_sets)
+    tensors[:, j, i] = tensors[:, i, j]
+    return np.linalg.eigh(tensors)[1][:, :, -1]
+
+
+def set_statistics(vectors, labels, centers=None, confidence=CONFIDENCE):
+    """
+    Fisher statistics of every joint set in one grouped pass over the labeled pole vectors:
+    mean orientation (dip direction / dip angle), resultant length R, mean resultant length R/N,
+    concentration kappa = (N - 1) / (N - R), alpha95 cone of confidence and spread (angle θ63 = 81° / sqrt(kappa)).
+    Poles are axial, so each one is first flipped to the side of its set's centre (centers, e.g. the
+    cluster_centers_ of the fit; default: principal axis of each set). Negative labels (noise) are ignored.
+    Returns a DataFrame indexed by joint_set.
+    """
+    vectors = np.asarray(vectors, dtype=np.float64)
+    labels = np.asarray(labels)
+    valid = labels >= 0
+    vectors, labels = vectors[valid], labels[valid]
+    n_sets = int(labels.max()) + 1 if len(labels) else 0
+    if centers is None:
+        centers = principal_axes(vectors, labels, n_sets)
+    centers = np.asarray(centers, dtype=np.float64)[:n_sets]
+
+    # กลับทิศ Pole ให้อยู่ด้านเดียวกับ Centroid ของชุด แล้วรวมเวกเตอร์ทุกชุดพร้อมกัน
+    signs = np.where(np.einsum('ij,ij->i', vectors, centers[labels]) < 0, -1.0, 1.0)
+    resultants = _group_sums(vectors * signs[:, None], labels, n_sets)
+    n = np.bincount(labels, minlength=n_sets).astype(float)
+    r = np.linalg.norm(resultants, axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        kappa = np.where(n > r, (n - 1) / (n - r), np.inf)
+        cos_alpha = 1 - (n - r) / r * ((1 / (1 - confidence)) ** (1 / (n - 1)) - 1)
+        alpha95 = np.where(n > 1, np.degrees(np.arccos(np.clip(cos_alpha, -1, 1))), np.nan)
+        spread = 81.0 / np.sqrt(kappa)
+        mean_dd, mean_dip = vectors_to_orientation(resultants)
+
+    stats = pd.DataFrame({
+        'n': n.astype(int),
+        'mean_dip_direction': mean_dd,
+        'mean_dip_angle': mean_dip,
+        'resultant_length': r,
+        'mean_resultant_length': r / n,
+        'kappa': kappa,
+        'alpha95': alpha95,
+        'spread': spread,
+    })
+    stats.index.name = 'joint_set'
+    return stats[stats['n'] > 0]
+
+
+def with_set_statistics(labeled, stats):
+    """Labeled rows with the statistics of their set appended as set_* columns (for the CSV export)."""
+    return labeled.join(stats.add_prefix('set_'), on='joint_set')
@@ -0,0 +1,105 @@
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+from joint_geometry import orientation_to_vectors, vectors_to_orientation
+from joint_io import resolve_columns
+from spherical_kmeans import MiniBatchSphericalKMeans
+
+CHUNK_SIZE = 200_000
+SAMPLE_SIZE = 20_000 # จำนวนจุดสุ่มที่ใช้หา Centroid เริ่มต้น
+
+
+def iter_orientation_chunks(path, chunksize=CHUNK_SIZE):
+    """
+    Yields (dd, dip) float32 arrays of at most chunksize rows. Only the two orientation columns are parsed;
+    rows with a missing value are dropped.
+    """
+    columns = resolve_columns(path)
+    reader = pd.read_csv(path, usecols=columns, dtype={c: np.float32 for c in columns}, chunksize=chunksize)
+    for chunk in reader:
+        values = chunk[columns].to_numpy()
+        values = values[~np.isnan(values).any(axis=1)]
+        if len(values):
+            yield values[:, 0], values[:, 1]
+
+
+def _chunk_vectors(path, chunksize):
+    # Buffer (N x 3) float32 ชุดเดียวใช้ซ้ำทุก Chunk
+    buffer = np.empty((chunksize, 3), dtype=np.float32)
+    for dd, dip in iter_orientation_chunks(path, chunksize):
+        yield dd, dip, orientation_to_vectors(dd, dip, out=buffer[:len(dd)])
+
+
+def sample_stream(path, size=SAMPLE_SIZE, chunksize=CHUNK_SIZE, random_state=None):
+    """
+    Uniform random sample of at most `size` pole vectors from the whole file in one streaming pass
+    (reservoir by random keys), so that seeding also sees sets that appear only late in a sorted file.
+    """
+    rng = np.random.default_rng(random_state)
+    sample = np.empty((0, 3), dtype=np.float32)
+    keys = np.empty(0)
+    for _, _, vectors in _chunk_vectors(path, chunksize):
+        sample = np.concatenate([sample, vectors])
+        keys = np.concatenate([keys, rng.random(len(vectors))])
+        if len(keys) > size:
+            keep = np.argpartition(keys, size)[:size]
+            sample, keys = sample[keep], keys[keep]
+    return sample
+
+
+def fit_stream(path, n_clusters=3, chunksize=CHUNK_SIZE, n_passes=1, random_state=None):
+    """
+    Seeds MiniBatchSphericalKMeans from a random sample of the file, then refines it over n_passes
+    streaming passes, one chunk at a time (memory stays at one chunk plus the sample).
+    """
+    sample = sample_stream(path, SAMPLE_SIZE, chunksize, random_state)
+    if len(sample) < n_clusters:
+        raise ValueError(f"{path}: {len(sample)} valid orientation row(s), need at least {n_clusters}")
+
+    model = MiniBatchSphericalKMeans(n_clusters=n_clusters, random_state=random_state).partial_fit(sample)
+    for _ in range(n_passes):
+        model.new_pass()
+        for _, _, vectors in _chunk_vectors(path, chunksize):
+            model.partial_fit(vectors)
+    return model
+
+
+def label_stream(path, model, output_file, chunksize=CHUNK_SIZE):
+    """
+    Final streaming pass: assigns every row to a joint set and appends it to output_file chunk by chunk
+    (columns: dip direction, dip angle, joint_set). Returns the number of rows written.
+    """
+    columns = resolve_columns(path)
+    written = 0
+    for dd, dip, vectors in _chunk_vectors(path, chunksize):
+        pd.DataFrame({
+            columns[0]: dd,
+            columns[1]: dip,
+            'joint_set': model.predict(vectors),
+        }).to_csv(output_file, mode='w' if written == 0 else 'a', header=written == 0, index=False)
+        written += len(dd)
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Out-of-core joint set clustering of a large orientation CSV")
+    parser.add_argument("input", help="CSV with 'Dip Direction' and 'Dip Angle' columns")
+    parser.add_argument("-o", "--output", help="labeled CSV (default: <input>_labeled.csv)")
+    parser.add_argument("-k", type=int, default=3, help="number of joint sets")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--passes", type=int, default=1, help="refinement passes over the file after seeding")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    output_file = args.output or os.path.splitext(args.input)[0] + "_labeled.csv"
+    start = time.perf_counter()
+    model = fit_stream(args.input, args.k, args.chunksize, args.passes, args.seed)
+    fitted = time.perf_counter()
+    rows = label_stream(args.input, model, output_file, args.chunksize)
+    done = time.perf_counter()
+
+    print(f"Fitted {args.k} joint sets in {fitted - start:.2f}s, labeled {rows} rows in {done - fitted:.2f}s -> {output_file}")
+    for i, ((dd, dip), count) in enumerate(zip(zip(*vectors_to_orientation(model.cluster_centers_)), model.counts_)):
+        print(f"  Set {i}: mean pole {dd:05.1f}/{dip:04.1f}  ({count} joints)")
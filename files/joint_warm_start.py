@@ -0,0 +1,94 @@
+import json
+import os
+import re
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from spherical_kmeans import SphericalKMeans
+
+PROJECT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "joint_projects")
+
+
+def project_path(project, directory=PROJECT_DIR):
+    """JSON file holding the saved centroids of a project (one entry per K)."""
+    name = re.sub(r"[^\w\-]+", "_", str(project).strip()) or "default"
+    return os.path.join(directory, f"{name}.json")
+
+
+def load_project(project, directory=PROJECT_DIR):
+    """Saved fits of the project ({str(k): {'centers', 'n_samples', 'revision'}}); empty if missing or unreadable."""
+    path = project_path(project, directory)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Could not read project centroids '{path}': {e}")
+        return {}
+
+
+def save_project(state, project, directory=PROJECT_DIR):
+    os.makedirs(directory, exist_ok=True)
+    path = project_path(project, directory)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_centroids(project, n_clusters, directory=PROJECT_DIR):
+    """Saved (n_clusters x 3) centroids of the project for this K, or None."""
+    entry = load_project(project, directory).get(str(n_clusters))
+    if entry is None:
+        return None
+    centers = np.asarray(entry["centers"], dtype=np.float64)
+    return centers if centers.shape == (n_clusters, 3) else None
+
+
+def save_centroids(project, model, n_samples, directory=PROJECT_DIR):
+    """Stores the centroids of the fit under its K; the revision counts the fits saved for that K."""
+    state = load_project(project, directory)
+    key = str(len(model.cluster_centers_))
+    state[key] = {
+        "centers": model.cluster_centers_.tolist(),
+        "n_samples": int(n_samples),
+        "revision": state.get(key, {}).get("revision", 0) + 1,
+    }
+    save_project(state, project, directory)
+
+
+def match_sets(reference, centers):
+    """
+    Order of centers that best matches the reference centroids (Hungarian assignment on the axial
+    distance 1 - |x . c|): centers[order[i]] is the new fit of reference set i.
+    """
+    cost = 1.0 - np.abs(np.asarray(reference) @ np.asarray(centers).T)
+    _, order = linear_sum_assignment(cost)
+    return order
+
+
+def relabel(model, order):
+    """Renumbers the sets of a fitted model in place so that new set i is old set order[i]."""
+    new_ids = np.empty(len(order), dtype=np.int64)
+    new_ids[order] = np.arange(len(order))
+    model.cluster_centers_ = model.cluster_centers_[order]
+    model.labels_ = new_ids[model.labels_]
+    return model
+
+
+def warm_fit(vectors, n_clusters, project, directory=PROJECT_DIR, random_state=42):
+    """
+    SphericalKMeans fit for a project. When the project already has centroids for this K (e.g. the survey
+    was extended with new measurements), a single run starts from them and usually converges in a few
+    iterations; the sets are then matched to the saved ones so set IDs stay the same across revisions.
+    Otherwise a normal k-means++ fit is done. The new centroids are saved. Returns (model, warm_started).
+    """
+    previous = load_centroids(project, n_clusters, directory)
+    if previous is None:
+        model = SphericalKMeans(n_clusters=n_clusters, random_state=random_state).fit(vectors)
+    else:
+        model = SphericalKMeans(n_clusters=n_clusters, random_state=random_state, init=previous).fit(vectors)
+        # Cluster ว่างอาจถูกเริ่มใหม่ที่จุดอื่นระหว่าง Fit จึงจับคู่กับชุดเดิมอีกครั้งเพื่อให้เลขชุดคงที่
+        relabel(model, match_sets(previous, model.cluster_centers_))
+    save_centroids(project, model, len(vectors), directory)
+    return model, previous is not None
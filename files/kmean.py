@@ -1,38 +1,38 @@
-import numpy as np
+import os
 import pandas as pd
 import matplotlib.pyplot as plt
 import mplstereonet
-from sklearn.cluster import KMeans
+from joint_geometry import orientation_to_vectors
+from joint_warm_start import warm_fit
+from joint_stats import set_statistics
 
-df = pd.read_csv("joint.csv")
+input_file = "joint.csv"
+df = pd.read_csv(input_file)
 
 df.columns = df.columns.str.lower().str.strip()
 
 dip_dir = df["dip direction"].values 
 dip = df["dip angle"].values
 
-def orientation_to_vector(dd, dip):
-    dd_rad = np.radians(dd)
-    dip_rad = np.radians(dip)
-    
-    strike = (dd - 90) % 360
-    strike_rad = np.radians(strike)
-
-    nx = np.sin(dip_rad) * np.sin(strike_rad)
-    ny = np.sin(dip_rad) * np.cos(strike_rad)
-    nz = np.cos(dip_rad)
-    return [nx, ny, nz]
-
-vectors = np.array([orientation_to_vector(dd, d) for dd, d in zip(dip_dir, dip)])
+# แปลงทิศทางทั้งชุดเป็น Pole vector ในครั้งเดียว (joint_geometry)
+vectors = orientation_to_vectors(dip_dir, dip)
 
 k = 3  
-model = KMeans(n_clusters=k).fit(vectors)
+# Axial k-means: v และ -v คือระนาบเดียวกัน จึงอยู่ในชุดเดียวกัน
+# Warm start: เริ่มจาก Centroid ที่บันทึกไว้ของไฟล์นี้ (ถ้ามี) และคงเลขชุดเดิมเมื่อเพิ่มข้อมูลใหม่
+model, warm = warm_fit(vectors, k, project=os.path.splitext(input_file)[0])
+print(f"{'Warm start' if warm else 'Cold start'}: converged in {model.n_iter_} iteration(s)")
 labels = model.labels_
 df["joint_set"] = labels
 
 print("\nJoint sets assigned!\n")
 print(df)
 
+# สถิติของแต่ละชุด: ทิศเฉลี่ย, R, kappa, alpha95, spread (คำนวณทุกชุดพร้อมกัน)
+stats = set_statistics(vectors, labels, model.cluster_centers_)
+print("\n-------- Joint Set Statistics --------")
+print(stats.round(2).to_string())
+
 fig = plt.figure(figsize=(8, 8))
 ax = fig.add_subplot(111, projection='stereonet')
 
@@ -40,7 +40,9 @@ colors = ["red", "blue", "green", "purple", "orange"]
 
 for i in range(k):
     subset = df[df["joint_set"] == i]
-    ax.plane(subset["dip direction"], subset["dip angle"], color=colors[i], label=f"Set {i}")
+    # mplstereonet รับ Strike (RHR: strike = dip direction - 90) เหมือนกับ stereonet_plot ของ kmean4
+    ax.plane(subset["dip direction"].to_numpy(dtype=float) - 90, subset["dip angle"].to_numpy(dtype=float, copy=True),
+             color=colors[i], label=f"Set {i}")
 
 ax.legend()
 plt.savefig('stereonet_output.png', dpi=300)
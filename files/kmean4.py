@@ -1,54 +1,37 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import mplstereonet
-from sklearn.cluster import KMeans
-from scipy.spatial import ConvexHull
-import io
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from joint_geometry import orientation_to_vectors
+from spherical_kmeans import SphericalKMeans
+from joint_warm_start import warm_fit
+from spherical_dbscan import EPS_DEGREES, AxialDBSCAN
+from joint_k_selection import K_RANGE, sweep_k, score_fits
+from stereonet_plot import EXPORT_FORMATS, stereonet_image
+from joint_stats import set_statistics, with_set_statistics
+from joint_io import INPUT_EXTENSIONS, read_orientations
 
-# --------------------------------------------------
-# Convert orientation to vector
-# --------------------------------------------------
-def orientation_to_vector(dd, dip):
-    """Converts dip direction (dd) and dip angle (dip) to a 3D vector (nx, ny, nz)"""
-    dd_rad = np.radians(dd)
-    dip_rad = np.radians(dip)
-
-    # Use Right-Hand Rule (RHR) for strike: strike = dd - 90
-    strike = (dd - 90) % 360
-    strike_rad = np.radians(strike)
-
-    # Calculate vector components (Pole vector calculation)
-    nx = np.sin(dip_rad) * np.sin(strike_rad)
-    ny = np.sin(dip_rad) * np.cos(strike_rad)
-    nz = np.cos(dip_rad)
-
-    return [nx, ny, nz]
+PREVIEW_DPI = 100 # รูปที่แสดงบนหน้าเว็บ (ไฟล์ดาวน์โหลดเลือก DPI เองได้)
+EXPORT_DPI_OPTIONS = (100, 150, 300, 600)
+MAX_EXPORT_JOBS = 32 # จำนวนไฟล์ดาวน์โหลดที่เก็บไว้ใช้ซ้ำ (เก่าสุดถูกลบก่อน)
+ENGINES = ("K-Means", "DBSCAN")
 
 # --------------------------------------------------
 # Read file and validate columns
 # --------------------------------------------------
 @st.cache_data
 def load_data(uploaded_file):
-    """Loads and validates data from an uploaded CSV or XLSX file."""
-    # Read data based on file type
-    if uploaded_file.name.endswith(".csv"):
-        df = pd.read_csv(uploaded_file)
-    elif uploaded_file.name.endswith(".xlsx"):
-        df = pd.read_excel(uploaded_file)
-    else:
-        st.error("ไฟล์ต้องเป็น CSV หรือ XLSX")
-        return None
-
-    df.columns = df.columns.str.lower().str.strip()
-    required_cols = ["dip direction", "dip angle"]
-    
-    if not all(col in df.columns for col in required_cols):
+    """Loads and validates data from an uploaded CSV, XLSX, Parquet or Feather file."""
+    # อ่าน Header ก่อน แล้ว Parse เฉพาะสองคอลัมน์ที่ใช้เป็น float (ไม่โหลดคอลัมน์อื่นทั้งไฟล์)
+    try:
+        df = read_orientations(uploaded_file, uploaded_file.name)
+    except KeyError:
         st.error("❌ ไฟล์ต้องมีคอลัมน์: **dip direction** และ **dip angle** (ตัวพิมพ์เล็ก-ใหญ่ได้)")
         return None
-
-    df = df[required_cols].apply(pd.to_numeric, errors='coerce').dropna()
+    except (ValueError, ImportError) as e:
+        st.error(f"❌ อ่านไฟล์ไม่ได้: {e}")
+        return None
     
     if df.empty:
          st.error("❌ ข้อมูลที่จำเป็น (dip direction, dip angle) เป็นค่าว่างหรือไม่ใช่ตัวเลข")
@@ -57,89 +40,178 @@ def load_data(uploaded_file):
     return df
 
 # --------------------------------------------------
-# Plot Stereonet
+# Cached stages: vectors -> fit -> labels -> figure
+# ทุกขั้นใช้ Key = Hash ของข้อมูล + พารามิเตอร์ของขั้นนั้น
+# (อาร์กิวเมนต์ที่ขึ้นต้นด้วย _ ไม่ถูก Hash โดย Streamlit)
+# --------------------------------------------------
+def data_key(df):
+    """Content hash of the loaded orientations (row order included); identifies the data in every cached stage."""
+    # Hash ต่อแถวเรียงตามลำดับ: ข้อมูลเดียวกันที่สลับแถวต้องได้ Key ใหม่ เพราะ labels_ ผูกกับลำดับแถว
+    return hashlib.sha1(pd.util.hash_pandas_object(df, index=False).values.tobytes()).hexdigest()
+
+@st.cache_data
+def compute_vectors(key, _df):
+    """Pole vectors (RHR: strike = dd - 90; one vectorized pass)."""
+    return orientation_to_vectors(_df["dip direction"].to_numpy(), _df["dip angle"].to_numpy())
+
+@st.cache_resource(show_spinner="กำลังจัดกลุ่ม (K-Means)...")
+def fit_model(key, k_value, project, _vectors):
+    """
+    Axial (spherical) K-Means: |dot| similarity, v และ -v คือระนาบเดียวกัน.
+    With a project name the fit starts from the project's saved centroids and keeps its set IDs.
+    Returns (model, warm_started).
+    """
+    if project:
+        return warm_fit(_vectors, k_value, project)
+    return SphericalKMeans(n_clusters=k_value, random_state=42).fit(_vectors), False
+
+@st.cache_resource(show_spinner="กำลังจัดกลุ่ม (DBSCAN)...")
+def fit_dbscan(key, eps, min_samples, _vectors):
+    """Density-based sets (axial DBSCAN on binned poles); joints outside every set get joint_set = -1."""
+    return AxialDBSCAN(eps=eps, min_samples=min_samples or None).fit(_vectors)
+
+@st.cache_data
+def label_data(key, k_value, _df, _model):
+    """Copy of the data with the joint_set column of the fit."""
+    return _df.assign(joint_set=_model.labels_)
+
+@st.cache_data
+def compute_set_stats(key, k_value, _vectors, _model):
+    """Mean orientation, R, kappa, alpha95 and spread of every set (one grouped NumPy pass)."""
+    return set_statistics(_vectors, _model.labels_, _model.cluster_centers_)
+
+@st.cache_data(show_spinner="กำลังวาด Stereonet...")
+def render_stereonet(key, k_value, plot_type, font_name, plot_options, _labeled, _centers):
+    """On-screen preview PNG (PREVIEW_DPI) of a labeled DataFrame; drawing lives in stereonet_plot."""
+    return stereonet_image(_labeled, k_value, _centers, plot_type, font_name, plot_options, "png", PREVIEW_DPI)
+
+def convert_df_to_csv(labeled, stats):
+    # To CSV without index; ทุกแถวมีสถิติของชุดต่อท้าย (คอลัมน์ set_*)
+    return with_set_statistics(labeled, stats).to_csv(index=False).encode('utf-8')
+
+# --------------------------------------------------
+# Background export: ไฟล์ดาวน์โหลดถูกสร้างเมื่อกดปุ่มเท่านั้น และสร้างใน Worker thread
+# --------------------------------------------------
+@st.cache_resource
+def export_worker():
+    """Thread pool shared by all sessions, with the jobs it has run ({job key: Future}) and their lock."""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="stereonet-export"), {}, threading.Lock()
+
+def submit_export(job_key, fn, *args):
+    """
+    Future of fn(*args) on the export pool; the same job_key reuses the running or finished job.
+    A job that failed is submitted again, so the next click retries it.
+    """
+    pool, jobs, lock = export_worker()
+    with lock:
+        job = jobs.get(job_key)
+        if job is not None and job.done() and job.exception() is not None:
+            del jobs[job_key]
+        if job_key not in jobs:
+            if len(jobs) >= MAX_EXPORT_JOBS:
+                jobs.pop(next(iter(jobs)))
+            jobs[job_key] = pool.submit(fn, *args)
+        return jobs[job_key]
+
+def lazy_export(job_key, fn, *args):
+    """Download payload callable: Streamlit calls it off the script thread only when the button is clicked."""
+    return lambda: submit_export(job_key, fn, *args).result()
+
 # --------------------------------------------------
-def plot_stereonet(df, k_value, plot_type, font_name):
-    """Performs K-Means clustering and plots the results on a stereonet."""
-    st.subheader(f"📊 ผลลัพธ์การจัดกลุ่ม K={k_value} ({plot_type.capitalize()} Plot)")
+# Auto K: fit every K once (in parallel) and keep all fits
+# --------------------------------------------------
+@st.cache_resource(show_spinner="กำลังจัดกลุ่มทุกค่า K แบบขนาน...")
+def run_k_sweep(key, _vectors):
+    """Fits K = 2..10 on the same pole vectors and scores them; cached, so changing K afterwards is instant."""
+    models = sweep_k(_vectors, K_RANGE)
+    scores, suggested = score_fits(_vectors, models)
+    return models, scores, suggested
+
+def show_k_scores(scores, suggested):
+    """Shows the silhouette / elbow / BIC curves and the K each criterion suggests."""
+    st.subheader("🔎 การเลือก K อัตโนมัติ")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Silhouette (สูงสุด)", suggested['silhouette'])
+    col2.metric("Elbow (Inertia)", suggested['elbow'])
+    col3.metric("BIC (ต่ำสุด)", suggested['bic'])
 
-    # 1. Convert orientation to vectors
-    vectors = np.array([orientation_to_vector(dd, d)
-                        for dd, d in zip(df["dip direction"], df["dip angle"])])
+    col1, col2, col3 = st.columns(3)
+    col1.line_chart(scores['silhouette'])
+    col2.line_chart(scores['inertia'])
+    col3.line_chart(scores['bic'])
+    st.dataframe(scores.style.format({'inertia': '{:.1f}', 'silhouette': '{:.3f}', 'bic': '{:.1f}'}))
 
-    # 2. Run KMeans Clustering
+# --------------------------------------------------
+# Plot Stereonet
+# --------------------------------------------------
+def plot_stereonet(df, key, k_value, plot_type, font_name, plot_options, model=None, project="", fit_tag="",
+                   engine="K-Means"):
+    """Shows the clustering result for K (or the k_value sets DBSCAN found); every step comes from the cached stages above."""
+    if engine == "DBSCAN":
+        st.subheader(f"📊 ผลลัพธ์การจัดกลุ่ม DBSCAN: พบ {k_value} ชุด ({plot_type.capitalize()} Plot)")
+    else:
+        st.subheader(f"📊 ผลลัพธ์การจัดกลุ่ม K={k_value} ({plot_type.capitalize()} Plot)")
+
+    # 1-2. Vectors และ Fit (Cache ตาม Hash ข้อมูลและ K; เปลี่ยน Font/Plot Type ไม่ต้องจัดกลุ่มใหม่)
+    warm = False
     try:
-        model = KMeans(n_clusters=k_value, random_state=42, n_init='auto')
-        labels = model.fit_predict(vectors)
-        df["joint_set"] = labels
+        if model is None:
+            model, warm = fit_model(key, k_value, project, compute_vectors(key, df))
     except ValueError as e:
         st.error(f"❌ Error ในการทำ K-Means: ตรวจสอบจำนวนข้อมูล ({len(df)}) และ K value")
         st.exception(e)
         return None
+    if warm:
+        st.caption(f"♻️ Warm start จาก Centroid ของโปรเจกต์ '{project}': ลู่เข้าใน {model.n_iter_} รอบ (เลขชุดเดิม)")
+    # เลขชุดของ Warm start ขึ้นกับโปรเจกต์ (และของ DBSCAN ขึ้นกับพารามิเตอร์ใน fit_tag)
+    # จึงแยก Cache ของขั้นถัดไปตามค่าเหล่านี้ด้วย
+    vectors = compute_vectors(key, df)
+    variant = fit_tag or project
+    key = f"{key}:{variant}" if variant else key
+    labeled = label_data(key, k_value, df, model)
+    stats = compute_set_stats(key, k_value, vectors, model)
+
+    # 3-5. วาดเฉพาะรูป แล้วแสดงใน Streamlit
+    png = render_stereonet(key, k_value, plot_type, font_name, plot_options, labeled, model.cluster_centers_)
+    st.image(png)
 
-    # 3. Plotting Setup
-    
-    # กำหนด Font Global
-    plt.rcParams["font.family"] = font_name
-    
-    # กำหนดขนาด Figure สำหรับรายงาน (ขนาดมาตรฐานสำหรับเอกสาร)
-    fig_report = plt.figure(figsize=(7, 7)) 
-    ax = fig_report.add_subplot(111, projection='stereonet')
-    
-    # Fixed: ใช้ ax.grid(True) เพื่อเปิด Grid (ค่า Default คือ 10 องศา) เท่านั้น
-    ax.grid(True) 
-    
-    # ⚠️ ข้อความเตือนเรื่อง Grid Spacing ถูกลบออกแล้วตามคำขอ
-    
-    # Get distinct colors
-    colors = plt.cm.get_cmap("Set1", k_value)
-
-    # 4. Loop Plotting 
-    for i in range(k_value):
-        subset = df[df["joint_set"] == i]
-        dd_subset = subset["dip direction"].values
-        dip_subset = subset["dip angle"].values
-        
-        # Plot based on user choice (Pole or Plane)
-        if plot_type == "Plane":
-             # Plot great circles (planes) for all data points in the set
-             ax.plane(dd_subset, dip_subset,
-                      color=colors(i), alpha=0.5, 
-                      label=f"Set {i} (n={len(subset)})")
-        
-        elif plot_type == "Pole":
-            # Plot poles (points)
-            ax.pole(dd_subset, dip_subset,
-                    marker="o", markersize=5, color=colors(i), alpha=0.7, label=f"Set {i} (n={len(subset)})")
-        
-    ax.legend(loc="lower left", title="Joint Sets")
-    
-    # 5. แสดง Plot ใน Streamlit
-    st.pyplot(fig_report)
-    
     st.success("✅ กราฟถูกแสดงผลและจัดกลุ่มเสร็จสิ้น!")
-    
-    # 6. ปุ่มดาวน์โหลดรูปภาพ
-    buf = io.BytesIO()
-    fig_report.savefig(buf, format="png", dpi=300)
+
+    # 6. ปุ่มดาวน์โหลดรูปภาพ: วาดใหม่ตามรูปแบบ/DPI ที่เลือกเมื่อกดดาวน์โหลด (ไม่ค้างหน้าเว็บระหว่างวาด)
+    col_format, col_dpi = st.columns(2)
+    export_format = col_format.selectbox(
+        "รูปแบบไฟล์ภาพ:", options=list(EXPORT_FORMATS), format_func=str.upper,
+        help="PNG: ภาพ Raster, SVG/PDF: ภาพ Vector สำหรับแก้ไขหรือพิมพ์"
+    )
+    export_dpi = col_dpi.select_slider(
+        "ความละเอียด (DPI):", options=EXPORT_DPI_OPTIONS, value=300,
+        help="DPI ต่ำสร้างไฟล์ได้เร็วและเล็กกว่า (SVG/PDF ใช้กับส่วนที่เป็น Raster เท่านั้น)"
+    )
+    image_job = (key, k_value, plot_type, font_name, tuple(sorted(plot_options.items())), export_format, export_dpi)
     st.download_button(
-        label="🖼️ ดาวน์โหลดภาพ Stereonet สำหรับรายงาน (.png)",
-        data=buf.getvalue(),
-        file_name='k-means_stereonet_report.png',
-        mime='image/png'
+        label=f"🖼️ ดาวน์โหลดภาพ Stereonet สำหรับรายงาน (.{export_format})",
+        data=lazy_export(
+            image_job, stereonet_image, labeled, k_value, model.cluster_centers_, plot_type, font_name,
+            plot_options, export_format, export_dpi
+        ),
+        file_name=f'k-means_stereonet_report.{export_format}',
+        mime=EXPORT_FORMATS[export_format]
     )
-    
+
+    # สถิติของแต่ละชุด (Fisher statistics)
+    st.subheader("📐 สถิติของแต่ละ Joint Set")
+    st.dataframe(stats.style.format({
+        'mean_dip_direction': '{:05.1f}', 'mean_dip_angle': '{:04.1f}', 'resultant_length': '{:.2f}',
+        'mean_resultant_length': '{:.4f}', 'kappa': '{:.1f}', 'alpha95': '{:.2f}°', 'spread': '{:.1f}°',
+    }))
+    st.caption("kappa = (N - 1) / (N - R), alpha95 = กรวยความเชื่อมั่น 95% ของทิศเฉลี่ย, spread = มุม θ63 (81° / √kappa)")
+
     # Optional: Display data with new cluster labels
     st.subheader("ข้อมูลพร้อม Joint Set Label")
-    st.dataframe(df)
-
-    # 7. ปุ่มดาวน์โหลดข้อมูล CSV
-    @st.cache_data
-    def convert_df_to_csv(df):
-        # To CSV without index
-        return df.to_csv(index=False).encode('utf-8')
+    st.dataframe(labeled)
 
-    csv_data = convert_df_to_csv(df)
+    # 7. ปุ่มดาวน์โหลดข้อมูล CSV (สร้างเมื่อกดปุ่มเท่านั้น)
+    csv_data = lazy_export((key, k_value, "csv"), convert_df_to_csv, labeled, stats)
 
     st.markdown("---")
     st.subheader("⬇️ ดาวน์โหลดข้อมูล Joint Set")
@@ -149,8 +221,8 @@ def plot_stereonet(df, k_value, plot_type, font_name):
         file_name='k-means_joint_sets.csv',
         mime='text/csv',
     )
-    
-    return df
+
+    return labeled
 
 # --------------------------------------------------
 # Streamlit Main App Interface
@@ -167,14 +239,15 @@ def main_app():
     
     # 1. File Uploader
     uploaded_file = st.file_uploader(
-        "1. อัปโหลดไฟล์ข้อมูล (.CSV หรือ .XLSX)",
-        type=["csv", "xlsx"]
+        "1. อัปโหลดไฟล์ข้อมูล (.CSV, .XLSX, .Parquet หรือ .Feather)",
+        type=[ext.lstrip(".") for ext in INPUT_EXTENSIONS]
     )
 
     if uploaded_file is not None:
         df = load_data(uploaded_file)
         
         if df is not None:
+            key = data_key(df)
             st.success(f"✅ โหลดข้อมูล {len(df)} แถว สำเร็จแล้ว")
             st.dataframe(df.head())
             st.markdown("---")
@@ -182,18 +255,52 @@ def main_app():
             # 2. Sidebar for controls (Optional but cleaner)
             st.sidebar.header("⚙️ การตั้งค่าการ Plot")
             
-            # K-Value Slider
-            k_value = st.sidebar.slider(
-                "2. จำนวนคลัสเตอร์ K (Joint Sets):",
-                min_value=2, max_value=10, value=3, step=1,
-                help="จำนวนกลุ่มที่ K-Means จะจัด (K=2 ถึง K=10)"
+            # Engine: K-Means (กำหนดจำนวนชุด) หรือ DBSCAN (หาชุดจากความหนาแน่น และแยก Joint กระจัดกระจายเป็น Noise)
+            engine = st.sidebar.radio(
+                "วิธีจัดกลุ่ม (Engine):",
+                ENGINES,
+                horizontal=True,
+                help="K-Means: ทุก Joint อยู่ในชุดใดชุดหนึ่ง, DBSCAN: ไม่ต้องกำหนด K และ Joint ที่ไม่อยู่ในบริเวณหนาแน่นเป็น Noise"
             )
+
+            auto_k = False
+            if engine == "K-Means":
+                # Auto K: จัดกลุ่มทุก K ไว้ล่วงหน้า แล้วเลื่อน Slider ได้ทันทีโดยไม่ต้องจัดกลุ่มใหม่
+                auto_k = st.sidebar.toggle(
+                    "Auto K (ประเมินทุกค่า K)",
+                    help="จัดกลุ่ม K=2 ถึง K=10 พร้อมกันและให้คะแนนด้วย Silhouette, Elbow และ BIC"
+                )
+                models = None
+                if auto_k:
+                    models, scores, suggested = run_k_sweep(key, compute_vectors(key, df))
+                    default_k = suggested['silhouette'] or suggested['bic']
+                else:
+                    default_k = 3
+
+                # K-Value Slider
+                k_value = st.sidebar.slider(
+                    "2. จำนวนคลัสเตอร์ K (Joint Sets):",
+                    min_value=2, max_value=10, value=default_k, step=1,
+                    help="จำนวนกลุ่มที่ K-Means จะจัด (K=2 ถึง K=10)"
+                )
+            else:
+                eps = st.sidebar.slider(
+                    "2. รัศมี eps (องศา):",
+                    min_value=1.0, max_value=20.0, value=EPS_DEGREES, step=0.5,
+                    help="มุมระหว่าง Pole ที่ถือว่าเป็นเพื่อนบ้านกัน (v และ -v คือระนาบเดียวกัน)"
+                )
+                min_samples = st.sidebar.number_input(
+                    "จำนวน Joint ขั้นต่ำในรัศมี eps (min_samples):",
+                    min_value=0, value=0, step=5,
+                    help="0 = อัตโนมัติ (1% ของจำนวน Joint, อย่างน้อย 5); ค่าสูงขึ้นทำให้มี Noise มากขึ้น"
+                )
             
             # Plot Type Radio Button
             plot_type = st.sidebar.radio(
                 "3. เลือก Plot Type:",
-                ("Pole", "Plane"),
-                help="Pole: แสดงจุด (เหมาะสำหรับ Clustering), Plane: แสดงเส้นระนาบ"
+                ("Pole", "Plane", "Density"),
+                help="Pole: แสดงจุด (เหมาะสำหรับ Clustering), Plane: แสดงเส้นระนาบ, "
+                     "Density: Contour ความหนาแน่นของ Pole พร้อมระนาบเฉลี่ยของแต่ละชุด (เหมาะกับข้อมูลจำนวนมาก)"
             )
 
             # --------------------------------------------------
@@ -209,11 +316,65 @@ def main_app():
                 index=0, 
                 help="Font ที่ใช้ใน Title, Label, และ Legend"
             )
+
+            # จำนวนจุดที่วาด: สุ่มตัวอย่างเมื่อข้อมูลมาก (การจัดกลุ่มและ Density ยังใช้ข้อมูลทั้งหมด)
+            plot_options = {
+                "max_points": st.sidebar.number_input(
+                    "5. จำนวน Joint สูงสุดที่วาด (สุ่มตัวอย่าง):",
+                    min_value=100, value=5000, step=500,
+                    help="วาด Pole/Plane เฉพาะตัวอย่างสุ่มเพื่อให้วาดและบันทึกรูปได้เร็ว"
+                ),
+                "density_method": "fisher",
+                "overlay": "ไม่แสดง",
+            }
+            if plot_type == "Density":
+                plot_options["density_method"] = st.sidebar.selectbox(
+                    "6. วิธีคำนวณ Density:",
+                    options=["fisher", "kamb"],
+                    format_func=str.capitalize,
+                    help="Fisher: Kernel แบบ Exponential (เรียบ), Kamb: Counting circle แบบดั้งเดิม"
+                )
+                plot_options["overlay"] = st.sidebar.selectbox(
+                    "7. แสดง Joint รายตัวบน Density:",
+                    options=["ไม่แสดง", "Pole", "Plane"]
+                )
+
+            # Warm start: บันทึก Centroid ตามชื่อโปรเจกต์ แล้วใช้เริ่มต้นเมื่อเพิ่มข้อมูลสำรวจใหม่ (K-Means เท่านั้น)
+            project = ""
+            if engine == "K-Means":
+                project = st.sidebar.text_input(
+                    "ชื่อโปรเจกต์ (Warm start):",
+                    help="ถ้าระบุ จะเริ่มจัดกลุ่มจาก Centroid ที่บันทึกไว้ของโปรเจกต์นี้ (K เดียวกัน) "
+                         "ลู่เข้าเร็วขึ้นและเลขชุด (Set ID) คงเดิมเมื่อเพิ่มข้อมูล"
+                ).strip()
             
+            # --- AUTO K: ใช้ผลที่จัดกลุ่มไว้แล้ว ไม่ต้องกดปุ่ม ---
+            if auto_k:
+                show_k_scores(scores, suggested)
+                st.markdown("---")
+                # มีโปรเจกต์: ใช้ Warm start ของโปรเจกต์แทนผลจาก Auto K เพื่อให้เลขชุดคงเดิม
+                model = None if project else models.get(k_value)
+                plot_stereonet(df, key, k_value, plot_type, font_name, plot_options, model=model, project=project)
+
             # --- RUN BUTTON ---
-            if st.button("🚀 ประมวลผลและแสดง Stereonet"):
-                # Run the clustering and plotting with the remaining parameters
-                plot_stereonet(df, k_value, plot_type, font_name)
+            else:
+                if st.button("🚀 ประมวลผลและแสดง Stereonet"):
+                    # จำว่าข้อมูลชุดนี้ประมวลผลแล้ว: การเปลี่ยน Widget หลังจากนี้แสดงผลต่อทันที (วาดใหม่โดยไม่จัดกลุ่มใหม่)
+                    st.session_state["processed_key"] = key
+                if st.session_state.get("processed_key") == key:
+                    if engine == "DBSCAN":
+                        # จำนวนชุดได้จากผลการจัดกลุ่ม (Joint ที่เป็น Noise มี joint_set = -1)
+                        model = fit_dbscan(key, eps, min_samples, compute_vectors(key, df))
+                        n_noise = int((model.labels_ < 0).sum())
+                        if model.n_clusters_ == 0:
+                            st.warning("⚠️ DBSCAN ไม่พบชุดใดเลย: ลองเพิ่ม eps หรือลด min_samples")
+                        else:
+                            st.info(f"DBSCAN พบ {model.n_clusters_} ชุด, Noise {n_noise} จุด ({n_noise / len(df):.1%})")
+                            plot_stereonet(df, key, model.n_clusters_, plot_type, font_name, plot_options,
+                                           model=model, fit_tag=f"dbscan:{eps}:{min_samples}", engine=engine)
+                    else:
+                        # Run the clustering and plotting with the remaining parameters
+                        plot_stereonet(df, key, k_value, plot_type, font_name, plot_options, project=project)
         else:
             st.warning("กรุณาตรวจสอบโครงสร้างไฟล์และลองใหม่อีกครั้ง")
 
@@ -0,0 +1,59 @@
+import os
+import json
+import folium
+from branca.element import Element
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "template_cache")
+# เปลี่ยนค่านี้เมื่อแก้โค้ดที่สร้าง Shell เพื่อไม่ให้ใช้ Template เก่าใน Cache
+TEMPLATE_VERSION = 1
+DATA_PLACEHOLDER = "/*__MAP_DATA__*/null"
+
+# Template ที่อ่านแล้วในโปรเซสนี้ (daemon ไม่ต้องอ่านไฟล์ซ้ำทุกรอบ)
+_loaded_templates = {}
+
+
+def add_data_slot(m, variable):
+    """
+    Adds the script that later receives the data blob: window.<variable> = <JSON>.
+    It sits in the page header, so it runs before the map scripts that read it.
+    """
+    m.get_root().header.add_child(Element(f"<script>window.{variable} = {DATA_PLACEHOLDER};</script>"))
+
+
+def template_path(name, template_dir=None):
+    return os.path.join(template_dir or TEMPLATE_DIR, f"{name}_v{TEMPLATE_VERSION}_folium{folium.__version__}.html")
+
+
+def load_template(name, build_shell, template_dir=None):
+    """
+    Returns the rendered HTML shell `name`. build_shell() must return a folium.Map containing a data slot;
+    it is called only when the shell is not cached yet (in memory or in template_dir, default TEMPLATE_DIR).
+    """
+    template_dir = template_dir or TEMPLATE_DIR
+    path = template_path(name, template_dir)
+    if path in _loaded_templates:
+        return _loaded_templates[path]
+
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+    else:
+        print(f"Rendering map template '{name}'...")
+        html = build_shell().get_root().render()
+        if html.count(DATA_PLACEHOLDER) != 1:
+            raise ValueError(f"Map template '{name}' must contain exactly one data slot")
+        os.makedirs(template_dir, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(html)
+
+    _loaded_templates[path] = html
+    return html
+
+
+def inject_data(template, data, output_file):
+    """Writes the template to output_file with the data slot replaced by the compact JSON of data."""
+    # "</" ต้อง escape เพื่อไม่ให้ข้อความในข้อมูลปิด <script> ก่อนกำหนด
+    blob = json.dumps(data, ensure_ascii=False, separators=(',', ':')).replace("</", "<\\/")
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write(template.replace(DATA_PLACEHOLDER, blob))
+    return output_file
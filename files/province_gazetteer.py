@@ -0,0 +1,273 @@
+import re
+import difflib
+import unicodedata
+import pandas as pd
+
+# ภาคตามการแบ่งของกรมอุตุนิยมวิทยา
+REGION_THAI = {
+    'north': 'ภาคเหนือ',
+    'northeast': 'ภาคตะวันออกเฉียงเหนือ',
+    'central': 'ภาคกลาง',
+    'east': 'ภาคตะวันออก',
+    'south_east': 'ภาคใต้ฝั่งตะวันออก',
+    'south_west': 'ภาคใต้ฝั่งตะวันตก',
+}
+
+# (ISO 3166-2 code, English name, Thai name, region, other spellings incl. GeoJSON NAME_1 / TMD names)
+# ตัวสะกดที่ต่างกันเพียงช่องว่างหรือขีด (เช่น "Buri Ram" / "Buriram") ไม่ต้องใส่ เพราะ normalize_name จัดการให้แล้ว
+PROVINCES = [
+    ('TH-10', 'Bangkok', 'กรุงเทพมหานคร', 'central', ('Bangkok Metropolis', 'Krung Thep Maha Nakhon', 'กรุงเทพฯ', 'กทม.')),
+    ('TH-11', 'Samut Prakan', 'สมุทรปราการ', 'central', ('Samut Prakarn',)),
+    ('TH-12', 'Nonthaburi', 'นนทบุรี', 'central', ()),
+    ('TH-13', 'Pathum Thani', 'ปทุมธานี', 'central', ()),
+    ('TH-14', 'Phra Nakhon Si Ayutthaya', 'พระนครศรีอยุธยา', 'central', ('Ayutthaya', 'อยุธยา')),
+    ('TH-15', 'Ang Thong', 'อ่างทอง', 'central', ()),
+    ('TH-16', 'Lop Buri', 'ลพบุรี', 'central', ()),
+    ('TH-17', 'Sing Buri', 'สิงห์บุรี', 'central', ()),
+    ('TH-18', 'Chai Nat', 'ชัยนาท', 'central', ()),
+    ('TH-19', 'Saraburi', 'สระบุรี', 'central', ()),
+    ('TH-20', 'Chon Buri', 'ชลบุรี', 'east', ()),
+    ('TH-21', 'Rayong', 'ระยอง', 'east', ()),
+    ('TH-22', 'Chanthaburi', 'จันทบุรี', 'east', ()),
+    ('TH-23', 'Trat', 'ตราด', 'east', ()),
+    ('TH-24', 'Chachoengsao', 'ฉะเชิงเทรา', 'east', ()),
+    ('TH-25', 'Prachin Buri', 'ปราจีนบุรี', 'east', ()),
+    ('TH-26', 'Nakhon Nayok', 'นครนายก', 'east', ()),
+    ('TH-27', 'Sa Kaeo', 'สระแก้ว', 'east', ('Sa Kaew',)),
+    ('TH-30', 'Nakhon Ratchasima', 'นครราชสีมา', 'northeast', ('Korat', 'โคราช')),
+    ('TH-31', 'Buri Ram', 'บุรีรัมย์', 'northeast', ()),
+    ('TH-32', 'Surin', 'สุรินทร์', 'northeast', ()),
+    ('TH-33', 'Si Sa Ket', 'ศรีสะเกษ', 'northeast', ()),
+    ('TH-34', 'Ubon Ratchathani', 'อุบลราชธานี', 'northeast', ()),
+    ('TH-35', 'Yasothon', 'ยโสธร', 'northeast', ()),
+    ('TH-36', 'Chaiyaphum', 'ชัยภูมิ', 'northeast', ()),
+    ('TH-37', 'Amnat Charoen', 'อำนาจเจริญ', 'northeast', ()),
+    ('TH-38', 'Bueng Kan', 'บึงกาฬ', 'northeast', ('Bung Kan',)),
+    ('TH-39', 'Nong Bua Lam Phu', 'หนองบัวลำภู', 'northeast', ()),
+    ('TH-40', 'Khon Kaen', 'ขอนแก่น', 'northeast', ()),
+    ('TH-41', 'Udon Thani', 'อุดรธานี', 'northeast', ()),
+    ('TH-42', 'Loei', 'เลย', 'northeast', ()),
+    ('TH-43', 'Nong Khai', 'หนองคาย', 'northeast', ()),
+    ('TH-44', 'Maha Sarakham', 'มหาสารคาม', 'northeast', ()),
+    ('TH-45', 'Roi Et', 'ร้อยเอ็ด', 'northeast', ()),
+    ('TH-46', 'Kalasin', 'กาฬสินธุ์', 'northeast', ()),
+    ('TH-47', 'Sakon Nakhon', 'สกลนคร', 'northeast', ()),
+    ('TH-48', 'Nakhon Phanom', 'นครพนม', 'northeast', ()),
+    ('TH-49', 'Mukdahan', 'มุกดาหาร', 'northeast', ()),
+    ('TH-50', 'Chiang Mai', 'เชียงใหม่', 'north', ()),
+    ('TH-51', 'Lamphun', 'ลำพูน', 'north', ()),
+    ('TH-52', 'Lampang', 'ลำปาง', 'north', ()),
+    ('TH-53', 'Uttaradit', 'อุตรดิตถ์', 'north', ()),
+    ('TH-54', 'Phrae', 'แพร่', 'north', ()),
+    ('TH-55', 'Nan', 'น่าน', 'north', ()),
+    ('TH-56', 'Phayao', 'พะเยา', 'north', ()),
+    ('TH-57', 'Chiang Rai', 'เชียงราย', 'north', ()),
+    ('TH-58', 'Mae Hong Son', 'แม่ฮ่องสอน', 'north', ()),
+    ('TH-60', 'Nakhon Sawan', 'นครสวรรค์', 'north', ()),
+    ('TH-61', 'Uthai Thani', 'อุทัยธานี', 'north', ()),
+    ('TH-62', 'Kamphaeng Phet', 'กำแพงเพชร', 'north', ()),
+    ('TH-63', 'Tak', 'ตาก', 'north', ()),
+    ('TH-64', 'Sukhothai', 'สุโขทัย', 'north', ()),
+    ('TH-65', 'Phitsanulok', 'พิษณุโลก', 'north', ()),
+    ('TH-66', 'Phichit', 'พิจิตร', 'north', ()),
+    ('TH-67', 'Phetchabun', 'เพชรบูรณ์', 'north', ()),
+    ('TH-70', 'Ratchaburi', 'ราชบุรี', 'central', ()),
+    ('TH-71', 'Kanchanaburi', 'กาญจนบุรี', 'central', ()),
+    ('TH-72', 'Suphan Buri', 'สุพรรณบุรี', 'central', ()),
+    ('TH-73', 'Nakhon Pathom', 'นครปฐม', 'central', ()),
+    ('TH-74', 'Samut Sakhon', 'สมุทรสาคร', 'central', ()),
+    ('TH-75', 'Samut Songkhram', 'สมุทรสงคราม', 'central', ()),
+    ('TH-76', 'Phetchaburi', 'เพชรบุรี', 'south_east', ('Phetburi',)),
+    ('TH-77', 'Prachuap Khiri Khan', 'ประจวบคีรีขันธ์', 'south_east', ()),
+    ('TH-80', 'Nakhon Si Thammarat', 'นครศรีธรรมราช', 'south_east', ()),
+    ('TH-81', 'Krabi', 'กระบี่', 'south_west', ()),
+    ('TH-82', 'Phangnga', 'พังงา', 'south_west', ()),
+    ('TH-83', 'Phuket', 'ภูเก็ต', 'south_west', ()),
+    ('TH-84', 'Surat Thani', 'สุราษฎร์ธานี', 'south_east', ()),
+    ('TH-85', 'Ranong', 'ระนอง', 'south_west', ()),
+    ('TH-86', 'Chumphon', 'ชุมพร', 'south_east', ()),
+    ('TH-90', 'Songkhla', 'สงขลา', 'south_east', ('Songkla',)),
+    ('TH-91', 'Satun', 'สตูล', 'south_west', ()),
+    ('TH-92', 'Trang', 'ตรัง', 'south_west', ()),
+    ('TH-93', 'Phatthalung', 'พัทลุง', 'south_east', ('Phattalung',)),
+    ('TH-94', 'Pattani', 'ปัตตานี', 'south_east', ()),
+    ('TH-95', 'Yala', 'ยะลา', 'south_east', ()),
+    ('TH-96', 'Narathiwat', 'นราธิวาส', 'south_east', ()),
+]
+
+# ชื่อภาคที่ใช้ในประกาศ: "ภาคใต้" ครอบคลุมทั้งสองฝั่ง; "ภาคตะวันออก" ต้องไม่ตามด้วย "เฉียงเหนือ"
+_REGION_PATTERNS = [
+    (re.compile('ภาคเหนือ'), ('north',)),
+    (re.compile('ภาคตะวันออกเฉียงเหนือ|ภาคอีสาน'), ('northeast',)),
+    (re.compile('ภาคกลาง'), ('central',)),
+    (re.compile('ภาคตะวันออก(?!เฉียงเหนือ)'), ('east',)),
+    (re.compile('ภาคใต้(?!ฝั่ง)'), ('south_east', 'south_west')),
+    (re.compile('ภาคใต้ฝั่งตะวันออก'), ('south_east',)),
+    (re.compile('ภาคใต้ฝั่งตะวันตก'), ('south_west',)),
+]
+
+FUZZY_CUTOFF = 0.85
+
+# ชื่อจังหวัดที่เป็นคำทั่วไปด้วย ("เลย", "ตากแดด", "แพร่กระจาย"/"เผยแพร่", "น่านน้ำ") จะนับเฉพาะเมื่อมี
+# "จังหวัด" หรือ "จ." นำหน้า หรืออยู่ในรายชื่อจังหวัดต่อจากชื่อจังหวัดอื่น (เช่น "จังหวัดน่าน แพร่ อุตรดิตถ์")
+AMBIGUOUS_THAI_NAMES = {'เลย', 'ตาก', 'แพร่', 'น่าน'}
+_LIST_GAP_RE = re.compile(r'\s*(,|และ)?\s*')
+
+_PREFIX_RE = re.compile(r'^(จังหวัด|จ\.|changwat|province of)\s*', re.IGNORECASE)
+_SUFFIX_RE = re.compile(r'\s+province$', re.IGNORECASE)
+
+
+def normalize_name(name):
+    """
+    Builds the lookup key of a province name: NFC, lower case, without
+    "province"/"จังหวัด" affixes, spaces, hyphens, dots or apostrophes.
+    """
+    if name is None:
+        return ''
+    key = unicodedata.normalize('NFC', str(name)).strip().lower()
+    key = _SUFFIX_RE.sub('', _PREFIX_RE.sub('', key))
+    return ''.join(ch for ch in key if ch.isalnum() or unicodedata.category(ch).startswith('M'))
+
+
+class ProvinceGazetteer:
+    """
+    Index of the 77 provinces: canonical ID -> English, Thai and GeoJSON/TMD name variants.
+    Lookups use a hash of the normalized name with a difflib fuzzy fallback; results are memoized.
+    """
+
+    def __init__(self, provinces=PROVINCES, fuzzy_cutoff=FUZZY_CUTOFF):
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.records = {}
+        self._index = {}
+        self._memo = {}
+
+        for code, name_en, name_th, region, variants in provinces:
+            self.records[code] = {'name_en': name_en, 'name_th': name_th, 'region': region}
+            for variant in (code, name_en, name_th) + tuple(variants):
+                self._index[normalize_name(variant)] = code
+
+        # Regex สำหรับค้นหาชื่อจังหวัดภาษาไทยในข้อความ (ชื่อยาวก่อน เพื่อไม่ให้ "นครปฐม" ถูกจับเป็นชื่อที่สั้นกว่า)
+        thai_names = sorted(
+            ((rec['name_th'], code) for code, rec in self.records.items()),
+            key=lambda item: len(item[0]), reverse=True
+        )
+        self._thai_code = dict(thai_names)
+        self._thai_re = re.compile(
+            r'(จังหวัด|จ\.)?\s*(' + '|'.join(re.escape(name) for name, _ in thai_names) + ')'
+        )
+
+    def lookup(self, name, fuzzy=True):
+        """Returns the canonical ID (e.g. 'TH-10') for any known spelling, or None."""
+        key = normalize_name(name)
+        if not key:
+            return None
+        if (key, fuzzy) in self._memo:
+            return self._memo[key, fuzzy]
+
+        code = self._index.get(key)
+        if code is None and fuzzy:
+            close = difflib.get_close_matches(key, self._index.keys(), n=1, cutoff=self.fuzzy_cutoff)
+            code = self._index[close[0]] if close else None
+
+        self._memo[key, fuzzy] = code
+        return code
+
+    def name_en(self, code):
+        return self.records[code]['name_en'] if code in self.records else None
+
+    def name_th(self, code):
+        return self.records[code]['name_th'] if code in self.records else None
+
+    def region(self, code):
+        return self.records[code]['region'] if code in self.records else None
+
+    def codes_in_region(self, region):
+        """Returns the IDs of a region given its key ('north') or Thai label ('ภาคเหนือ')."""
+        key = next((k for k, label in REGION_THAI.items() if region in (k, label)), region)
+        return [code for code, rec in self.records.items() if rec['region'] == key]
+
+    def find_in_text(self, text):
+        """Returns the IDs of all Thai province names mentioned in text, in order of appearance."""
+        if not text:
+            return []
+        codes = []
+        previous_end = None
+        for match in self._thai_re.finditer(text):
+            prefix, name = match.groups()
+            if name in AMBIGUOUS_THAI_NAMES and prefix is None:
+                in_list = previous_end is not None and _LIST_GAP_RE.fullmatch(text, previous_end, match.start(2))
+                if not in_list or self._continues_word(text, match.end()):
+                    continue
+            previous_end = match.end()
+            code = self._thai_code[name]
+            if code not in codes:
+                codes.append(code)
+        return codes
+
+    def _continues_word(self, text, end):
+        # ภาษาไทยไม่เว้นวรรคระหว่างคำ: ถ้าตามด้วยอักษรไทยที่ไม่ใช่ "และ" หรือชื่อจังหวัดถัดไป แสดงว่าเป็นส่วนหนึ่งของคำอื่น
+        # (เช่น "แพร่กระจาย")
+        if end >= len(text) or not '\u0e00' <= text[end] <= '\u0e7f':
+            return False
+        return not (text.startswith('และ', end) or self._thai_re.match(text, end))
+
+    def regions_in_text(self, text):
+        """
+        Returns the region keys mentioned in text, either by name ("ภาคเหนือ", "ภาคใต้")
+        or through the provinces it mentions.
+        """
+        if not text:
+            return []
+        regions = [key for pattern, keys in _REGION_PATTERNS for key in keys if pattern.search(text)]
+        regions += [self.records[code]['region'] for code in self.find_in_text(text)]
+        return list(dict.fromkeys(regions))
+
+    def codes_for(self, names, fuzzy=True):
+        """
+        Maps a Series of names to canonical IDs in O(n): every distinct spelling is looked up once,
+        then the result is broadcast back with a hash map.
+        """
+        names = pd.Series(names)
+        unique = pd.unique(names.dropna())
+        mapping = {name: self.lookup(name, fuzzy=fuzzy) for name in unique}
+        return names.map(mapping)
+
+
+_GAZETTEER = None
+
+
+def get_gazetteer():
+    """Returns the shared ProvinceGazetteer instance (built on first use)."""
+    global _GAZETTEER
+    if _GAZETTEER is None:
+        _GAZETTEER = ProvinceGazetteer()
+    return _GAZETTEER
+
+
+def align_province_names(df, column, target_names, fuzzy=True):
+    """
+    Rewrites df[column] to the spelling used in target_names (e.g. GeoJSON NAME_1) via canonical IDs
+    and reports every name that could not be matched instead of silently dropping it.
+    """
+    gazetteer = get_gazetteer()
+    target_names = pd.Series(target_names).dropna().unique()
+    target_by_code = {}
+    for name in target_names:
+        code = gazetteer.lookup(name, fuzzy=fuzzy)
+        if code is not None:
+            target_by_code.setdefault(code, name)
+
+    codes = gazetteer.codes_for(df[column], fuzzy=fuzzy)
+    aligned = df.copy()
+    aligned[column] = codes.map(target_by_code).fillna(df[column]).to_numpy()
+    aligned['province_id'] = codes.to_numpy()
+
+    target_set = set(target_names)
+    unmatched_source = sorted(set(aligned.loc[~aligned[column].isin(target_set), column].dropna()))
+    unmatched_target = sorted(target_set - set(aligned[column].dropna()))
+    if unmatched_source:
+        print(f"Unmatched province names in data ({len(unmatched_source)}): {', '.join(map(str, unmatched_source))}")
+    if unmatched_target:
+        print(f"Provinces without data ({len(unmatched_target)}): {', '.join(map(str, unmatched_target))}")
+
+    return aligned
@@ -0,0 +1,97 @@
+import os
+import pandas as pd
+import geopandas as gpd
+import shapely
+from shapely.geometry import box
+
+PROVINCE_GEOJSON_URL = "https://raw.githubusercontent.com/cvibhagool/thailand-map/master/thailand-provinces.geojson"
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "geometry_cache")
+
+# ค่า Tolerance (องศา) ที่เตรียมไว้ล่วงหน้า: 0 = ความละเอียดเต็ม
+SIMPLIFY_TOLERANCES = (0.0, 0.001, 0.005, 0.01)
+DEFAULT_TOLERANCE = 0.001
+
+
+def _cache_path(cache_dir, layer, tolerance):
+    return os.path.join(cache_dir, f"{layer}_tol{tolerance:g}.parquet")
+
+
+def simplify_provinces(gdf, tolerance):
+    """
+    Simplifies the province polygons while keeping shared borders identical,
+    so neighbouring provinces never open gaps or overlap after simplification.
+    """
+    if tolerance <= 0:
+        return gdf.copy()
+
+    simplified = gdf.copy()
+    if hasattr(shapely, "coverage_simplify"):
+        # Shapely >= 2.1: simplify the whole coverage at once (shared edges simplified together)
+        simplified.geometry = shapely.coverage_simplify(gdf.geometry.values, tolerance)
+    else:
+        simplified.geometry = gdf.geometry.simplify(tolerance, preserve_topology=True)
+    return simplified
+
+
+def build_inverse_mask(outline):
+    """Returns the world box with the country outline cut out."""
+    world_box = box(-180, -90, 180, 90)
+    return world_box.difference(outline)
+
+
+def build_geometry_cache(source=None, cache_dir=None, tolerances=SIMPLIFY_TOLERANCES):
+    """
+    Downloads the province layer once and stores, for every tolerance, the simplified
+    provinces, the dissolved outline and the inverse mask as GeoParquet files.
+    source and cache_dir default to PROVINCE_GEOJSON_URL and CACHE_DIR (read at call time).
+    """
+    source = source or PROVINCE_GEOJSON_URL
+    cache_dir = cache_dir or CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+
+    print(f"Building province geometry cache from {source} ...")
+    gdf = gpd.read_file(source)
+
+    for tolerance in tolerances:
+        provinces = simplify_provinces(gdf, tolerance)
+        # รวมโพลีกอนจังหวัดทั้งหมดเพียงครั้งเดียว แล้วเก็บทั้ง Outline และ Mask ไว้ใน Cache
+        outline = shapely.union_all(provinces.geometry.values)
+        mask_geom = build_inverse_mask(outline)
+
+        provinces.to_parquet(_cache_path(cache_dir, "provinces", tolerance))
+        gpd.GeoDataFrame(geometry=[outline], crs=gdf.crs).to_parquet(_cache_path(cache_dir, "outline", tolerance))
+        gpd.GeoDataFrame(geometry=[mask_geom], crs=gdf.crs).to_parquet(_cache_path(cache_dir, "mask", tolerance))
+
+    print(f"Geometry cache written to '{cache_dir}'")
+
+
+def load_province_geometry(tolerance=DEFAULT_TOLERANCE, cache_dir=None, source=None):
+    """
+    Loads (provinces GeoDataFrame, outline geometry, inverse mask geometry) from the local cache.
+    The cache is built on first use; later map builds need no network and no polygon union.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    paths = [_cache_path(cache_dir, layer, tolerance) for layer in ("provinces", "outline", "mask")]
+
+    if not all(os.path.exists(path) for path in paths):
+        tolerances = sorted(set(SIMPLIFY_TOLERANCES) | {tolerance})
+        build_geometry_cache(source=source, cache_dir=cache_dir, tolerances=tolerances)
+
+    provinces = gpd.read_parquet(paths[0])
+    outline = gpd.read_parquet(paths[1]).geometry.iloc[0]
+    mask_geom = gpd.read_parquet(paths[2]).geometry.iloc[0]
+    return provinces, outline, mask_geom
+
+
+def load_province_names(tolerance=DEFAULT_TOLERANCE, cache_dir=None, source=None):
+    """Loads only the NAME_1 column of the cached provinces (no geometry decoding)."""
+    cache_dir = cache_dir or CACHE_DIR
+    path = _cache_path(cache_dir, "provinces", tolerance)
+    if not os.path.exists(path):
+        return load_province_geometry(tolerance, cache_dir, source)[0]['NAME_1']
+    return pd.read_parquet(path, columns=['NAME_1'])['NAME_1']
+
+
+if __name__ == "__main__":
+    # สร้าง (หรือสร้างใหม่) Cache ของเรขาคณิตจังหวัดทุกระดับ Tolerance
+    build_geometry_cache()
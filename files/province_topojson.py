@@ -0,0 +1,297 @@
+import os
+import glob
+import json
+import hashlib
+import math
+from branca.element import MacroElement, Element
+from jinja2 import Template
+from map_templates import add_data_slot
+
+# Blue (Cool) -> Red (Hot) เหมือน Colormap ของ No.8.py
+TEMP_COLORS = ['#4575b4', '#91bfdb', '#fee090', '#fc8d59', '#d73027']
+DATA_COLUMNS = ['date', 'max_temp', 'min_temp', 'wind_speed', 'desc']
+QUANTIZATION = 1e5
+TOPOJSON_CLIENT_URL = "https://cdn.jsdelivr.net/npm/topojson-client@3/dist/topojson-client.min.js"
+
+
+def geometry_key(gdf, quantization=QUANTIZATION):
+    """Short hash of the province names, geometries and quantization that the TopoJSON file is built from."""
+    digest = hashlib.sha1(f"{quantization:g}".encode())
+    for name, wkb in zip(gdf['NAME_1'], gdf.geometry.to_wkb()):
+        digest.update(str(name).encode('utf-8'))
+        digest.update(wkb)
+    return digest.hexdigest()[:12]
+
+
+def sidecar_paths(output_file, tolerance, gdf=None):
+    """
+    Returns the (geometry, data) script paths stored next to output_file.
+    The geometry file name carries the tolerance and, when gdf is given, a hash of its geometry, so a
+    different simplification or a rebuilt geometry cache never reuses a stale file.
+    """
+    stem = os.path.splitext(output_file)[0]
+    key = f"_{geometry_key(gdf)}" if gdf is not None else ""
+    return f"{stem}_geometry_tol{tolerance:g}{key}.js", f"{stem}_data.js"
+
+
+def province_topology_json(gdf, quantization=QUANTIZATION):
+    """
+    Returns the province polygons as quantized TopoJSON text (shared borders stored once as arcs).
+    Only NAME_1 is kept as a property; all weather values live in the separate data table.
+    """
+    try:
+        import topojson as tp
+    except ImportError:
+        raise ImportError("TopoJSON output requires the 'topojson' package (pip install topojson)")
+
+    topology = tp.Topology(gdf[['NAME_1', 'geometry']], prequantize=quantization, object_name='provinces')
+    return topology.to_json()
+
+
+def write_province_topology(gdf, path, quantization=QUANTIZATION):
+    """Writes the quantized TopoJSON geometry as a script setting window.PROVINCE_TOPOLOGY."""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("window.PROVINCE_TOPOLOGY = ")
+        f.write(province_topology_json(gdf, quantization))
+        f.write(";\n")
+
+
+def temperature_scale(values, default=(20, 40)):
+    """Returns (min, max) of the valid (> 0) temperatures, or the default range."""
+    valid = [v for v in values if v is not None and not math.isnan(v) and v > 0]
+    if not valid:
+        return default
+    return min(valid), max(valid)
+
+
+def _json_values(values):
+    return [None if isinstance(v, float) and math.isnan(v) else v for v in values]
+
+
+def _write_table(table, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("window.PROVINCE_WEATHER = ")
+        json.dump(table, f, ensure_ascii=False, separators=(',', ':'))
+        f.write(";\n")
+
+
+def province_data_table(weather_df, names=None, columns=DATA_COLUMNS):
+    """
+    Returns the compact per-province data table keyed by NAME_1 (the window.PROVINCE_WEATHER object)
+    and its temperature scale.
+    """
+    df = weather_df
+    if names is not None:
+        df = df[df['province_en'].isin(set(names))]
+
+    rows = {
+        name: _json_values(values)
+        for name, *values in zip(df['province_en'], *(df[c].tolist() for c in columns))
+    }
+    vmin, vmax = temperature_scale(df['max_temp'].tolist())
+
+    table = {
+        'columns': columns,
+        'scale': [vmin, vmax],
+        'colors': TEMP_COLORS,
+        'rows': rows
+    }
+    return table, (vmin, vmax)
+
+
+def write_province_data_table(weather_df, path, names=None, columns=DATA_COLUMNS):
+    """
+    Writes the compact per-province data table keyed by NAME_1.
+    Refreshing the weather values only needs to rewrite this small file.
+    """
+    table, scale = province_data_table(weather_df, names, columns)
+    _write_table(table, path)
+    return scale
+
+
+def write_forecast_data_table(forecast_wide, path, names=None, columns=DATA_COLUMNS):
+    """
+    Writes a multi-day data table: rows[NAME_1][day] holds the values of one forecast date.
+    The color scale spans all days so colors stay comparable while moving the time slider.
+    """
+    df = forecast_wide
+    if names is not None:
+        df = df[df['province_en'].isin(set(names))]
+
+    dates = sorted(df['date'].unique().tolist())
+    day_index = {d: i for i, d in enumerate(dates)}
+    empty_day = [None] * len(columns)
+
+    rows = {}
+    for name, date, *values in zip(df['province_en'], df['date'], *(df[c].tolist() for c in columns)):
+        days = rows.setdefault(name, [empty_day] * len(dates))
+        days[day_index[date]] = _json_values(values)
+
+    vmin, vmax = temperature_scale(df['max_temp'].tolist())
+
+    _write_table({
+        'columns': columns,
+        'dates': dates,
+        'scale': [vmin, vmax],
+        'colors': TEMP_COLORS,
+        'rows': rows
+    }, path)
+    return vmin, vmax
+
+
+class TopoJsonChoropleth(MacroElement):
+    """
+    Choropleth layer built client-side from window.PROVINCE_TOPOLOGY and window.PROVINCE_WEATHER.
+    Colors and the legend are computed in the browser from the data table.
+    For multi-day tables a time slider restyles the same geometry layer for each date.
+    """
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        (function() {
+            var map = {{ this._parent.get_name() }};
+            var topo = window.PROVINCE_TOPOLOGY;
+            var table = window.PROVINCE_WEATHER;
+            var col = {};
+            table.columns.forEach(function(c, i) { col[c] = i; });
+
+            function hexToRgb(h) {
+                return [parseInt(h.substr(1, 2), 16), parseInt(h.substr(3, 2), 16), parseInt(h.substr(5, 2), 16)];
+            }
+            var stops = table.colors.map(hexToRgb);
+
+            function tempColor(t) {
+                var lo = table.scale[0], hi = table.scale[1];
+                var x = hi > lo ? Math.min(1, Math.max(0, (t - lo) / (hi - lo))) : 0;
+                var pos = x * (stops.length - 1);
+                var i = Math.min(stops.length - 2, Math.floor(pos));
+                var f = pos - i;
+                var rgb = stops[i].map(function(v, k) { return Math.round(v + (stops[i + 1][k] - v) * f); });
+                return 'rgb(' + rgb.join(',') + ')';
+            }
+
+            var day = 0;
+            function value(name, key) {
+                var row = table.rows[name];
+                if (row && table.dates) { row = row[day]; }
+                return row ? row[col[key]] : null;
+            }
+
+            function style(feature) {
+                var temp = value(feature.properties.NAME_1, 'max_temp');
+                return {
+                    fillColor: temp > 0 ? tempColor(temp) : '#d9d9d9',
+                    color: 'black',
+                    weight: 0.5,
+                    fillOpacity: 0.6
+                };
+            }
+
+            var provinces = topojson.feature(topo, topo.objects.provinces);
+            var layer = L.geoJson(provinces, {
+                style: style,
+                onEachFeature: function(feature, layer) {
+                    var name = feature.properties.NAME_1;
+                    layer.bindTooltip('<b>Province:</b> ' + name);
+                    layer.bindPopup(function() {
+                        var fmt = function(key) { var v = value(name, key); return v === null ? 'N/A' : v; };
+                        return '<table>' +
+                            '<tr><th>Province</th><td>' + name + '</td></tr>' +
+                            '<tr><th>Date</th><td>' + fmt('date') + '</td></tr>' +
+                            '<tr><th>Max Temp (°C)</th><td>' + fmt('max_temp') + '</td></tr>' +
+                            '<tr><th>Min Temp (°C)</th><td>' + fmt('min_temp') + '</td></tr>' +
+                            '<tr><th>Wind</th><td>' + fmt('wind_speed') + '</td></tr>' +
+                            '<tr><th>Weather</th><td>' + fmt('desc') + '</td></tr>' +
+                            '</table>';
+                    });
+                }
+            }).addTo(map);
+
+            var legend = L.control({position: 'topright'});
+            legend.onAdd = function() {
+                var div = L.DomUtil.create('div', 'legend');
+                div.style.background = 'rgba(255, 255, 255, 0.8)';
+                div.style.padding = '5px';
+                div.innerHTML = '<div><b>Max Temperature (°C)</b></div>' +
+                    '<div style="width: 200px; height: 10px; background: linear-gradient(to right, ' + table.colors.join(',') + ');"></div>' +
+                    '<div style="display: flex; justify-content: space-between;"><span>' +
+                    table.scale[0] + '</span><span>' + table.scale[1] + '</span></div>';
+                return div;
+            };
+            legend.addTo(map);
+
+            if (table.dates && table.dates.length > 1) {
+                var slider = L.control({position: 'bottomleft'});
+                slider.onAdd = function() {
+                    var div = L.DomUtil.create('div', 'legend');
+                    div.style.background = 'rgba(255, 255, 255, 0.8)';
+                    div.style.padding = '5px';
+                    div.innerHTML = '<b>Forecast Date: <span></span></b><br>' +
+                        '<input type="range" min="0" max="' + (table.dates.length - 1) + '" value="0" step="1" style="width: 250px;">';
+                    var label = div.querySelector('span');
+                    var input = div.querySelector('input');
+                    label.textContent = table.dates[0];
+                    L.DomEvent.disableClickPropagation(div);
+                    input.addEventListener('input', function() {
+                        day = parseInt(input.value, 10);
+                        label.textContent = table.dates[day];
+                        // ใช้ Geometry ชุดเดิม เปลี่ยนเฉพาะสีตามวันที่เลือก
+                        layer.setStyle(style);
+                    });
+                    return div;
+                };
+                slider.addTo(map);
+            }
+        })();
+        {% endmacro %}
+    """)
+
+    def __init__(self):
+        super().__init__()
+        self._name = "TopoJsonChoropleth"
+
+
+def add_topojson_choropleth(m, gdf, weather_df, output_file, tolerance, multi_day=False):
+    """
+    Writes the geometry (only if no file for this geometry exists yet; older geometry files of the page are
+    removed) and the data table next to output_file, links both into the page header and adds the
+    client-side choropleth layer.
+    With multi_day=True weather_df holds one row per province and date and a time slider is added.
+    Returns the temperature scale of the data table.
+    """
+    geometry_path, data_path = sidecar_paths(output_file, tolerance, gdf)
+
+    if not os.path.exists(geometry_path):
+        print(f"Writing quantized TopoJSON geometry to '{geometry_path}'...")
+        write_province_topology(gdf, geometry_path)
+        # ไฟล์ Geometry รุ่นก่อนของหน้านี้ (Tolerance หรือ Hash อื่น) ไม่มีหน้าใดอ้างถึงแล้ว
+        stem = os.path.splitext(output_file)[0]
+        for old_path in glob.glob(f"{glob.escape(stem)}_geometry_tol*.js"):
+            if old_path != geometry_path:
+                os.remove(old_path)
+
+    if multi_day:
+        scale = write_forecast_data_table(weather_df, data_path, names=gdf['NAME_1'])
+    else:
+        scale = write_province_data_table(weather_df, data_path, names=gdf['NAME_1'])
+
+    # โหลด Geometry และ Data Table เป็น <script> แยกไฟล์ (ใช้ได้ทั้งผ่าน Web Server และ file://)
+    header = m.get_root().header
+    header.add_child(Element(f'<script src="{TOPOJSON_CLIENT_URL}"></script>'))
+    header.add_child(Element(f'<script src="{os.path.basename(geometry_path)}"></script>'))
+    header.add_child(Element(f'<script src="{os.path.basename(data_path)}"></script>'))
+
+    TopoJsonChoropleth().add_to(m)
+    return scale
+
+
+def add_templated_choropleth(m, gdf):
+    """
+    Builds the static part of a template-mode choropleth: the TopoJSON geometry is embedded in the page,
+    window.PROVINCE_WEATHER is left as a data slot filled by map_templates.inject_data.
+    """
+    header = m.get_root().header
+    header.add_child(Element(f'<script src="{TOPOJSON_CLIENT_URL}"></script>'))
+    header.add_child(Element(f'<script>window.PROVINCE_TOPOLOGY = {province_topology_json(gdf)};</script>'))
+    add_data_slot(m, 'PROVINCE_WEATHER')
+
+    TopoJsonChoropleth().add_to(m)
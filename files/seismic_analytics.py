@@ -0,0 +1,228 @@
+import argparse
+import glob
+import json
+import os
+import numpy as np
+import pandas as pd
+
+THAI_TZ = "Asia/Bangkok"
+ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "seismic_archive")
+
+MAGNITUDE_BIN = 0.1 # TMD รายงาน Magnitude ทศนิยมหนึ่งตำแหน่ง
+MIN_EVENTS_FOR_B_VALUE = 50
+EVENT_KEY = ['datetime', 'lat', 'lon', 'mag'] # ใช้ตัดเหตุการณ์ซ้ำเมื่อบันทึกลง Archive
+
+
+def parse_thai_datetime(values):
+    """Parses DateTimeThai strings into timezone-aware Asia/Bangkok timestamps (NaT when unparseable)."""
+    parsed = pd.to_datetime(pd.Series(values, dtype=object), errors='coerce', format='mixed')
+    if parsed.dt.tz is not None:
+        return parsed.dt.tz_convert(THAI_TZ)
+    return parsed.dt.tz_localize(THAI_TZ)
+
+
+def seismic_energy(mag):
+    """Radiated energy in joules from magnitude (Gutenberg-Richter: log10 E = 1.5 M + 4.8)."""
+    return np.power(10.0, 1.5 * np.asarray(mag, dtype=float) + 4.8)
+
+
+def _region_key(df):
+    # รหัสจังหวัดเมื่อเหตุการณ์อยู่ในประเทศไทย มิฉะนั้นใช้ข้อความ OriginThai (เช่น 'ประเทศเมียนมา')
+    if 'province_id' in df:
+        return df['province_id'].fillna(df['region'])
+    return df['region']
+
+
+# --- 1. IN-MEMORY ANALYTICS (seismic DataFrame from get_seismic_data) ---
+def daily_counts(df):
+    """Events per Thai calendar day: count, max magnitude and total energy."""
+    day = df['datetime'].dt.floor('D')
+    return (
+        df.assign(day=day, energy=seismic_energy(df['mag']))
+        .groupby('day')
+        .agg(count=('mag', 'size'), max_mag=('mag', 'max'), energy=('energy', 'sum'))
+    )
+
+
+def rolling_energy(df, window='24h'):
+    """Energy released in the trailing time window at every event (time-based rolling sum)."""
+    events = df.dropna(subset=['datetime']).sort_values('datetime')
+    energy = pd.Series(seismic_energy(events['mag']), index=events['datetime'])
+    return energy.rolling(window).sum().rename('rolling_energy')
+
+
+def magnitude_histogram(mags, bin_width=MAGNITUDE_BIN):
+    """Counts per magnitude bin (index: bin value rounded to bin_width)."""
+    bins = np.round(np.round(np.asarray(mags, dtype=float) / bin_width) * bin_width, 6)
+    values, counts = np.unique(bins[~np.isnan(bins)], return_counts=True)
+    return pd.Series(counts, index=values, name='count')
+
+
+def b_value_from_histogram(histogram, mc=None, bin_width=MAGNITUDE_BIN):
+    """
+    Gutenberg-Richter b-value by Aki's maximum-likelihood estimator on binned magnitudes:
+    b = log10(e) / (mean(M) - (Mc - bin_width / 2)), with the Shi & Bolt (1982) standard error.
+    Mc defaults to the maximum-curvature estimate (the most populated bin).
+    Returns a dict with b, a, mc, n and b_error (b is NaN with fewer than MIN_EVENTS_FOR_B_VALUE events).
+    """
+    histogram = histogram.sort_index()
+    if mc is None:
+        mc = float(histogram.idxmax()) if not histogram.empty else np.nan
+
+    complete = histogram[histogram.index >= mc - 1e-9]
+    n = int(complete.sum())
+    result = {'b': np.nan, 'a': np.nan, 'mc': mc, 'n': n, 'b_error': np.nan}
+    if n < MIN_EVENTS_FOR_B_VALUE:
+        return result
+
+    mags = complete.index.to_numpy(dtype=float)
+    weights = complete.to_numpy(dtype=float)
+    mean_mag = np.average(mags, weights=weights)
+    b = np.log10(np.e) / (mean_mag - (mc - bin_width / 2))
+    variance = np.sum(weights * (mags - mean_mag) ** 2) / (n * (n - 1))
+
+    result.update(b=b, a=np.log10(n) + b * mc, b_error=2.3 * b ** 2 * np.sqrt(variance))
+    return result
+
+
+def b_value(mags, mc=None, bin_width=MAGNITUDE_BIN):
+    """b-value of a magnitude array (see b_value_from_histogram)."""
+    return b_value_from_histogram(magnitude_histogram(mags, bin_width), mc, bin_width)
+
+
+def _region_partials(df):
+    """Per-region sums that can be added across partitions."""
+    depth = pd.to_numeric(df['depth'], errors='coerce')
+    return (
+        df.assign(key=_region_key(df), energy=seismic_energy(df['mag']),
+                  depth_sum=depth.fillna(0), depth_n=depth.notna().astype(int))
+        .groupby('key')
+        .agg(count=('mag', 'size'), max_mag=('mag', 'max'), energy=('energy', 'sum'),
+             depth_sum=('depth_sum', 'sum'), depth_n=('depth_n', 'sum'))
+    )
+
+
+def _finish_regions(partials):
+    regions = partials.copy()
+    regions['mean_depth'] = regions['depth_sum'] / regions['depth_n'].replace(0, np.nan)
+    regions.index.name = 'region'
+    return regions.drop(columns=['depth_sum', 'depth_n']).sort_values('count', ascending=False)
+
+
+def region_summary(df):
+    """Per-region (province code, or OriginThai outside Thailand) count, max magnitude, energy and mean depth."""
+    return _finish_regions(_region_partials(df))
+
+
+# --- 2. ARCHIVE PARTITIONS (one Parquet file per Thai calendar day) ---
+def _partition_path(archive_dir, day):
+    return os.path.join(archive_dir, f"events_{day:%Y-%m-%d}.parquet")
+
+
+def archive_events(df, archive_dir=ARCHIVE_DIR):
+    """
+    Adds events to the daily Parquet partitions (deduplicated on time, location and magnitude).
+    Only the partitions that receive events are rewritten. Returns the number of partitions touched.
+    """
+    events = df.dropna(subset=['datetime'])
+    if events.empty:
+        return 0
+    os.makedirs(archive_dir, exist_ok=True)
+
+    touched = 0
+    for day, part in events.groupby(events['datetime'].dt.floor('D')):
+        path = _partition_path(archive_dir, day)
+        if os.path.exists(path):
+            part = pd.concat([pd.read_parquet(path), part], ignore_index=True)
+        part = part.drop_duplicates(subset=EVENT_KEY).sort_values('datetime')
+        part.to_parquet(path, index=False)
+        touched += 1
+    return touched
+
+
+def partition_summary(path):
+    """
+    Combinable summary of one partition (counts, energy, per-region sums, magnitude histogram).
+    Cached next to the partition and recomputed only when the Parquet file changes.
+    """
+    cache_path = path + ".summary.json"
+    stamp = os.stat(path).st_mtime_ns
+    if os.path.exists(cache_path):
+        with open(cache_path, encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get('source_mtime_ns') == stamp:
+            return cached
+
+    df = pd.read_parquet(path)
+    histogram = magnitude_histogram(df['mag'])
+    summary = {
+        'source_mtime_ns': stamp,
+        'daily': daily_counts(df).reset_index().assign(day=lambda d: d['day'].astype(str)).to_dict('list'),
+        'regions': _region_partials(df).reset_index().to_dict('list'),
+        'histogram': {'mag': histogram.index.tolist(), 'count': histogram.tolist()},
+    }
+    with open(cache_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False)
+    return summary
+
+
+def summarize_archive(start=None, end=None, archive_dir=ARCHIVE_DIR, mc=None, energy_window=7):
+    """
+    Combines the cached partition summaries between start and end (Thai dates, inclusive).
+    Returns {'daily', 'regions', 'b_value', 'partitions'}; daily has a rolling energy sum over energy_window days.
+    """
+    paths = sorted(glob.glob(os.path.join(archive_dir, "events_*.parquet")))
+    days = pd.to_datetime([os.path.basename(p)[7:17] for p in paths])
+    selected = [
+        p for p, day in zip(paths, days)
+        if (start is None or day >= pd.Timestamp(start)) and (end is None or day <= pd.Timestamp(end))
+    ]
+    summaries = [partition_summary(p) for p in selected]
+    if not summaries:
+        return {'daily': pd.DataFrame(), 'regions': pd.DataFrame(), 'b_value': b_value([]), 'partitions': 0}
+
+    daily = pd.concat([pd.DataFrame(s['daily']) for s in summaries], ignore_index=True)
+    daily['day'] = pd.to_datetime(daily['day']).dt.tz_convert(THAI_TZ)
+    daily = daily.set_index('day').sort_index()
+    daily['rolling_energy'] = daily['energy'].rolling(energy_window, min_periods=1).sum()
+
+    partials = pd.concat([pd.DataFrame(s['regions']) for s in summaries], ignore_index=True)
+    regions = _finish_regions(partials.groupby('key').agg(
+        count=('count', 'sum'), max_mag=('max_mag', 'max'), energy=('energy', 'sum'),
+        depth_sum=('depth_sum', 'sum'), depth_n=('depth_n', 'sum')
+    ))
+
+    histogram = pd.concat([
+        pd.Series(s['histogram']['count'], index=s['histogram']['mag'], dtype=float) for s in summaries
+    ]).groupby(level=0).sum()
+
+    return {
+        'daily': daily,
+        'regions': regions,
+        'b_value': b_value_from_histogram(histogram, mc),
+        'partitions': len(summaries),
+    }
+
+
+if __name__ == "__main__":
+    from DailyEarthquakes import get_seismic_data
+
+    parser = argparse.ArgumentParser(description="Seismic analytics over the daily TMD feed and its archive")
+    parser.add_argument("--since", help="first Thai date (YYYY-MM-DD) of the archive summary")
+    parser.add_argument("--until", help="last Thai date (YYYY-MM-DD) of the archive summary")
+    parser.add_argument("--mc", type=float, help="magnitude of completeness (default: maximum curvature)")
+    args = parser.parse_args()
+
+    df = get_seismic_data()
+    if not df.empty:
+        print(f"Archived today's feed into {archive_events(df)} partition(s).")
+
+    result = summarize_archive(args.since, args.until, mc=args.mc)
+    print(f"\n{result['partitions']} partition(s) summarized")
+    if result['partitions']:
+        print("\n--- Daily counts ---")
+        print(result['daily'].to_string())
+        print("\n--- Regions ---")
+        print(result['regions'].head(20).to_string())
+        b = result['b_value']
+        print(f"\nb-value: {b['b']:.2f} ± {b['b_error']:.2f} (a = {b['a']:.2f}, Mc = {b['mc']}, N = {b['n']})")
@@ -0,0 +1,184 @@
+import os
+import glob
+import json
+import numpy as np
+import pandas as pd
+from branca.element import MacroElement
+from jinja2 import Template
+
+# ช่วง Zoom ที่คำนวณ Cluster ไว้ล่วงหน้า และขนาดช่องกริด (pixel) ต่อ Cluster
+MIN_ZOOM = 3
+MAX_ZOOM = 12
+CELL_SIZE_PX = 60
+TILE_SIZE_PX = 256
+
+
+def project_mercator(lat, lon):
+    """
+    Projects lat/lon arrays to normalized Web Mercator coordinates in the range [0, 1).
+    """
+    lat = np.clip(np.asarray(lat, dtype=float), -85.0511, 85.0511)
+    lon = np.asarray(lon, dtype=float)
+    x = (lon + 180.0) / 360.0
+    sin_lat = np.sin(np.radians(lat))
+    y = 0.5 - np.log((1 + sin_lat) / (1 - sin_lat)) / (4 * np.pi)
+    return x, y
+
+
+def precompute_clusters(df, min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM, cell_size=CELL_SIZE_PX):
+    """
+    Aggregates events into grid clusters for every zoom level between min_zoom and max_zoom.
+    Level max_zoom + 1 holds every event on its own (count 1), so events closer than one grid cell at
+    max_zoom can still be zoomed apart and clicked individually.
+    Returns a dict {zoom: DataFrame(lat, lon, count, max_mag, mean_depth)}.
+    """
+    if df.empty:
+        return {}
+
+    x, y = project_mercator(df['lat'], df['lon'])
+    base = pd.DataFrame({
+        'lat': df['lat'].to_numpy(dtype=float),
+        'lon': df['lon'].to_numpy(dtype=float),
+        'mag': df['mag'].to_numpy(dtype=float),
+        # Depth เป็นข้อความจาก XML จึงแปลงเป็นตัวเลขแบบ vectorized ก่อนหาค่าเฉลี่ย
+        'depth': pd.to_numeric(df['depth'], errors='coerce').to_numpy(dtype=float)
+    })
+
+    clusters = {}
+    for zoom in range(min_zoom, max_zoom + 1):
+        scale = TILE_SIZE_PX * (2 ** zoom) / cell_size
+        base['cx'] = np.floor(x * scale).astype(np.int64)
+        base['cy'] = np.floor(y * scale).astype(np.int64)
+
+        agg = base.groupby(['cx', 'cy'], sort=False).agg(
+            lat=('lat', 'mean'),
+            lon=('lon', 'mean'),
+            count=('mag', 'size'),
+            max_mag=('mag', 'max'),
+            mean_depth=('depth', 'mean')
+        ).reset_index(drop=True)
+        clusters[zoom] = agg
+
+    # ระดับสูงสุด: แสดงทุกเหตุการณ์แยกกัน ไม่รวม Cluster
+    clusters[max_zoom + 1] = pd.DataFrame({
+        'lat': base['lat'], 'lon': base['lon'], 'count': 1,
+        'max_mag': base['mag'], 'mean_depth': base['depth']
+    })
+    return clusters
+
+
+def write_cluster_files(clusters, colormap, out_dir):
+    """
+    Writes one small JavaScript data file per zoom level (z<zoom>.js) into out_dir.
+    Each row is [lat, lon, count, max_mag, mean_depth, color].
+    Script files (not fetch) are used so the map also works when opened via file://.
+    Files of zoom levels that are no longer written (e.g. from an earlier, larger range) are removed.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(glob.escape(out_dir), "z*.js")):
+        if os.path.basename(path)[1:-3] not in {str(zoom) for zoom in clusters}:
+            os.remove(path)
+
+    for zoom, agg in clusters.items():
+        # เรียก colormap เฉพาะค่า Magnitude ที่ไม่ซ้ำกัน
+        unique_mags, inverse = np.unique(agg['max_mag'].to_numpy(), return_inverse=True)
+        palette = np.array([colormap(v) for v in unique_mags], dtype=object)
+
+        rows = [
+            [round(lat, 4), round(lon, 4), count, max_mag,
+             None if np.isnan(depth) else round(depth, 1), color]
+            for lat, lon, count, max_mag, depth, color in zip(
+                agg['lat'].tolist(), agg['lon'].tolist(), agg['count'].tolist(),
+                agg['max_mag'].tolist(), agg['mean_depth'].tolist(),
+                palette[inverse.ravel()].tolist()
+            )
+        ]
+
+        path = os.path.join(out_dir, f"z{zoom}.js")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"window.seismicClusters.receive({zoom}, ")
+            json.dump(rows, f, separators=(',', ':'))
+            f.write(");\n")
+
+
+class PreclusteredLayer(MacroElement):
+    """
+    Leaflet layer that loads only the precomputed cluster file for the current zoom level.
+    """
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        (function() {
+            var map = {{ this._parent.get_name() }};
+            var layer = L.layerGroup().addTo(map);
+            var loaded = {};
+            var pending = {};
+
+            function clampZoom(z) {
+                return Math.max({{ this.min_zoom }}, Math.min({{ this.max_zoom }}, z));
+            }
+
+            function render(zoom) {
+                if (zoom !== clampZoom(map.getZoom())) { return; }
+                layer.clearLayers();
+                loaded[zoom].forEach(function(r) {
+                    var radius = r[2] > 1 ? 8 + 6 * Math.log10(r[2]) : 4 + r[3] * 1.5;
+                    var depth = r[4] === null ? 'N/A' : r[4] + ' km';
+                    L.circleMarker([r[0], r[1]], {
+                        radius: radius, color: r[5], fillColor: r[5],
+                        fillOpacity: 0.8, weight: 1
+                    }).bindTooltip(r[2] > 1 ? r[2] + ' events (max Mag ' + r[3] + ')' : 'Mag ' + r[3])
+                      .bindPopup(
+                        '<div style="font-family: Arial; width: 200px; color: black;">' +
+                        '<h4 style="margin: 0 0 5px 0; color: ' + r[5] + '; text-shadow: 1px 1px 0 #fff;">Max Mag: ' + r[3] + '</h4>' +
+                        '<b>Events:</b> ' + r[2] + '<br>' +
+                        '<b>Mean Depth:</b> ' + depth + '<br>' +
+                        '<b>Center:</b> ' + r[0] + ', ' + r[1] +
+                        '</div>', {maxWidth: 300})
+                      .addTo(layer);
+                });
+            }
+
+            window.seismicClusters = {
+                receive: function(zoom, rows) {
+                    loaded[zoom] = rows;
+                    delete pending[zoom];
+                    render(zoom);
+                }
+            };
+
+            function update() {
+                var zoom = clampZoom(map.getZoom());
+                if (loaded[zoom]) { render(zoom); return; }
+                if (pending[zoom]) { return; }
+                pending[zoom] = true;
+                var s = document.createElement('script');
+                s.src = {{ this.data_dir|tojson }} + '/z' + zoom + '.js';
+                document.head.appendChild(s);
+            }
+
+            map.on('zoomend', update);
+            update();
+        })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, data_dir, min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM):
+        super().__init__()
+        self._name = "PreclusteredLayer"
+        self.data_dir = data_dir
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+
+
+def add_preclustered_layer(m, df, colormap, output_file, min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM):
+    """
+    Precomputes clusters for df, writes the per-zoom data files next to output_file
+    and adds the on-demand loading layer to the map. Zoom levels above max_zoom show the individual events.
+    """
+    data_dir = os.path.splitext(os.path.basename(output_file))[0] + "_clusters"
+    out_dir = os.path.join(os.path.dirname(os.path.abspath(output_file)), data_dir)
+
+    clusters = precompute_clusters(df, min_zoom=min_zoom, max_zoom=max_zoom)
+    write_cluster_files(clusters, colormap, out_dir)
+    PreclusteredLayer(data_dir, min_zoom=min_zoom, max_zoom=max_zoom + 1).add_to(m)
+    return clusters
@@ -0,0 +1,73 @@
+import numpy as np
+from scipy import sparse
+from sklearn.cluster import DBSCAN
+from sklearn.neighbors import BallTree
+from joint_stats import principal_axes
+from spherical_kmeans import _normalize, _to_lower_hemisphere
+from stereonet_density import bin_vectors
+
+EPS_DEGREES = 5.0
+MIN_SHARE = 0.01 # min_samples เริ่มต้น: 1% ของจำนวน Joint (อย่างน้อย 5)
+CELLS_PER_EPS = 8 # ความละเอียดของ Grid ที่ใช้รวมจุด: ประมาณ 8 Cell ต่อรัศมี eps
+
+
+def chord_length(degrees):
+    """Straight-line distance between two unit vectors that are the given angle apart."""
+    return 2 * np.sin(np.radians(degrees) / 2)
+
+
+def axial_radius_graph(X, eps_degrees):
+    """
+    Sparse (N x N) graph of the chord distances between unit vectors whose axial angle arccos|x . y| is at
+    most eps_degrees. A single BallTree over X and -X answers the neighbours of both ends of every axis.
+    """
+    n = len(X)
+    tree = BallTree(np.vstack([X, -X]))
+    indices, distances = tree.query_radius(X, r=chord_length(eps_degrees), return_distance=True)
+    rows = np.repeat(np.arange(n), [len(i) for i in indices])
+    # DBSCAN ถือว่าค่า 0 ใน Sparse graph ไม่ใช่เพื่อนบ้าน จึงบวกค่าเล็กมากให้ตัวเองและจุดที่ซ้ำกัน
+    data = np.concatenate(distances) + 1e-12
+    return sparse.csr_matrix((data, (rows, np.concatenate(indices) % n)), shape=(n, n))
+
+
+class AxialDBSCAN:
+    """
+    Density-based joint sets for pole vectors: DBSCAN with the axial angular distance arccos|x . y|
+    (v and -v are the same plane). The number of sets is not given; joints in sparse regions get label -1 (noise).
+    Poles are first binned on a fine equal-area grid (about CELLS_PER_EPS cells per eps) and DBSCAN runs on
+    the occupied cells weighted by their counts, so the cost depends on the spread of the data, not on N.
+    sklearn-like interface: fit / fit_predict, labels_ (sets numbered by size), cluster_centers_, n_clusters_.
+    """
+
+    def __init__(self, eps=EPS_DEGREES, min_samples=None, bin_size=None):
+        self.eps = eps
+        self.min_samples = min_samples
+        self.bin_size = bin_size
+
+    def fit(self, X):
+        X = _to_lower_hemisphere(_normalize(X))
+        min_samples = self.min_samples or max(5, int(round(MIN_SHARE * len(X))))
+        bin_size = self.bin_size or int(np.ceil(2 * np.sqrt(2) * CELLS_PER_EPS / np.radians(self.eps)))
+
+        # Grid ของ stereonet_density ใช้แกนแรกเป็นศูนย์กลาง Projection: สลับให้แกน z (Pole แนวดิ่ง) มาก่อน
+        cells, counts, inverse = bin_vectors(X[:, [2, 0, 1]], bin_size, return_inverse=True)
+        cells = cells[:, [1, 2, 0]]
+        graph = axial_radius_graph(cells, self.eps)
+        cell_labels = DBSCAN(eps=chord_length(self.eps), min_samples=min_samples, metric='precomputed').fit(
+            graph, sample_weight=counts).labels_
+        labels = cell_labels[inverse]
+
+        # เรียงเลขชุดตามจำนวน Joint จากมากไปน้อย ให้ผลเหมือนเดิมทุกครั้ง
+        sizes = np.bincount(labels[labels >= 0])
+        order = np.argsort(-sizes, kind='stable')
+        new_ids = np.full(len(sizes) + 1, -1) # เลขสุดท้าย (-1) รับ Noise
+        new_ids[order] = np.arange(len(sizes))
+        self.labels_ = new_ids[labels]
+        self.n_clusters_ = len(sizes)
+        valid = self.labels_ >= 0
+        self.cluster_centers_ = _to_lower_hemisphere(
+            principal_axes(X[valid], self.labels_[valid], self.n_clusters_)) if self.n_clusters_ else np.empty((0, 3))
+        return self
+
+    def fit_predict(self, X):
+        return self.fit(X).labels_
@@ -0,0 +1,236 @@
+import argparse
+import time
+import numpy as np
+
+
+def _normalize(X):
+    X = np.asarray(X, dtype=np.float64)
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    return X / np.where(norms == 0, 1.0, norms)
+
+
+def _to_lower_hemisphere(C):
+    # Pole ของระนาบเดียวกันมีสองทิศ (v และ -v) เลือกทิศที่ชี้ลง (nz >= 0) ให้ตรงกับ orientation_to_vectors
+    return C * np.where(C[:, 2:3] < 0, -1.0, 1.0)
+
+
+class SphericalKMeans:
+    """
+    Axial spherical k-means for pole vectors: similarity is |x . c|, so v and -v (the same plane)
+    fall in the same cluster. Centroids are mean resultant vectors of the sign-aligned members.
+    sklearn-like interface: fit / predict / fit_predict, labels_, cluster_centers_, inertia_, n_iter_.
+    inertia_ is the sum of (1 - |x . c|) over all samples.
+    init is 'k-means++' or an (n_clusters x 3) array of starting centroids (warm start: a single run from them).
+    """
+
+    def __init__(self, n_clusters=3, n_init=10, max_iter=300, tol=1e-9, random_state=None, init='k-means++'):
+        self.n_clusters = n_clusters
+        self.n_init = n_init
+        self.max_iter = max_iter
+        self.tol = tol
+        self.random_state = random_state
+        self.init = init
+
+    def _init_centers(self, X, rng):
+        """k-means++ seeding with the axial distance 1 - |x . c| (or the given init centroids)."""
+        if not isinstance(self.init, str):
+            return _normalize(self.init)
+        n = X.shape[0]
+        centers = np.empty((self.n_clusters, 3))
+        centers[0] = X[rng.integers(n)]
+        closest = 1.0 - np.abs(X @ centers[0])
+
+        for i in range(1, self.n_clusters):
+            weights = closest ** 2
+            total = weights.sum()
+            index = rng.choice(n, p=weights / total) if total > 0 else rng.integers(n)
+            centers[i] = X[index]
+            np.minimum(closest, 1.0 - np.abs(X @ centers[i]), out=closest)
+        return centers
+
+    def _assign(self, X, centers):
+        dots = X @ centers.T
+        labels = np.abs(dots).argmax(axis=1)
+        similarity = np.take_along_axis(dots, labels[:, None], axis=1)[:, 0]
+        return labels, similarity
+
+    def _single_run(self, X, rng):
+        centers = self._init_centers(X, rng)
+        labels, similarity = self._assign(X, centers)
+
+        for n_iter in range(1, self.max_iter + 1):
+            # Mean resultant vector: กลับทิศสมาชิกที่อยู่ฝั่งตรงข้ามก่อนรวม (ทั้งหมดเป็น NumPy ไม่มี loop รายแถว)
+            aligned = X * np.sign(similarity + (similarity == 0))[:, None]
+            sums = np.stack([
+                np.bincount(labels, weights=aligned[:, j], minlength=self.n_clusters) for j in range(3)
+            ], axis=1)
+            norms = np.linalg.norm(sums, axis=1)
+
+            empty = norms == 0
+            if empty.any():
+                # คลัสเตอร์ว่าง: ใช้จุดที่อยู่ห่างจาก Centroid ของตัวเองมากที่สุดเป็นจุดเริ่มใหม่
+                farthest = np.argsort(np.abs(similarity))[:empty.sum()]
+                sums[empty] = X[farthest]
+                norms[empty] = 1.0
+
+            new_centers = sums / norms[:, None]
+            shift = 1.0 - np.abs(np.sum(new_centers * centers, axis=1)).min()
+            centers = new_centers
+            new_labels, similarity = self._assign(X, centers)
+
+            converged = np.array_equal(new_labels, labels) or shift <= self.tol
+            labels = new_labels
+            if converged:
+                break
+
+        inertia = float(np.sum(1.0 - np.abs(similarity)))
+        return labels, centers, inertia, n_iter
+
+    def fit(self, X):
+        X = _normalize(X)
+        if X.shape[0] < self.n_clusters:
+            raise ValueError(f"n_samples={X.shape[0]} should be >= n_clusters={self.n_clusters}.")
+
+        n_init = self.n_init
+        if not isinstance(self.init, str):
+            if np.shape(self.init) != (self.n_clusters, 3):
+                raise ValueError(f"init must have shape ({self.n_clusters}, 3), got {np.shape(self.init)}.")
+            # เริ่มจาก Centroid ที่กำหนด: ทุกรอบให้ผลเหมือนกัน จึงรันรอบเดียว
+            n_init = 1
+
+        rng = np.random.default_rng(self.random_state)
+        best = None
+        for _ in range(n_init):
+            run = self._single_run(X, rng)
+            if best is None or run[2] < best[2]:
+                best = run
+
+        self.labels_, centers, self.inertia_, self.n_iter_ = best
+        self.cluster_centers_ = _to_lower_hemisphere(centers)
+        return self
+
+    def predict(self, X):
+        return self._assign(_normalize(X), self.cluster_centers_)[0]
+
+    def fit_predict(self, X):
+        return self.fit(X).labels_
+
+
+class MiniBatchSphericalKMeans:
+    """
+    Incremental (mini-batch) version of SphericalKMeans for data that arrives in chunks.
+    The first batch is clustered with SphericalKMeans (k-means++ seeding); each later batch is assigned
+    by |x . c| and added to running resultant sums, so every centroid is the mean resultant vector
+    of all sign-aligned samples seen so far. Interface: partial_fit / new_pass / predict, cluster_centers_, counts_.
+    """
+
+    def __init__(self, n_clusters=3, n_init=3, random_state=None):
+        self.n_clusters = n_clusters
+        self.n_init = n_init
+        self.random_state = random_state
+        self._sums = None
+
+    def partial_fit(self, X):
+        X = _normalize(X)
+        if self._sums is None:
+            # Batch แรก: จัดกลุ่มเต็มรูปแบบเพื่อได้ Centroid เริ่มต้นที่ดี
+            seed = SphericalKMeans(self.n_clusters, n_init=self.n_init, random_state=self.random_state).fit(X)
+            centers = seed.cluster_centers_
+            self._sums = np.zeros((self.n_clusters, 3))
+            self.counts_ = np.zeros(self.n_clusters, dtype=np.int64)
+        else:
+            centers = self.cluster_centers_
+
+        dots = X @ centers.T
+        labels = np.abs(dots).argmax(axis=1)
+        signs = np.sign(np.take_along_axis(dots, labels[:, None], axis=1))
+        signs[signs == 0] = 1.0
+        aligned = X * signs
+        for j in range(3):
+            self._sums[:, j] += np.bincount(labels, weights=aligned[:, j], minlength=self.n_clusters)
+        self.counts_ += np.bincount(labels, minlength=self.n_clusters)
+
+        norms = np.linalg.norm(self._sums, axis=1, keepdims=True)
+        # คลัสเตอร์ที่ยังไม่มีสมาชิกคง Centroid เดิมไว้
+        filled = norms[:, 0] > 0
+        centers = centers.copy()
+        centers[filled] = self._sums[filled] / norms[filled]
+        self.cluster_centers_ = _to_lower_hemisphere(centers)
+        return self
+
+    def new_pass(self):
+        """
+        Restarts the running sums from the current centroids, so that a further pass over the data
+        is one full Lloyd iteration and early (misassigned) batches stop weighing on the result.
+        """
+        self._sums[:] = 0
+        self.counts_[:] = 0
+        return self
+
+    def predict(self, X):
+        return np.abs(_normalize(X) @ self.cluster_centers_.T).argmax(axis=1)
+
+
+# --------------------------------------------------
+# Benchmark against sklearn KMeans (Euclidean)
+# --------------------------------------------------
+def sample_fisher(mean, kappa, n, rng):
+    """Draws n unit vectors from a Fisher distribution around `mean` (concentration kappa)."""
+    u = rng.uniform(size=n)
+    w = 1 + np.log(u + (1 - u) * np.exp(-2 * kappa)) / kappa
+    phi = rng.uniform(0, 2 * np.pi, n)
+    r = np.sqrt(np.clip(1 - w ** 2, 0, None))
+    local = np.column_stack([r * np.cos(phi), r * np.sin(phi), w])
+
+    # หมุนแกน z ไปยัง mean direction
+    mean = np.asarray(mean, dtype=float) / np.linalg.norm(mean)
+    helper = np.array([1.0, 0, 0]) if abs(mean[0]) < 0.9 else np.array([0, 1.0, 0])
+    e1 = np.cross(mean, helper)
+    e1 /= np.linalg.norm(e1)
+    e2 = np.cross(mean, e1)
+    return local @ np.vstack([e1, e2, mean])
+
+
+def synthetic_joint_survey(n_per_set, rng, kappa=40):
+    """
+    Three joint sets in pole form (nz >= 0, as orientation_to_vectors produces), two of them
+    sub-vertical so that their poles straddle the horizon and split into antipodal halves.
+    """
+    from joint_geometry import orientation_to_vectors
+
+    sets = [(30, 85), (120, 88), (250, 35)] # (dip direction, dip) ของแต่ละชุด
+    vectors, truth = [], []
+    for label, (dd, dip) in enumerate(sets):
+        mean = orientation_to_vectors([dd], [dip])[0]
+        v = sample_fisher(mean, kappa, n_per_set, rng)
+        vectors.append(v * np.where(v[:, 2:3] < 0, -1.0, 1.0))
+        truth.append(np.full(n_per_set, label))
+    return np.vstack(vectors), np.concatenate(truth)
+
+
+def benchmark(sizes=(1000, 10000, 100000), k=3, seed=0):
+    """Prints time, iterations and agreement with the true sets (adjusted Rand index) for both engines."""
+    from sklearn.cluster import KMeans
+    from sklearn.metrics import adjusted_rand_score
+
+    rng = np.random.default_rng(seed)
+    print(f"{'n':>8}  {'engine':<18}{'time (s)':>10}{'n_iter':>8}{'ARI':>8}")
+    for n in sizes:
+        X, truth = synthetic_joint_survey(n // 3, rng)
+        engines = {
+            'sklearn KMeans': KMeans(n_clusters=k, random_state=seed, n_init='auto'),
+            'SphericalKMeans': SphericalKMeans(n_clusters=k, random_state=seed, n_init=1),
+        }
+        for name, model in engines.items():
+            start = time.perf_counter()
+            labels = model.fit_predict(X)
+            elapsed = time.perf_counter() - start
+            print(f"{len(X):>8}  {name:<18}{elapsed:>10.3f}{model.n_iter_:>8}{adjusted_rand_score(truth, labels):>8.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark axial spherical k-means against sklearn KMeans")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("-k", type=int, default=3)
+    args = parser.parse_args()
+    benchmark(args.sizes, args.k)
@@ -0,0 +1,128 @@
+import io
+import threading
+import matplotlib
+import mplstereonet
+import numpy as np
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from joint_geometry import vectors_to_orientation
+from stereonet_density import density_grid, subsample_index
+
+PLOT_TYPES = ("Pole", "Plane", "Density")
+DEFAULT_PLOT_OPTIONS = {"max_points": 5000, "density_method": "fisher", "overlay": None}
+# เลื่อน Stereonet ไปทางซ้ายเพื่อเว้นที่ให้ Colorbar (กว้างเท่ากับสูงเสมอ มิฉะนั้นวงกลมจะถูกตัด)
+DENSITY_LAYOUT = dict(left=0.07, right=0.83, bottom=0.12, top=0.88)
+SET_COLORS = matplotlib.colormaps["Set1"].colors[:8] + matplotlib.colormaps["Dark2"].colors[:7]
+NOISE_COLOR = "0.6" # จุดที่ไม่อยู่ในชุดใด (joint_set = -1 จาก DBSCAN)
+EXPORT_FORMATS = {"png": "image/png", "svg": "image/svg+xml", "pdf": "application/pdf"}
+# rc_context แก้ rcParams ของทั้งโปรเซสชั่วคราว จึงวาดได้ทีละรูปเมื่อเรียกจากหลาย Thread
+_RENDER_LOCK = threading.Lock()
+
+
+def set_color(i):
+    """
+    Colour of set i: the 8 colours of Set1, then the 7 of Dark2, leaving out the grey of both palettes
+    (grey is reserved for noise); repeats only beyond 15 sets.
+    """
+    return SET_COLORS[i % len(SET_COLORS)]
+
+
+def draw_joints(ax, labeled, k_value, kind, colors, max_points=None, markersize=5, alpha=None):
+    """
+    Poles or great circles of the joints, on a random subsample of at most max_points rows.
+    Noise (joint_set = -1) is drawn in grey after the sets.
+    """
+    sample = labeled.iloc[subsample_index(len(labeled), max_points)]
+    has_noise = bool((labeled["joint_set"] < 0).any())
+    for i in list(range(k_value)) + ([-1] if has_noise else []):
+        n_set = int((labeled["joint_set"] == i).sum())
+        color = colors(i) if i >= 0 else NOISE_COLOR
+        name = f"Set {i}" if i >= 0 else "Noise"
+        subset = sample[sample["joint_set"] == i]
+        # mplstereonet รับ Strike (RHR: strike = dd - 90) และแก้ค่าใน Array ที่ส่งเข้าไป จึงส่งสำเนาที่คำนวณใหม่
+        strike_subset = subset["dip direction"].to_numpy(dtype=float) - 90
+        dip_subset = subset["dip angle"].to_numpy(dtype=float, copy=True)
+
+        # Plot based on user choice (Pole or Plane)
+        if kind == "Plane":
+            # Plot great circles (planes) for all data points in the set
+            # รวมทุกเส้นของชุดเป็น LineCollection เดียว (ax.plane สร้าง Line2D แยกทีละระนาบ ช้ามากเมื่อมีหลายพันเส้น)
+            lon, lat = mplstereonet.plane(strike_subset, dip_subset)
+            ax.add_collection(LineCollection(
+                np.stack([lon.T, lat.T], axis=-1),
+                colors=[color], alpha=alpha or 0.5, linewidths=1,
+                label=f"{name} (n={n_set})"
+            ))
+
+        elif kind == "Pole":
+            # Plot poles (points)
+            ax.pole(strike_subset, dip_subset,
+                    marker="o", markersize=markersize, color=color, alpha=alpha or 0.7, label=f"{name} (n={n_set})")
+
+
+def draw_density(ax, labeled, method):
+    """Kamb / Fisher density contours of all poles (grid computed in stereonet_density)."""
+    lon, lat, density = density_grid(labeled["dip direction"].to_numpy(), labeled["dip angle"].to_numpy(), method)
+    contours = ax.contourf(lon, lat, density, levels=10, cmap="Blues")
+    # Colorbar ใน Axes แยกทางขวา (ที่ว่างเตรียมไว้โดย DENSITY_LAYOUT)
+    cax = ax.figure.add_axes([0.89, 0.3, 0.025, 0.4])
+    ax.figure.colorbar(contours, cax=cax, label=f"{method.capitalize()} density (σ)")
+
+
+def draw_mean_planes(ax, k_value, centers, colors):
+    """Mean plane (great circle) and mean pole of every set from the cluster centres."""
+    mean_dd, mean_dip = vectors_to_orientation(centers)
+    for i in range(k_value):
+        label = f"Set {i} mean {mean_dd[i]:03.0f}/{mean_dip[i]:02.0f}"
+        ax.plane(mean_dd[i] - 90, mean_dip[i], color=colors(i), linewidth=2, label=label)
+        ax.pole(mean_dd[i] - 90, mean_dip[i], marker="^", markersize=9, color=colors(i), markeredgecolor="black")
+
+
+def stereonet_image(labeled, k_value, centers, plot_type="Pole", font_name="DejaVu Sans", plot_options=None,
+                    fmt="png", dpi=300):
+    """
+    Draws the stereonet of a labeled DataFrame (dip direction, dip angle, joint_set) and returns the encoded
+    image bytes in fmt (one of EXPORT_FORMATS; dpi applies to the raster parts).
+    plot_options: max_points (random subsample of drawn joints), density_method and overlay (Density plot).
+    Uses a standalone Figure (no pyplot state), so it is safe in worker processes and threads.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"fmt must be one of {tuple(EXPORT_FORMATS)}")
+    plot_options = {**DEFAULT_PLOT_OPTIONS, **(plot_options or {})}
+    # Font ใช้เฉพาะรูปนี้ (คืนค่า rcParams เมื่อวาดเสร็จ)
+    with _RENDER_LOCK, matplotlib.rc_context({"font.family": font_name}):
+        # กำหนดขนาด Figure สำหรับรายงาน (ขนาดมาตรฐานสำหรับเอกสาร)
+        fig_report = Figure(figsize=(7, 7))
+        if plot_type == "Density":
+            # ต้องกำหนดก่อนสร้าง Axes มิฉะนั้นป้ายทิศ (Azimuth) ไม่ย้ายตาม
+            fig_report.subplots_adjust(**DENSITY_LAYOUT)
+        ax = fig_report.add_subplot(111, projection='stereonet')
+
+        # Fixed: ใช้ ax.grid(True) เพื่อเปิด Grid (ค่า Default คือ 10 องศา) เท่านั้น
+        ax.grid(True)
+
+        colors = set_color
+
+        if plot_type == "Density":
+            # Density: Contour จาก Grid ที่คำนวณแบบ Vectorized แทนการวาดทีละระนาบ
+            draw_density(ax, labeled, plot_options["density_method"])
+            if plot_options["overlay"] in ("Pole", "Plane"):
+                draw_joints(ax, labeled, k_value, plot_options["overlay"], lambda i: "0.3",
+                            plot_options["max_points"], markersize=2, alpha=0.15)
+            draw_mean_planes(ax, k_value, centers, colors)
+        else:
+            draw_joints(ax, labeled, k_value, plot_type, colors, plot_options["max_points"])
+
+        handles, labels = ax.get_legend_handles_labels()
+        # Overlay ใน Density ใช้สีเทาเดียวกันทุกชุด จึงแสดงเฉพาะ Mean plane ใน Legend
+        keep = [n for n, text in enumerate(labels) if plot_type != "Density" or "mean" in text]
+        ax.legend([handles[n] for n in keep], [labels[n] for n in keep], loc="lower left", title="Joint Sets")
+
+        buf = io.BytesIO()
+        fig_report.savefig(buf, format=fmt, dpi=dpi)
+    return buf.getvalue()
+
+
+def stereonet_png(labeled, k_value, centers, plot_type="Pole", font_name="DejaVu Sans", plot_options=None, dpi=300):
+    """PNG bytes of the stereonet (see stereonet_image)."""
+    return stereonet_image(labeled, k_value, centers, plot_type, font_name, plot_options, "png", dpi)
@@ -0,0 +1,202 @@
+import sys
+import unicodedata
+from functools import lru_cache
+
+try:
+    # ตัวตัดคำภาษาไทย (ถ้ามี) เช่น pip install pythainlp
+    from pythainlp.tokenize import word_tokenize as _thai_word_tokenize
+except ImportError:
+    _thai_word_tokenize = None
+
+try:
+    # ตารางความกว้างตัวอักษรของ wcwidth (ถ้ามี) ละเอียดกว่า unicodedata
+    from wcwidth import wcwidth as _wcwidth
+except ImportError:
+    _wcwidth = None
+
+# สระหน้า (เ แ โ ใ ไ) ต้องอยู่ติดกับพยัญชนะตัวถัดไปเสมอ
+THAI_LEADING_VOWELS = set('เแโใไ')
+# สระตามที่ไม่ใช่ combining mark (ะ า ำ ๅ) และไม้ยมก (ๆ) ต้องอยู่ติดกับตัวอักษรก่อนหน้า
+THAI_FOLLOWING_CHARS = set('ะาำๅๆ')
+
+# คำศัพท์พื้นฐานของข่าวพยากรณ์/เตือนภัย ใช้ตัดคำแบบ Longest matching เมื่อไม่มี pythainlp
+# (คำที่ไม่อยู่ในรายการจะไม่ถูกตัดกลางคำ แต่ตัดได้เฉพาะตรงรอยต่อกับคำที่รู้จัก)
+THAI_WORDS = frozenset("""
+กรม กรมอุตุนิยมวิทยา อุตุนิยมวิทยา ประกาศ ฉบับ ฉบับที่ เรื่อง ข่าว ข่าวสาร คำเตือน เตือน แจ้ง ล่าสุด ติดตาม ขอให้ กรุณา
+พายุ พายุฤดูร้อน พายุฝนฟ้าคะนอง พายุดีเปรสชัน ดีเปรสชัน พายุโซนร้อน โซนร้อน พายุไต้ฝุ่น ไต้ฝุ่น หย่อมความกดอากาศต่ำ
+ฤดู ฤดูร้อน ฤดูฝน ฤดูหนาว ร้อน ร้อนจัด หนาว หนาวจัด หนาวเย็น เย็น อบอุ่น
+ฝน ฝนตก ฝนตกหนัก ฝนฟ้าคะนอง ตก ตกหนัก หนัก หนักมาก หนักถึงหนักมาก ฟ้า ฟ้าคะนอง คะนอง ฟ้าผ่า ลูกเห็บ ลูกเห็บตก
+ลม ลมแรง ลมกระโชก ลมกระโชกแรง กระโชก แรง กำลังแรง กำลัง อ่อน อ่อนกำลัง ค่อนข้าง ปานกลาง
+คลื่น คลื่นลม คลื่นลมแรง คลื่นสูง ทะเล ทะเลอันดามัน อันดามัน อ่าว อ่าวไทย ชายฝั่ง ฝั่ง ออกจากฝั่ง เรือ เรือเล็ก ชาวเรือ
+อากาศ สภาพอากาศ สภาวะอากาศ แปรปรวน ความกดอากาศ ความกดอากาศสูง ความกดอากาศต่ำ ความชื้น ชื้น อุณหภูมิ องศา เซลเซียส
+ร่องมรสุม ร่อง มรสุม มรสุมตะวันออกเฉียงเหนือ มรสุมตะวันตกเฉียงใต้ ลมตะวันออก ลมตะวันตก ลมใต้
+ภาค ภาคเหนือ ภาคตะวันออกเฉียงเหนือ ภาคกลาง ภาคตะวันออก ภาคตะวันตก ภาคใต้ ภาคใต้ฝั่งตะวันออก ภาคใต้ฝั่งตะวันตก
+เหนือ ใต้ กลาง ตะวันออก ตะวันตก เฉียงเหนือ เฉียงใต้ ตอนบน ตอนล่าง ตอนกลาง ด้าน ทาง แนว
+ประเทศ ประเทศไทย ไทย กรุงเทพ กรุงเทพมหานคร กรุงเทพฯ ปริมณฑล จังหวัด อำเภอ พื้นที่ บริเวณ แห่ง หลายแห่ง บางแห่ง
+น้ำ น้ำท่วม ท่วม ท่วมขัง น้ำท่วมฉับพลัน ฉับพลัน น้ำป่า น้ำป่าไหลหลาก ไหลหลาก ดิน ดินถล่ม ถล่ม หมอก หมอกหนา ฝุ่น ละออง ควัน
+อันตราย ระวัง ระมัดระวัง ป้องกัน เตรียม เตรียมพร้อม ความเสียหาย เสียหาย ผลกระทบ ส่งผล ทำให้ เกิด เกิดขึ้น อาจ
+ประชาชน เกษตรกร ผลผลิต การเกษตร สุขภาพ ดูแล ร่างกาย ต้นไม้ ป้ายโฆษณา สิ่งปลูกสร้าง อาคาร ไม่แข็งแรง แข็งแรง ที่อยู่อาศัย
+ปกคลุม แผ่ แผ่ลงมา แผ่เสริม พัด พัดผ่าน พาดผ่าน ผ่าน เคลื่อน เคลื่อนตัว เคลื่อนผ่าน เข้า ออก ขึ้น ลง ลดลง เพิ่มขึ้น สูงขึ้น
+ศูนย์กลาง ใกล้ ประมาณ กิโลเมตร เมตร ชั่วโมง นาฬิกา เวลา วัน วันที่ วันนี้ พรุ่งนี้ คืน กลางคืน เช้า บ่าย เดือน ปี ช่วง
+ระหว่าง ตั้งแต่ จนถึง ถึง จาก ไป มา ใน นอก บน ล่าง ของ และ หรือ กับ แต่ ซึ่ง โดย เพื่อ ตาม สำหรับ เช่น ได้แก่ ด้วย ไว้ ต่อ
+คาดว่า คาด ว่า จะ มี ได้ ให้ เป็น อยู่ ยัง แล้ว อีก ควร งด ไม่ ทุก ทั่ว ทั่วไป ส่วน ส่วนมาก ร้อยละ มาก น้อย สูง ต่ำ ใหญ่ เล็ก
+ลักษณะ อิทธิพล เนื่องจาก ทั้งนี้ ครอบคลุม ตลอด ระยะ ครั้ง การ ความ ที่ นี้ นั้น ดังกล่าว ดังนี้ ต่อไป ขอ ไว้ด้วย
+""".split())
+
+
+@lru_cache(maxsize=4096)
+def char_width(ch):
+    """
+    Terminal column width of one character: 0 for combining marks (Thai vowels above/below, tone marks)
+    and format characters, 2 for East Asian wide/fullwidth characters, 1 otherwise.
+    """
+    if _wcwidth is not None:
+        return max(_wcwidth(ch), 0)
+    if unicodedata.combining(ch) or unicodedata.category(ch) in ('Mn', 'Me', 'Cf'):
+        return 0
+    if unicodedata.east_asian_width(ch) in ('W', 'F'):
+        return 2
+    return 1
+
+
+def display_width(text):
+    """Number of terminal columns used by text."""
+    if text.isascii():
+        return len(text)
+    return sum(map(char_width, text))
+
+
+def _starts_cluster(text, i):
+    """True if a line may be broken (or text cut) right before text[i]."""
+    ch = text[i]
+    return i == 0 or not (char_width(ch) == 0 or ch in THAI_FOLLOWING_CHARS or text[i - 1] in THAI_LEADING_VOWELS)
+
+
+def _clusters(text):
+    """
+    Splits text into units that must never be broken: a base character with its combining marks,
+    Thai leading vowels joined to the next character, and following vowels joined to the previous one.
+    """
+    clusters = []
+    for i, ch in enumerate(text):
+        if _starts_cluster(text, i):
+            clusters.append(ch)
+        else:
+            clusters[-1] += ch
+    return clusters
+
+
+_MAX_WORD_CLUSTERS = max(len(_clusters(word)) for word in THAI_WORDS)
+
+
+def _dictionary_words(text):
+    """
+    Splits a run of text without spaces into words by longest matching against THAI_WORDS.
+    Text between known words is kept together as one segment.
+    """
+    clusters = _clusters(text)
+    segments, unknown, i = [], "", 0
+    while i < len(clusters):
+        for j in range(min(len(clusters), i + _MAX_WORD_CLUSTERS), i, -1):
+            word = "".join(clusters[i:j])
+            if word in THAI_WORDS:
+                break
+        else:
+            unknown += clusters[i]
+            i += 1
+            continue
+        if unknown:
+            segments.append(unknown)
+            unknown = ""
+        segments.append(word)
+        i = j
+    if unknown:
+        segments.append(unknown)
+    return segments
+
+
+@lru_cache(maxsize=1024)
+def segment_words(text):
+    """
+    Splits text into line-break units. Uses the pythainlp word segmenter when installed;
+    otherwise breaks at spaces and between the words of the built-in THAI_WORDS list.
+    """
+    if _thai_word_tokenize is not None:
+        return tuple(_thai_word_tokenize(text, keep_whitespace=True))
+
+    segments = []
+    for i, word in enumerate(text.split(' ')):
+        if i:
+            segments.append(' ')
+        if word.isascii():
+            segments.append(word)
+        else:
+            segments.extend(_dictionary_words(word))
+    return tuple(segment for segment in segments if segment)
+
+
+def wrap(text, width=78):
+    """Wraps text to lines of at most `width` display columns, breaking only between segments."""
+    lines, line, line_width = [], "", 0
+
+    for segment in segment_words(text):
+        seg_width = display_width(segment)
+        if line_width + seg_width > width and line:
+            lines.append(line.rstrip())
+            line, line_width = "", 0
+            if segment.isspace():
+                continue
+
+        if seg_width > width:
+            # คำที่ยาวเกินหนึ่งบรรทัด: ตัดตาม cluster
+            for cluster in _clusters(segment):
+                cluster_width = display_width(cluster)
+                if line_width + cluster_width > width and line:
+                    lines.append(line)
+                    line, line_width = "", 0
+                line += cluster
+                line_width += cluster_width
+            continue
+
+        line += segment
+        line_width += seg_width
+
+    if line.strip():
+        lines.append(line.rstrip())
+    return lines
+
+
+def truncate(text, width, placeholder="..."):
+    """Cuts text to at most `width` display columns (never inside a character cluster)."""
+    if display_width(text) <= width:
+        return text
+
+    # เดินตัวอักษรครั้งเดียว จำตำแหน่งต้น cluster สุดท้ายที่ยังไม่เกินความกว้าง
+    limit = width - display_width(placeholder)
+    cut, used = 0, 0
+    for i, ch in enumerate(text):
+        if _starts_cluster(text, i):
+            if used > limit:
+                break
+            cut = i
+        used += char_width(ch)
+    return text[:cut] + placeholder
+
+
+def pad(text, width):
+    """Left-aligns text in a field of `width` display columns."""
+    return text + " " * max(0, width - display_width(text))
+
+
+def render_table(rows, columns, widths, out=None, separator="  "):
+    """
+    Streams a fixed-width table to `out` one row at a time (no full-table string is built).
+    rows: iterable of sequences in column order; widths: display width of each column.
+    """
+    out = out or sys.stdout
+
+    out.write(separator.join(pad(truncate(str(c), w), w) for c, w in zip(columns, widths)).rstrip() + "\n")
+    out.write(separator.join("-" * w for w in widths) + "\n")
+    for row in rows:
+        cells = ("" if value is None else str(value) for value in row)
+        out.write(separator.join(pad(truncate(c, w), w) for c, w in zip(cells, widths)).rstrip() + "\n")
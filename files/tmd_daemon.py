@@ -0,0 +1,212 @@
+import argparse
+import hashlib
+import heapq
+import importlib.util
+import json
+import os
+import time
+import pandas as pd
+import requests
+import DailyEarthquakes
+import weather_warning_news
+from province_topojson import sidecar_paths
+
+
+def _load_script(module_name, filename):
+    """Imports a script whose file name is not a valid module name (e.g. No.8.py)."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+weather_map = _load_script("tmd_weather_map", "No.8.py")
+
+# ความถี่ในการดึงข้อมูลแต่ละ Feed (วินาที)
+FEED_INTERVALS = {
+    'seismic': 5 * 60,       # แผ่นดินไหว: ทุก 5 นาที
+    'warnings': 60 * 60,     # ประกาศเตือนภัย: ทุกชั่วโมง
+    'forecast': 24 * 60 * 60 # พยากรณ์ 7 วัน: วันละครั้ง
+}
+RETRY_DELAY = 60 # seconds before retrying a feed whose fetch or render failed
+DAEMON_STATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tmd_daemon_state.json")
+
+
+def data_hash(df):
+    """Returns a stable hash of a parsed DataFrame (columns and values, ignoring the index)."""
+    digest = hashlib.sha1("\x1f".join(map(str, df.columns)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+def load_state(path=DAEMON_STATE):
+    """Loads the per-feed state ({feed: {'hash', 'files'}}); empty if missing or unreadable."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Could not read daemon state '{path}': {e}")
+        return {}
+
+
+def save_state(state, path=DAEMON_STATE):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def build_feeds(open_browser=False, archive=False, store_path=weather_warning_news.SEEN_STORE):
+    """
+    Returns {feed: (fetch, render, on_poll)}. fetch(session) returns the parsed DataFrame (possibly empty,
+    e.g. no active warnings) and raises on a failed fetch;
+    render(df) writes the feed's artifacts, including sidecar scripts, and returns their file names
+    (None entries mean failure). An empty df is rendered too: as an empty-state map, or with no artifacts.
+    on_poll() (or None) runs after every successful fetch, whether or not the data changed.
+    Single-day maps use the cached template mode, so a refresh only writes the new data.
+    """
+    warning_store = weather_warning_news.load_seen_store(store_path)
+
+    def render_seismic(df):
+        # วันที่ไม่มีแผ่นดินไหวได้แผนที่เปล่า แทนการปล่อยแผนที่ของวันก่อนไว้
+        return [DailyEarthquakes.create_seismic_map(df, mode="template", open_browser=open_browser)]
+
+    def fetch_forecast(session):
+        return weather_map.get_weather_forecast_long(session=session, raise_errors=True)
+
+    def render_forecast(forecast_long):
+        if forecast_long.empty:
+            return []
+        # ดึง XML ครั้งเดียว แล้วสร้างทั้งแผนที่ 7 วัน และแผนที่วันแรก (แทนการดึงซ้ำด้วย get_weather_data_extended)
+        first_day = weather_map.forecast_to_daily_table(forecast_long).groupby('province_en').head(1)
+        files = [
+            weather_map.create_interactive_map(first_day, output_format="template", open_browser=open_browser),
+            weather_map.create_forecast_slider_map(forecast_long, open_browser=open_browser),
+        ]
+        # แผนที่ 7 วันโหลด Geometry และ Data Table จากไฟล์ .js แยก: บันทึกไว้ด้วยเพื่อสร้างใหม่เมื่อไฟล์หาย
+        gdf = weather_map.load_province_geometry(tolerance=weather_map.DEFAULT_TOLERANCE)[0]
+        return files + list(sidecar_paths(weather_map.FORECAST_OUTPUT_FILE, weather_map.DEFAULT_TOLERANCE, gdf))
+
+    def render_warnings(df):
+        # ไม่มีไฟล์ HTML: แสดงเฉพาะประกาศใหม่/แก้ไข และเก็บ seen store ไว้ในหน่วยความจำตลอดการทำงาน
+        changes = weather_warning_news.detect_changes(df, warning_store)
+        weather_warning_news.save_seen_store(warning_store, store_path)
+        if not changes.empty:
+            weather_warning_news.display_warning_news(changes, title=weather_warning_news.CHANGES_TITLE)
+            if archive:
+                weather_warning_news.archive_warnings(changes)
+        return [store_path]
+
+    def expire_warnings():
+        # ประกาศที่หมดอายุต้องถูกลบทุกรอบ แม้ข้อมูลไม่เปลี่ยนหรือไม่มีประกาศเลย
+        if weather_warning_news.expire_seen_store(warning_store):
+            weather_warning_news.save_seen_store(warning_store, store_path)
+
+    return {
+        'seismic': (lambda session: DailyEarthquakes.get_seismic_data(session=session, raise_errors=True),
+                    render_seismic, None),
+        'warnings': (lambda session: weather_warning_news.get_warning_news(session=session, raise_errors=True),
+                     render_warnings, expire_warnings),
+        'forecast': (fetch_forecast, render_forecast, None),
+    }
+
+
+def remove_stale_files(previous, files):
+    """Deletes artifacts of the previous render that the new render did not produce (e.g. an old geometry file)."""
+    for path in set(previous) - set(files):
+        if os.path.exists(path):
+            os.remove(path)
+            print(f"Removed stale artifact '{path}'")
+
+
+def run_feed(name, fetch, render, session, state, on_poll=None):
+    """
+    Fetches one feed and re-renders its artifacts only if the parsed data changed
+    (or an artifact is missing). An empty result (no active warnings, a quiet day) is rendered like any
+    other change, so yesterday's map is never served as current; artifacts the new render did not produce
+    are removed. on_poll() runs after every successful fetch. Returns False when the fetch or render failed.
+    """
+    stamp = f"[{pd.Timestamp.now():%Y-%m-%d %H:%M:%S}] {name}"
+    try:
+        df = fetch(session)
+    except Exception as e:
+        print(f"{stamp}: fetch failed: {e}, retrying in {RETRY_DELAY}s.")
+        return False
+
+    digest = data_hash(df)
+    previous = state.get(name, {})
+    if previous.get('hash') == digest and all(os.path.exists(f) for f in previous.get('files', [])):
+        print(f"{stamp}: unchanged ({len(df)} rows), skipping render.")
+    else:
+        try:
+            files = render(df)
+        except Exception as e:
+            print(f"{stamp}: render failed: {e}")
+            return False
+        if any(f is None for f in files):
+            print(f"{stamp}: render failed, retrying in {RETRY_DELAY}s.")
+            return False
+
+        remove_stale_files(previous.get('files', []), files)
+        state[name] = {'hash': digest, 'files': files}
+        print(f"{stamp}: data changed ({len(df)} rows), regenerated {', '.join(files) or 'no artifacts'}.")
+
+    if on_poll is not None:
+        on_poll()
+    return True
+
+
+def run_daemon(feeds=None, intervals=FEED_INTERVALS, state_path=DAEMON_STATE, once=False,
+               open_browser=False, archive=False):
+    """
+    Headless scheduler: runs every feed on its own interval in one process with one shared
+    requests.Session (connection pool). Feeds are due in time order; the loop sleeps until the next one.
+    With once=True every feed runs a single time (e.g. from cron).
+    """
+    all_feeds = build_feeds(open_browser=open_browser, archive=archive)
+    names = feeds or list(all_feeds)
+    state = load_state(state_path)
+    session = requests.Session()
+
+    # คิวของ Feed ที่ถึงกำหนด: (เวลาที่ถึงกำหนด, ชื่อ Feed)
+    now = time.monotonic()
+    due = [(now, name) for name in names]
+    heapq.heapify(due)
+    print(f"TMD daemon started: {', '.join(f'{n} every {intervals[n]}s' for n in names)}. Press Ctrl+C to stop.")
+
+    try:
+        while due:
+            when, name = heapq.heappop(due)
+            delay = when - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+            fetch, render, on_poll = all_feeds[name]
+            ok = run_feed(name, fetch, render, session, state, on_poll)
+            save_state(state, state_path)
+
+            if not once:
+                heapq.heappush(due, (time.monotonic() + (intervals[name] if ok else RETRY_DELAY), name))
+    except KeyboardInterrupt:
+        print("\nTMD daemon stopped.")
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless TMD ingestion daemon (earthquakes, forecast, warnings)")
+    parser.add_argument("--feeds", nargs="+", choices=list(FEED_INTERVALS), help="feeds to run (default: all)")
+    parser.add_argument("--once", action="store_true", help="run every feed once and exit")
+    parser.add_argument("--state", default=DAEMON_STATE, help="file that remembers the last data hash of each feed")
+    parser.add_argument("--open-browser", action="store_true", help="open regenerated maps in the browser")
+    parser.add_argument("--archive", action="store_true", help="add new or amended warnings to the searchable archive")
+    for feed, seconds in FEED_INTERVALS.items():
+        parser.add_argument(f"--{feed}-interval", type=int, default=seconds, help=f"seconds between {feed} fetches")
+    args = parser.parse_args()
+
+    intervals = {feed: getattr(args, f"{feed}_interval") for feed in FEED_INTERVALS}
+    run_daemon(feeds=args.feeds, intervals=intervals, state_path=args.state, once=args.once,
+               open_browser=args.open_browser, archive=args.archive)
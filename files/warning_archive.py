@@ -0,0 +1,224 @@
+import argparse
+import json
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+import pandas as pd
+from province_gazetteer import get_gazetteer, REGION_THAI
+
+ARCHIVE_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "warning_archive.sqlite")
+
+# FTS5 แบบ trigram ตัดข้อความเป็นกลุ่มละ 3 ตัวอักษร จึงค้นภาษาไทย (ที่ไม่มีช่องว่างระหว่างคำ) ได้โดยไม่ต้องตัดคำ
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS warnings (
+    id INTEGER PRIMARY KEY,
+    issue_no TEXT UNIQUE NOT NULL,
+    announce_date TEXT,
+    effect_start TEXT,
+    effect_end TEXT,
+    title TEXT,
+    headline TEXT,
+    description TEXT,
+    url TEXT
+);
+CREATE INDEX IF NOT EXISTS warnings_announce_date ON warnings (announce_date);
+CREATE TABLE IF NOT EXISTS warning_regions (
+    warning_id INTEGER NOT NULL REFERENCES warnings (id) ON DELETE CASCADE,
+    region TEXT NOT NULL,
+    PRIMARY KEY (region, warning_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS warning_provinces (
+    warning_id INTEGER NOT NULL REFERENCES warnings (id) ON DELETE CASCADE,
+    province_id TEXT NOT NULL,
+    PRIMARY KEY (province_id, warning_id)
+) WITHOUT ROWID;
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS warnings_fts USING fts5(
+    title, headline, description, content='warnings', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS warnings_ai AFTER INSERT ON warnings BEGIN
+    INSERT INTO warnings_fts (rowid, title, headline, description)
+    VALUES (new.id, new.title, new.headline, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS warnings_ad AFTER DELETE ON warnings BEGIN
+    INSERT INTO warnings_fts (warnings_fts, rowid, title, headline, description)
+    VALUES ('delete', old.id, old.title, old.headline, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS warnings_au AFTER UPDATE ON warnings BEGIN
+    INSERT INTO warnings_fts (warnings_fts, rowid, title, headline, description)
+    VALUES ('delete', old.id, old.title, old.headline, old.description);
+    INSERT INTO warnings_fts (rowid, title, headline, description)
+    VALUES (new.id, new.title, new.headline, new.description);
+END;
+"""
+
+# trigram ต้องการคำค้นอย่างน้อย 3 ตัวอักษร คำที่สั้นกว่านี้จะค้นด้วย LIKE แทน
+MIN_FTS_QUERY_LENGTH = 3
+
+
+def _clean(text):
+    """NFC-normalizes text so the same Thai word is always indexed and queried with the same code points."""
+    if text is None or (isinstance(text, float) and pd.isna(text)):
+        return None
+    return unicodedata.normalize('NFC', str(text))
+
+
+def _iso(value):
+    ts = pd.to_datetime(value, errors='coerce')
+    return None if pd.isna(ts) else ts.isoformat()
+
+
+def _until_bound(value):
+    """SQL condition and parameter for an upper announce date bound; a date without a time covers that whole day."""
+    if re.fullmatch(r"\s*\d{4}-\d{1,2}-\d{1,2}\s*", str(value)):
+        ts = pd.to_datetime(value, errors='coerce')
+        return "w.announce_date < ?", None if pd.isna(ts) else (ts + pd.Timedelta(days=1)).isoformat()
+    return "w.announce_date <= ?", _iso(value)
+
+
+def _iso_column(values):
+    """Vectorized ISO-8601 conversion of a date column (None for unparseable values)."""
+    parsed = pd.to_datetime(pd.Series(values, dtype=object), errors='coerce', format='mixed')
+    return [None if pd.isna(ts) else ts.isoformat() for ts in parsed]
+
+
+def open_archive(db_path=ARCHIVE_DB):
+    """
+    Opens (and creates if needed) the archive database.
+    Returns (connection, has_fts): has_fts is False when this SQLite build lacks the FTS5 trigram tokenizer.
+    """
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript(SCHEMA)
+    try:
+        conn.executescript(FTS_SCHEMA)
+        has_fts = True
+    except sqlite3.OperationalError as e:
+        print(f"FTS5 trigram index not available ({e}); falling back to LIKE search.")
+        has_fts = False
+    return conn, has_fts
+
+
+def archive_warnings(df, db_path=ARCHIVE_DB):
+    """
+    Inserts or updates a batch of warnings (the DataFrame from get_warning_news) in the archive,
+    tagging each warning with the regions and provinces it mentions. Returns the number of rows written.
+    """
+    if df.empty:
+        return 0
+
+    gazetteer = get_gazetteer()
+    issue_nos = df['Issue_No'].astype(str).tolist()
+    titles = [_clean(v) for v in df['Title_Thai']]
+    headlines = [_clean(v) for v in df['Headline_Thai']]
+    descriptions = [_clean(v) for v in df['Description_Thai']]
+
+    rows = list(zip(
+        issue_nos, _iso_column(df['Announce_Date']), _iso_column(df['Effect_Start']), _iso_column(df['Effect_End']),
+        titles, headlines, descriptions, df['Web_URL_Thai'].tolist()
+    ))
+    texts = [" ".join(part for part in parts if part) for parts in zip(titles, headlines, descriptions)]
+
+    conn, _ = open_archive(db_path)
+    try:
+        with conn:
+            conn.executemany("""
+                INSERT INTO warnings (issue_no, announce_date, effect_start, effect_end, title, headline, description, url)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (issue_no) DO UPDATE SET
+                    announce_date = excluded.announce_date, effect_start = excluded.effect_start,
+                    effect_end = excluded.effect_end, title = excluded.title, headline = excluded.headline,
+                    description = excluded.description, url = excluded.url
+            """, rows)
+
+            ids = dict(conn.execute(
+                "SELECT issue_no, id FROM warnings WHERE issue_no IN (SELECT value FROM json_each(?))",
+                (json.dumps(issue_nos),)
+            ).fetchall())
+            warning_ids = [(ids[issue_no],) for issue_no in issue_nos]
+
+            conn.executemany("DELETE FROM warning_regions WHERE warning_id = ?", warning_ids)
+            conn.executemany("DELETE FROM warning_provinces WHERE warning_id = ?", warning_ids)
+            conn.executemany(
+                "INSERT OR IGNORE INTO warning_regions (warning_id, region) VALUES (?, ?)",
+                [(ids[issue_no], region) for issue_no, text in zip(issue_nos, texts)
+                 for region in gazetteer.regions_in_text(text)]
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO warning_provinces (warning_id, province_id) VALUES (?, ?)",
+                [(ids[issue_no], code) for issue_no, text in zip(issue_nos, texts)
+                 for code in gazetteer.find_in_text(text)]
+            )
+        return len(df)
+    finally:
+        conn.close()
+
+
+def search_warnings(query, region=None, province=None, since=None, until=None, limit=50, db_path=ARCHIVE_DB):
+    """
+    Searches title, headline and description of archived warnings.
+    region: key or Thai label ('north' / 'ภาคเหนือ'); province: any spelling known to the gazetteer;
+    since/until: announce date bounds (a date-only until includes the whole day). Returns a DataFrame, latest first.
+    """
+    conn, has_fts = open_archive(db_path)
+    query = _clean(query) or ""
+
+    where, params = [], []
+    use_fts = has_fts and len(query) >= MIN_FTS_QUERY_LENGTH
+    if use_fts:
+        # ใส่เครื่องหมายคำพูดเพื่อให้ค้นทั้งวลี (และไม่ตีความอักขระพิเศษเป็น FTS syntax)
+        where.append("w.id IN (SELECT rowid FROM warnings_fts WHERE warnings_fts MATCH ?)")
+        params.append('"' + query.replace('"', '""') + '"')
+    elif query:
+        where.append("(w.title LIKE ? OR w.headline LIKE ? OR w.description LIKE ?)")
+        params += [f"%{query}%"] * 3
+
+    if region:
+        key = next((k for k, label in REGION_THAI.items() if region in (k, label)), region)
+        where.append("w.id IN (SELECT warning_id FROM warning_regions WHERE region = ?)")
+        params.append(key)
+    if province:
+        where.append("w.id IN (SELECT warning_id FROM warning_provinces WHERE province_id = ?)")
+        params.append(get_gazetteer().lookup(province))
+    if since:
+        where.append("w.announce_date >= ?")
+        params.append(_iso(since))
+    if until:
+        condition, bound = _until_bound(until)
+        where.append(condition)
+        params.append(bound)
+
+    sql = "SELECT w.issue_no, w.announce_date, w.title, w.headline, w.description, w.url FROM warnings w"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY w.announce_date DESC LIMIT ?"
+    params.append(limit)
+
+    try:
+        return pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search archived TMD weather warnings")
+    parser.add_argument("query", help="text to search in title, headline and description (Thai or English)")
+    parser.add_argument("--region", help="region key or Thai name, e.g. north or ภาคเหนือ")
+    parser.add_argument("--province", help="province name in any known spelling")
+    parser.add_argument("--since", help="earliest announce date (YYYY-MM-DD)")
+    parser.add_argument("--until", help="latest announce date (YYYY-MM-DD)")
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = search_warnings(args.query, region=args.region, province=args.province,
+                              since=args.since, until=args.until, limit=args.limit)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{len(results)} warning(s) found in {elapsed_ms:.1f} ms")
+    if not results.empty:
+        print(results[['issue_no', 'announce_date', 'title']].to_string(index=False))
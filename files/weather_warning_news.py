@@ -1,7 +1,13 @@
 import requests
 import pandas as pd
 import xml.etree.ElementTree as ET
-import textwrap # Used for formatting long text
+import argparse
+import hashlib
+import json
+import os
+import time
+from warning_archive import archive_warnings, ARCHIVE_DB
+from thai_text import wrap, render_table
 
 # --- 1. Define API Key and URL ---
 # Use the same key you used in the original code (placeholder if not using a real key)
@@ -10,6 +16,22 @@ API_UKEY = "api12345"
 # API No. 10: Weather Warning News
 URL = f"https://data.tmd.go.th/api/WeatherWarningNews/v1/?uid={API_UID}&ukey={API_UKEY}"
 
+# Summary table columns and their console widths (display columns, so Thai combining marks take no space)
+SUMMARY_COLUMNS = [
+    ('Issue_No', 10), ('Announce_Date', 19), ('Title_Thai', 50),
+    ('Headline_Thai', 70), ('Effect_Start', 19), ('Effect_End', 19),
+]
+# Heading of the summary when only new or amended warnings are shown (--follow, tmd_daemon.py)
+CHANGES_TITLE = "New or Amended Weather Warning News (Sorted by Latest)"
+
+# Store of warnings already shown (used by --follow): IssueNo -> content hash + EffectEndDate + last seen time
+SEEN_STORE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "warning_seen.json")
+FOLLOW_INTERVAL = 600 # seconds between polls
+# Warnings without a readable EffectEndDate are dropped from the store this long after they were last seen
+UNDATED_MAX_AGE = pd.Timedelta(days=7)
+# Fields that define the content of a warning; a change in any of them counts as an amendment
+CONTENT_FIELDS = ['Announce_Date', 'Effect_Start', 'Effect_End', 'Title_Thai', 'Headline_Thai', 'Description_Thai', 'Web_URL_Thai']
+
 def get_xml_text(element, tag, default_val="N/A"):
     """Safely retrieves the text content of a sub-element, stripping whitespace."""
     if element is None:
@@ -19,16 +41,19 @@ def get_xml_text(element, tag, default_val="N/A"):
     # Strip whitespace to ensure clean text retrieval
     return node.text.strip() if node is not None and node.text else default_val
 
-def get_warning_news():
+def get_warning_news(session=None, raise_errors=False):
     """
     Fetches weather warning news from TMD API (No. 10) and extracts key details.
-    Returns a pandas DataFrame of the warnings.
+    Returns a pandas DataFrame of the warnings (empty when no warning is active).
+    An optional requests.Session can be passed to reuse connections between polls.
+    Errors also return an empty DataFrame, or are raised with raise_errors=True.
     """
     records = []
+    http = session or requests
     
     try:
         print(f"--- Fetching Weather Warning News (API No. 10) from {URL} ---")
-        response = requests.get(URL, timeout=15)
+        response = http.get(URL, timeout=15)
         # Raise an exception for bad status codes (4xx or 5xx)
         response.raise_for_status() 
         root = ET.fromstring(response.content)
@@ -59,35 +84,40 @@ def get_warning_news():
         return df
     
     except requests.exceptions.RequestException as e:
+        if raise_errors:
+            raise
         print(f"Network or API Error: {e}. Check URL/Key/Internet connection.")
         return pd.DataFrame()
     except ET.ParseError:
+        if raise_errors:
+            raise
         print("XML Parsing Error: The response is not a valid XML format.")
         return pd.DataFrame()
     except Exception as e:
+        if raise_errors:
+            raise
         print(f"An unexpected error occurred: {e}")
         return pd.DataFrame()
 
-def display_warning_news(df):
+def display_warning_news(df, title="Summary of All Weather Warning News (Sorted by Latest)"):
     """
     Displays the fetched news data, showing a summary table and the full text of the latest warning.
+    title is the heading above the table (e.g. CHANGES_TITLE when df holds only new or amended warnings).
     """
     if df.empty:
         return
 
     print("\n" + "="*80)
-    print("📢 Summary of All Weather Warning News (Sorted by Latest)")
+    print(f"📢 {title}")
     print("="*80)
     
     # --- 1. Display Summary Table (Analogous to Plotting) ---
-    summary_df = df[['Issue_No', 'Announce_Date', 'Title_Thai', 'Headline_Thai', 'Effect_Start', 'Effect_End']].copy()
-    
-    # Trim columns for better console display
-    summary_df['Title_Thai'] = summary_df['Title_Thai'].str.slice(0, 50) + '...'
-    summary_df['Headline_Thai'] = summary_df['Headline_Thai'].str.slice(0, 70) + '...'
+    columns = [name for name, _ in SUMMARY_COLUMNS]
+    widths = [width for _, width in SUMMARY_COLUMNS]
     
+    # Cells are trimmed by display width and the table is printed row by row (no full-table string)
     print("\n--- Warning News Summary Table ---\n")
-    print(summary_df.to_string(index=False))
+    render_table(df[columns].itertuples(index=False, name=None), columns, widths)
     
     # --- 2. Display Latest News Details (Analogous to Colorbar/Values) ---
     latest_news = df.iloc[0]
@@ -97,8 +127,10 @@ def display_warning_news(df):
     print("="*80)
     
     # Function to wrap long text for console readability
+    # (Thai has no spaces between words: proper word breaks need pythainlp; without it lines break only
+    #  between the words of thai_text's small built-in word list, so unknown words are kept whole)
     def wrap_text(text, width=78):
-        return "\n".join(textwrap.wrap(text, width=width))
+        return "\n".join(wrap(str(text), width=width))
 
     print(f"Announcement Date: {latest_news['Announce_Date']}")
     print(f"Effect Period: {latest_news['Effect_Start']} to {latest_news['Effect_End']}")
@@ -113,10 +145,144 @@ def display_warning_news(df):
     print(f"Full Document URL: {latest_news['Web_URL_Thai']}")
     print("\n")
 
+def warning_hash(record):
+    """Returns a stable hash of the content fields of one warning record."""
+    content = "\x1f".join(str(record.get(field, "")) for field in CONTENT_FIELDS)
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+def warning_key(record, digest):
+    """Store key of a warning: its IssueNo, or its content hash when the feed gives no IssueNo."""
+    issue_no = str(record.get('Issue_No', '')).strip()
+    return issue_no if issue_no and issue_no != "N/A" else f"hash:{digest}"
+
+def load_seen_store(path=SEEN_STORE):
+    """Loads the seen-warnings store ({key: {'hash', 'effect_end', 'last_seen'}}); empty if missing or unreadable."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Could not read warning store '{path}', starting empty: {e}")
+        return {}
+
+def save_seen_store(store, path=SEEN_STORE):
+    """Writes the store atomically so an interrupted monitor never leaves a broken file."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(store, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+def _thai_local_time(value):
+    """Parses a TMD date as naive Thai local time (TMD dates are UTC+7, usually without an offset)."""
+    ts = pd.to_datetime(value, errors='coerce')
+    if pd.notna(ts) and ts.tzinfo is not None:
+        ts = ts.tz_convert('Asia/Bangkok').tz_localize(None)
+    return ts
+
+def _now_thai():
+    return pd.Timestamp.now(tz='Asia/Bangkok').tz_localize(None)
+
+def expire_seen_store(store, now=None, max_age=UNDATED_MAX_AGE):
+    """
+    Drops warnings whose EffectEndDate has passed, and warnings without a readable EffectEndDate that were
+    last seen more than max_age ago, keeping the store bounded. Returns the number removed.
+    """
+    if not store:
+        return 0
+    now = now or _now_thai()
+    expired = []
+    for key, seen in store.items():
+        end = _thai_local_time(seen.get('effect_end'))
+        if pd.isna(end):
+            # ไม่มีวันสิ้นสุดที่อ่านได้: นับอายุจากครั้งล่าสุดที่พบในข้อมูล (รายการจาก Store เก่าเริ่มนับตอนนี้)
+            end = _thai_local_time(seen.setdefault('last_seen', now.isoformat())) + max_age
+        if end < now:
+            expired.append(key)
+    for key in expired:
+        del store[key]
+    return len(expired)
+
+def detect_changes(df, store, now=None):
+    """
+    Compares a fetched batch with the store and returns only the new or amended warnings
+    (column 'Change' = NEW/AMENDED). Warnings that have already ended are ignored.
+    The store is updated in place, including the last seen time of unchanged warnings.
+    """
+    if df.empty:
+        return df
+
+    now = now or _now_thai()
+    records = df.to_dict('records')
+    hashes = [warning_hash(record) for record in records]
+    ends = [_thai_local_time(value) for value in df['Effect_End']]
+
+    changed_rows, changes = [], []
+    for i, (record, digest, end) in enumerate(zip(records, hashes, ends)):
+        if pd.notna(end) and end < now:
+            continue
+        key = warning_key(record, digest)
+        seen = store.get(key)
+        if seen is not None and seen['hash'] == digest:
+            seen['last_seen'] = now.isoformat()
+            continue
+
+        changed_rows.append(i)
+        changes.append("NEW" if seen is None else "AMENDED")
+        store[key] = {'hash': digest, 'effect_end': record['Effect_End'], 'last_seen': now.isoformat()}
+
+    changed = df.iloc[changed_rows].copy()
+    changed['Change'] = changes
+    return changed.reset_index(drop=True)
+
+def follow_warning_news(interval=FOLLOW_INTERVAL, store_path=SEEN_STORE, archive=False):
+    """
+    Long-running monitor: polls the API every `interval` seconds and displays only new or amended warnings.
+    One HTTP session is reused for all polls; the seen store is persisted after every poll.
+    With archive=True the changed warnings are also added to the full-text archive (warning_archive.py).
+    """
+    store = load_seen_store(store_path)
+    session = requests.Session()
+    print(f"Following weather warnings every {interval}s (store: {store_path}, {len(store)} known). Press Ctrl+C to stop.")
+
+    try:
+        while True:
+            df = get_warning_news(session=session)
+            changes = detect_changes(df, store)
+            expired = expire_seen_store(store)
+            save_seen_store(store, store_path)
+
+            if changes.empty:
+                print(f"[{pd.Timestamp.now():%Y-%m-%d %H:%M:%S}] No new or amended warnings ({expired} expired).")
+            else:
+                counts = changes['Change'].value_counts().to_dict()
+                print(f"[{pd.Timestamp.now():%Y-%m-%d %H:%M:%S}] {counts.get('NEW', 0)} new, {counts.get('AMENDED', 0)} amended warning(s).")
+                display_warning_news(changes, title=CHANGES_TITLE)
+                if archive:
+                    archive_warnings(changes)
+
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\nStopped following weather warnings.")
+    finally:
+        session.close()
+
 
 if __name__ == "__main__":
-    df_warnings = get_warning_news()
-    if not df_warnings.empty:
-        display_warning_news(df_warnings)
+    parser = argparse.ArgumentParser(description="TMD Weather Warning News (API No. 10)")
+    parser.add_argument("--follow", action="store_true", help="keep polling and show only new or amended warnings")
+    parser.add_argument("--interval", type=int, default=FOLLOW_INTERVAL, help="seconds between polls in --follow mode")
+    parser.add_argument("--store", default=SEEN_STORE, help="file that remembers warnings already shown")
+    parser.add_argument("--archive", action="store_true", help=f"add fetched warnings to the searchable archive ({ARCHIVE_DB})")
+    args = parser.parse_args()
+
+    if args.follow:
+        follow_warning_news(interval=args.interval, store_path=args.store, archive=args.archive)
     else:
-        print("Finished process, but no data was displayed.")
\ No newline at end of file
+        df_warnings = get_warning_news()
+        if not df_warnings.empty:
+            display_warning_news(df_warnings)
+            if args.archive:
+                print(f"Archived {archive_warnings(df_warnings)} warning(s).")
+        else:
+            print("Finished process, but no data was displayed.")
\ No newline at end of file